@@ -1,12 +1,31 @@
-import logging
 import time
+PROCESS_STARTED = time.perf_counter()  # before the heavy imports, for startup timing
+
+import os
+import math
+import asyncio
+import logging
 from uuid import uuid4
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Response
+from typing import Dict, List, Optional
 from pydantic import BaseModel
+from prometheus_client import CollectorRegistry, generate_latest, multiprocess, CONTENT_TYPE_LATEST
 from contextlib import asynccontextmanager
 
 from ingestion_agents.ingestion_orchestrator import IngestionOrchestrator
+from ingestion_agents.ingestion_jobs import IngestionJobManager
+from ingestion_agents.ingestion_watcher import IngestionWatcher
 from orchestrator_agent import OrchestratorAgent
+from memory_agents.memory_precompute import MemoryPrecomputeJob, load_questions
+from infrastructure.usage import get_tier_totals
+from infrastructure.corpora import corpus_collection, resolve_collections
+from infrastructure.latency_budget import parse_budget
+from infrastructure.llm_client import LLMClientProvider
+from infrastructure.llm_scheduler import LLMOverloadedError
+from infrastructure.logging_config import configure_logging, shutdown_logging
+from infrastructure.qdrant_client import QdrantClientProvider
+from infrastructure.qdrant_snapshot import SnapshotPublisher
+from infrastructure.warmup import Readiness, run_warmup
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -14,14 +33,8 @@ load_dotenv()
 
 # ---------------- Logging ----------------
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    handlers=[
-        logging.FileHandler("./logs/app.log"),   # Persist logs
-        logging.StreamHandler()                 # Console logs
-    ]
-)
+# Rotated file + console, written from a background queue listener (see logging_config)
+configure_logging()
 
 logger = logging.getLogger("SuperRAGApp")
 
@@ -29,17 +42,61 @@ logger = logging.getLogger("SuperRAGApp")
 
 class IngestRequest(BaseModel):
     data_dir: str = "data"
+    tenant: Optional[str] = None
+    corpus: Optional[str] = None
 
 class ChatRequest(BaseModel):
     query: str
+    tenant: Optional[str] = None
+    corpora: Optional[List[str]] = None   # searched concurrently, results merged by score
+
+class PrecomputeRequest(BaseModel):
+    name: str = "default"                 # progress file name; resubmitting a name resumes it
+    questions: List[str] = []
+    sources: List[str] = []               # server-side .txt / .jsonl / app log paths (globs)
+    tenant: Optional[str] = None          # for `questions`; sources carry their own
+    corpora: Optional[List[str]] = None
+    top: Optional[int] = None
+    min_count: int = 1
+    concurrency: int = int(os.getenv("PRECOMPUTE_CONCURRENCY", "4"))
 
 # ---------------- App Lifespan ----------------
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Super RAG application starting up...")
+    readiness.mark_imported()
+
+    # Warm shared clients / collections; /readyz reports 503 until done.
+    # WARMUP_BLOCKING=1 holds startup until warm instead of serving right away.
+    warmup_task = asyncio.create_task(run_warmup(readiness))
+    if os.getenv("WARMUP_BLOCKING", "0") == "1":
+        await warmup_task
+
+    watcher = None
+    if os.getenv("INGEST_WATCH", "0") == "1":
+        if QdrantClientProvider.is_read_only():
+            logger.warning("INGEST_WATCH ignored: this worker serves a read-only Qdrant snapshot")
+        else:
+            watcher = IngestionWatcher(ingestion_jobs)
+            watcher.start()
+
+    # The writer of an embedded QDRANT_PATH publishes snapshots for read-only query workers
+    publisher = SnapshotPublisher()
+    if publisher.enabled and not os.getenv("QDRANT_URL") and not QdrantClientProvider.is_read_only():
+        publisher.start()
+
     yield
+
     logger.info("Super RAG application shutting down...")
+    warmup_task.cancel()
+    if watcher is not None:
+        await watcher.stop()
+    await publisher.stop()
+    await ingestion_jobs.shutdown()
+    for task in precompute_tasks.values():
+        task.cancel()
+    shutdown_logging()
 
 app = FastAPI(
     title="Super RAG – Agentic AI System",
@@ -49,50 +106,158 @@ app = FastAPI(
 
 # ---------------- Agents ----------------
 
+# Construction does no I/O: Qdrant, embedding and LLM clients are created
+# on first use (or by warmup), so import stays fast and never fails on a
+# dependency being down.
+readiness = Readiness(PROCESS_STARTED)
 ingestion_orchestrator = IngestionOrchestrator()
+ingestion_jobs = IngestionJobManager(ingestion_orchestrator.vector_store)
 orchestrator = OrchestratorAgent()
+precompute_jobs: Dict[str, MemoryPrecomputeJob] = {}
+precompute_tasks: Dict[str, asyncio.Task] = {}
 
 # ---------------- Endpoints ----------------
 
-@app.post("/ingest")
+@app.post("/ingest", status_code=202)
 async def ingest_documents(request: IngestRequest):
     """
-    Ingest documents from a folder:
-    - Load
-    - Chunk
-    - Embed
-    - Store in Qdrant
+    Submit an ingestion job for a folder (load, chunk, embed, store in Qdrant).
+    Runs in a worker process; poll GET /ingest/{job_id} for progress.
     """
+    logger.info(f"Received ingestion request for directory: {request.data_dir}")
+    if QdrantClientProvider.is_read_only():
+        raise HTTPException(
+            status_code=409,
+            detail="Ingestion is disabled on read-only query workers; send it to the writer process"
+        )
+
     try:
-        logger.info(f"Received ingestion request for directory: {request.data_dir}")
-        start = time.time()
+        collection_name = corpus_collection(request.tenant, request.corpus)
+        return await ingestion_jobs.submit(request.data_dir, collection_name=collection_name)
 
-        await ingestion_orchestrator.ingest(request.data_dir)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        latency = round(time.time() - start, 2)
-        return {
-            "status": "success",
-            "message": f"Documents ingested from '{request.data_dir}'",
-            "latency_seconds": latency
-        }
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
     except Exception as e:
-        logger.exception("Ingestion failed")
+        logger.exception("Ingestion submission failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/ingest")
+async def list_ingestion_jobs(limit: int = 50):
+    return await ingestion_jobs.list(limit)
+
+
+@app.get("/ingest/{job_id}")
+async def ingestion_job_status(job_id: str):
+    """
+    Status, progress (files / chunks / embeddings / stored points) and throughput of a job.
+    """
+    job = await ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingestion job: {job_id}")
+    return job
+
+
+@app.delete("/ingest/{job_id}")
+async def cancel_ingestion_job(job_id: str):
+    """
+    Cancel a queued or running job. Points already stored are kept.
+    """
+    job = await ingestion_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingestion job: {job_id}")
+    return job
+
+
+@app.post("/memory/precompute", status_code=202)
+async def precompute_memory(request: PrecomputeRequest):
+    """
+    Pre-warm semantic memory: run anticipated or frequent questions through
+    the pipeline in the background, behind live traffic. Poll
+    GET /memory/precompute/{name} for progress and the coverage report.
+    """
+    if QdrantClientProvider.is_read_only():
+        raise HTTPException(
+            status_code=409,
+            detail="Precomputation is disabled on read-only query workers; send it to the writer process"
+        )
+    task = precompute_tasks.get(request.name)
+    if task is not None and not task.done():
+        raise HTTPException(status_code=409, detail=f"Precompute job {request.name!r} is already running")
+
+    try:
+        resolve_collections(request.tenant, request.corpora)
+        entries = [
+            {"query": q, "tenant": request.tenant, "corpora": request.corpora}
+            for q in request.questions if q.strip()
+        ]
+        questions = load_questions(request.sources, entries=entries, top=request.top, min_count=request.min_count)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if not questions:
+        raise HTTPException(status_code=400, detail="No questions to precompute")
+
+    progress_dir = os.getenv("PRECOMPUTE_DIR", "./precompute")
+    job = MemoryPrecomputeJob(
+        orchestrator,
+        concurrency=request.concurrency,
+        progress_path=os.path.join(progress_dir, f"{os.path.basename(request.name)}.jsonl")
+    )
+
+    async def run_job():
+        try:
+            await job.run(questions)
+        except Exception as e:
+            logger.exception(f"Precompute job {request.name!r} failed")
+            job.status = {**job.status, "state": "failed", "error": str(e)}
+
+    precompute_jobs[request.name] = job
+    precompute_tasks[request.name] = asyncio.create_task(run_job())
+    logger.info(f"Precompute job {request.name!r} started with {len(questions)} questions")
+    return {"name": request.name, "questions": len(questions), "progress_path": job.progress_path}
+
+
+@app.get("/memory/precompute/{name}")
+async def precompute_status(name: str):
+    """
+    Progress of a precompute job; once finished, the report (statuses,
+    coverage, expected Tier-1 hit rate, cost).
+    """
+    job = precompute_jobs.get(name)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown precompute job: {name}")
+    return {"name": name, **job.status}
+
+
 @app.post("/superchat")
-async def super_chat(request: ChatRequest):
+async def super_chat(request: ChatRequest, x_latency_budget: Optional[str] = Header(None)):
     """
     Main Super RAG endpoint.
     Generates request_id, runs full agentic pipeline.
+    X-Latency-Budget (seconds) lets Tier-3 skip or downgrade stages to answer in time.
     """
     request_id = str(uuid4())
     logger.info(f"[{request_id}] Incoming query: {request.query}")
 
+    try:
+        collections = resolve_collections(request.tenant, request.corpora)
+        latency_budget = parse_budget(x_latency_budget)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     state = {
         "request_id": request_id,
-        "query": request.query
+        "query": request.query,
+        "tenant": request.tenant,
+        "corpora": request.corpora,
+        "collections": collections,
+        "latency_budget": latency_budget
     }
 
     try:
@@ -108,13 +273,84 @@ async def super_chat(request: ChatRequest):
             "sources": result_state.get("sources"),
             "citations": result_state.get("citations"),
             "semantic_hit": result_state.get("semantic_hit", False),
+            "escalation_reason": result_state.get("escalation_reason"),
+            "coalesced_with": result_state.get("coalesced_with"),
             "latency_seconds": latency,
+            "timings": result_state.get("timings"),
+            "usage": result_state.get("usage"),
+            "map_reduce": result_state.get("map_reduce"),
+            "latency_budget": result_state.get("latency_budget"),
+            "degradations": result_state.get("degradations"),
             "error": result_state.get("error")
         }
 
-        logger.info(f"[{request_id}] Response ready in {latency}s, mode={response['mode']}")
+        tier = (response["timings"] or {}).get("tier")
+        logger.info(f"[{request_id}] Response ready in {latency}s, tier={tier}, mode={response['mode']}")
         return response
 
+    except LLMOverloadedError as e:
+        # Fail fast instead of queueing behind a saturated model
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+
     except Exception as e:
         logger.exception(f"[{request_id}] Super RAG processing failed")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/healthz")
+async def healthz():
+    """
+    Liveness: the process is up and serving the event loop.
+    """
+    return {"status": "ok", "pid": os.getpid()}
+
+
+@app.get("/readyz")
+async def readyz(response: Response):
+    """
+    Readiness: 200 once warmup has completed, 503 before that (with progress / last error).
+    """
+    if not readiness.ready:
+        response.status_code = 503
+    return {**readiness.to_dict(), "pid": os.getpid(), "read_only": QdrantClientProvider.is_read_only()}
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus scrape endpoint:
+    per-agent / per-tier latency histograms, cache hit ratios, error counters.
+    With several workers, set PROMETHEUS_MULTIPROC_DIR so every worker's
+    metrics are aggregated here.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/usage")
+async def usage_totals():
+    """
+    Running LLM token and cost totals per tier (and per agent within each tier)
+    since process start.
+    """
+    return get_tier_totals()
+
+
+@app.get("/usage/llm")
+async def llm_usage():
+    """
+    Live LLM scheduler state of this worker (active / queued calls per model
+    lane) and its per-agent hedging rates and p99 latencies.
+    """
+    return {
+        "pid": os.getpid(),
+        "scheduler": LLMClientProvider.get_scheduler().stats(),
+        "hedging": LLMClientProvider.get_hedge_policy().stats()
+    }
@@ -0,0 +1,120 @@
+"""
+Per-request logging overhead on the calling (event-loop) thread.
+
+Replays the log lines a Tier-3 request emits (router, planner, analyst, citation
+and formatter payloads plus the usual progress lines) and compares:
+- before: synchronous FileHandler + StreamHandler, full payloads
+- after : queue-based handlers with rotation, payloads truncated / sampled
+
+    python -m benchmarks.bench_logging --requests 2000 --payload-chars 4000
+
+Requests run back to back with no idle time, so the listener thread competes
+with the caller for the GIL; expect the queue p99 to look worse here than in a
+server, where the listener drains while requests await I/O.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from contextlib import redirect_stderr
+
+import numpy as np
+
+from infrastructure.logging_config import LOG_FORMAT, configure_logging, shutdown_logging, log_payload
+
+PAYLOAD_LABELS = [
+    "Router raw response", "Planner raw output", "Analyst raw response received",
+    "Analyst final conclusion", "Citation raw response received", "Final answer"
+]
+
+
+def configure_sync_baseline(log_file: str):
+    """The original app.py setup: basicConfig with blocking handlers."""
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    logging.basicConfig(
+        level=logging.INFO,
+        format=LOG_FORMAT,
+        handlers=[logging.FileHandler(log_file), logging.StreamHandler()]
+    )
+
+
+def simulate_request(logger: logging.Logger, request_id: str, payload: str, use_log_payload: bool):
+    logger.info(f"[{request_id}] Incoming query: what is the remote work rule for a Financial Analyst?")
+    for step in ("SemanticMemory lookup started", "Semantic memory MISS", "Routing to Tier-3",
+                 "DocumentHunterAgent started", "LongContextLoaderAgent started", "CitationAgent started"):
+        logger.info(f"[{request_id}] {step}")
+
+    for label in PAYLOAD_LABELS:
+        if use_log_payload:
+            log_payload(logger, request_id, label, payload)
+        else:
+            logger.info(f"[{request_id}] {label}: {payload}")
+
+    logger.info(f"[{request_id}] Response ready in 12.3s, mode=Super RAG")
+
+
+def measure(requests: int, payload: str, use_log_payload: bool) -> np.ndarray:
+    logger = logging.getLogger("BenchLogging")
+    timings = np.empty(requests, dtype=np.float64)
+    for i in range(requests):
+        start = time.perf_counter()
+        simulate_request(logger, f"bench-{i}", payload, use_log_payload)
+        timings[i] = time.perf_counter() - start
+    return timings
+
+
+def report(name: str, timings: np.ndarray, log_file: str):
+    size = sum(
+        os.path.getsize(os.path.join(os.path.dirname(log_file), f))
+        for f in os.listdir(os.path.dirname(log_file))
+    )
+    print(
+        f"{name:<28} mean {timings.mean() * 1e6:8.1f}us  p50 {np.percentile(timings, 50) * 1e6:8.1f}us  "
+        f"p99 {np.percentile(timings, 99) * 1e6:8.1f}us  disk {size / 1024:8.0f}KB"
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Logging overhead per request")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--payload-chars", type=int, default=4000)
+    parser.add_argument("--max-chars", default="500", help="LOG_PAYLOAD_MAX_CHARS for the 'after' run")
+    parser.add_argument("--sample-rate", default="0.1", help="LOG_PAYLOAD_SAMPLE_RATE for the 'after' run")
+    args = parser.parse_args(argv)
+
+    payload = ("x" * 79 + "\n") * (args.payload_chars // 80)
+    results = []
+
+    # Console output goes to /dev/null so the terminal's speed doesn't dominate
+    with open(os.devnull, "w") as devnull, redirect_stderr(devnull):
+        before_file = os.path.join(tempfile.mkdtemp(prefix="superrag_log_before_"), "app.log")
+        configure_sync_baseline(before_file)
+        results.append(("before (sync, full)", measure(args.requests, payload, False), before_file))
+
+        os.environ["LOG_PAYLOAD_MAX_CHARS"] = args.max_chars
+        os.environ["LOG_PAYLOAD_SAMPLE_RATE"] = "1.0"
+        async_file = os.path.join(tempfile.mkdtemp(prefix="superrag_log_async_"), "app.log")
+        configure_logging(log_file=async_file, async_logging=True)
+        results.append(("after (queue, truncated)", measure(args.requests, payload, True), async_file))
+
+        os.environ["LOG_PAYLOAD_SAMPLE_RATE"] = args.sample_rate
+        sampled_file = os.path.join(tempfile.mkdtemp(prefix="superrag_log_sampled_"), "app.log")
+        configure_logging(log_file=sampled_file, async_logging=True)
+        results.append(("after (queue, sampled)", measure(args.requests, payload, True), sampled_file))
+
+        shutdown_logging()
+
+    print(f"{args.requests} requests, {len(PAYLOAD_LABELS)} payloads of {len(payload)} chars each")
+    for name, timings, log_file in results:
+        report(name, timings, log_file)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Tier-3 analysis benchmark: single-shot long-context analysis (context cache +
+one Pro call over all documents) vs map-reduce (parallel Flash extraction per
+document part, then one Pro call over the extracts).
+
+Runs the context loader, analyst and citation agents directly on large
+synthetic documents, with fake model latency that grows with input size, and
+reports latency per stage plus tokens and cost per agent for each mode.
+
+    python -m benchmarks.bench_map_reduce --docs 8 --sections 600 --requests 4 --concurrency 2
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+from typing import Dict, List
+
+from benchmarks.bench_pipeline import summarize
+from benchmarks.corpus import write_synthetic_corpus
+from benchmarks.fakes import FakeGenAIClient, FakeLLMBehaviour, FakeEmbeddings, LatencyModel, install_fakes
+
+MODES = {"single": 0, "map_reduce": 1}  # MAP_REDUCE_MIN_TOKENS: 0 disables, 1 always on
+
+
+async def run_mode(mode: str, documents: List[Dict], requests: int, concurrency: int) -> Dict:
+    from infrastructure.usage import start_request_usage, finish_request_usage
+    from reasoning_agents.long_context_loader_agent import LongContextLoaderAgent
+    from reasoning_agents.analyst_agent import AnalystAgent
+    from grounding_agents.citation_agent import CitationAgent
+
+    loader = LongContextLoaderAgent()
+    loader.map_reduce_min_tokens = MODES[mode]
+    analyst = AnalystAgent()
+    citation = CitationAgent()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    stages = {"context_loader": [], "analyst": [], "citation": []}
+    by_agent: Dict[str, Dict[str, float]] = {}
+    context_tokens = extract_tokens = parts = errors = 0
+
+    async def one(i: int):
+        nonlocal context_tokens, extract_tokens, parts, errors
+        async with semaphore:
+            usage = start_request_usage()
+            state = {
+                "request_id": f"bench-{mode}-{i}",
+                "query": "How many days per week may a Financial Analyst work from home?",
+                "entities": ["Financial Analyst"],
+                "required_attributes": ["Tier", "WFH Policy"],
+                "plan_steps": ["Find the role tier", "Look up the WFH rule for that tier"],
+                "relevant_documents": documents
+            }
+            start = time.perf_counter()
+            for name, agent in (("context_loader", loader), ("analyst", analyst), ("citation", citation)):
+                stage_start = time.perf_counter()
+                state = await agent.run(state)
+                stages[name].append(time.perf_counter() - stage_start)
+            latencies.append(time.perf_counter() - start)
+
+            errors += bool(state.get("error"))
+            context_tokens = state.get("context_tokens") or 0
+            if state.get("map_reduce"):
+                extract_tokens = state["map_reduce"]["extract_tokens"]
+                parts = state["map_reduce"]["parts"]
+
+            for agent, bucket in finish_request_usage(usage, "3").get("by_agent", {}).items():
+                total = by_agent.setdefault(agent, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "cost_usd": 0.0})
+                for key in total:
+                    total[key] += bucket[key]
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - wall_start
+
+    result = summarize(latencies, wall)
+    result.update({
+        "requests": requests,
+        "errors": errors,
+        "context_tokens": context_tokens,
+        "extract_tokens": extract_tokens,
+        "parts": parts,
+        "stages_p50": {name: float(sorted(v)[len(v) // 2]) for name, v in stages.items() if v},
+        "by_agent": {agent: {k: v / requests for k, v in totals.items()} for agent, totals in by_agent.items()}
+    })
+    return result
+
+
+def print_report(results: Dict[str, Dict]):
+    for mode, r in results.items():
+        print(
+            f"\n{mode}: {r['requests']} requests, {r['errors']} errors, "
+            f"context {r['context_tokens']} tokens"
+            + (f", {r['parts']} parts -> {r['extract_tokens']} extract tokens" if r["parts"] else "")
+        )
+        print(
+            f"  latency p50 {r['p50']:.2f}s  p95 {r['p95']:.2f}s  {r['throughput_rps']:.2f} req/s  | stage p50 "
+            + "  ".join(f"{name} {seconds:.2f}s" for name, seconds in r["stages_p50"].items())
+        )
+        print(f"  {'agent':<16}{'calls':>7}{'prompt tok':>12}{'cached tok':>12}{'cost $':>10}  (per request)")
+        for agent, t in r["by_agent"].items():
+            print(f"  {agent:<16}{t['calls']:>7.0f}{t['prompt_tokens']:>12.0f}{t['cached_tokens']:>12.0f}{t['cost_usd']:>10.4f}")
+        print(f"  {'total':<16}{'':>7}{sum(t['prompt_tokens'] for t in r['by_agent'].values()):>12.0f}"
+              f"{'':>12}{sum(t['cost_usd'] for t in r['by_agent'].values()):>10.4f}")
+
+
+async def main(args) -> int:
+    workdir = tempfile.mkdtemp(prefix="superrag_bench_mapreduce_")
+    names = write_synthetic_corpus(workdir, num_docs=args.docs, sections_per_doc=args.sections, seed=args.seed)
+    documents = []
+    for name in names:
+        with open(os.path.join(workdir, name), encoding="utf-8") as f:
+            documents.append({"doc_name": name, "metadata": {}, "full_text": f.read()})
+
+    llm = FakeGenAIClient(
+        FakeLLMBehaviour(intent="COMPLEX_REASONING"),
+        flash_latency=LatencyModel.parse(args.flash_latency, args.seed),
+        pro_latency=LatencyModel.parse(args.pro_latency, args.seed + 1),
+        cache_latency=LatencyModel.parse(args.cache_latency, args.seed + 2),
+        flash_seconds_per_1k_tokens=args.flash_per_1k,
+        pro_seconds_per_1k_tokens=args.pro_per_1k
+    )
+    install_fakes(llm, FakeEmbeddings(), install_qdrant=False)
+
+    results = {mode: await run_mode(mode, documents, args.requests, args.concurrency) for mode in args.modes}
+
+    print_report(results)
+    print(f"\nLLM calls: {llm.calls}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Single-shot vs map-reduce analysis benchmark")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--docs", type=int, default=8, help="Documents in the analysis context")
+    parser.add_argument("--sections", type=int, default=600, help="Sections per document (~100 tokens each)")
+    parser.add_argument("--requests", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--flash-latency", default="0.4:0.3", help="median[:sigma] seconds, plus --flash-per-1k")
+    parser.add_argument("--pro-latency", default="2.0:0.3", help="median[:sigma] seconds, plus --pro-per-1k")
+    parser.add_argument("--cache-latency", default="1.0:0.3", help="median[:sigma] seconds")
+    parser.add_argument("--flash-per-1k", type=float, default=0.005, help="Seconds per 1k input tokens")
+    parser.add_argument("--pro-per-1k", type=float, default=0.02, help="Seconds per 1k input tokens")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=args.log_level)
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,156 @@
+"""
+Tier-3 memory benchmark: peak RSS of concurrent long-context requests.
+
+Each concurrency level runs in a fresh child process. The child reads the
+documents from disk per request (as DocumentHunterAgent does), runs the
+context loader, analyst, citation and formatter agents on them with the
+fake Gemini client, and reports the process peak RSS over a warmed-up
+baseline, divided by the number of concurrent requests.
+
+    python -m benchmarks.bench_memory --docs 6 --sections 2000 --concurrency 1 4 16
+    python -m benchmarks.bench_memory --inline     # context cache unavailable (inline fallback path)
+
+Peak RSS is reset before the measured run through /proc/self/clear_refs (Linux).
+"""
+import os
+import sys
+import gc
+import json
+import asyncio
+import logging
+import argparse
+import tempfile
+import subprocess
+from typing import Dict
+
+from benchmarks.corpus import write_synthetic_corpus
+
+
+def _status_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _reset_peak_rss():
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+async def child(args) -> Dict:
+    from benchmarks.fakes import FakeGenAIClient, FakeLLMBehaviour, FakeEmbeddings, LatencyModel, install_fakes
+
+    llm = FakeGenAIClient(
+        FakeLLMBehaviour(intent="COMPLEX_REASONING"),
+        flash_latency=LatencyModel(args.latency),
+        pro_latency=LatencyModel(args.latency),
+        cache_latency=LatencyModel(args.latency)
+    )
+    if args.inline:
+        async def unavailable(model, config=None):
+            raise RuntimeError("context cache unavailable (benchmark)")
+        llm.aio.caches.create = unavailable
+    install_fakes(llm, FakeEmbeddings(), install_qdrant=False)
+
+    from reasoning_agents.long_context_loader_agent import LongContextLoaderAgent
+    from reasoning_agents.analyst_agent import AnalystAgent
+    from grounding_agents.citation_agent import CitationAgent
+    from reasoning_agents.response_formatter_agent import ResponseFormatterAgent
+
+    loader = LongContextLoaderAgent()
+    loader.map_reduce_min_tokens = 0  # measure the long-context path
+    agents = [loader, AnalystAgent(), CitationAgent(), ResponseFormatterAgent()]
+    names = sorted(os.listdir(args.corpus))
+
+    async def request(i: int) -> dict:
+        documents = []
+        for name in names:
+            with open(os.path.join(args.corpus, name), encoding="utf-8") as f:
+                documents.append({"doc_name": name, "metadata": {"source": name}, "full_text": f.read()})
+        state = {
+            "request_id": f"bench-mem-{i}",
+            "query": "How many days per week may a Financial Analyst work from home?",
+            "entities": ["Financial Analyst"],
+            "required_attributes": ["Tier", "WFH Policy"],
+            "plan_steps": ["Find the role tier", "Look up the WFH rule for that tier"],
+            "relevant_documents": documents
+        }
+        del documents
+        for agent in agents:
+            state = await agent.run(state)
+        return state
+
+    await request(-1)  # imports, SDK objects and allocator arenas are part of the baseline
+    gc.collect()
+    baseline_kb = _status_kb("VmRSS")
+    _reset_peak_rss()
+
+    states = await asyncio.gather(*(request(i) for i in range(args.concurrency_level)))
+    peak_kb = _status_kb("VmHWM")
+    retained_kb = _status_kb("VmRSS") - baseline_kb  # finished states still referenced here
+
+    return {
+        "concurrency": args.concurrency_level,
+        "errors": sum(1 for s in states if s.get("error")),
+        "baseline_mb": baseline_kb / 1024,
+        "peak_mb": peak_kb / 1024,
+        "peak_per_request_mb": (peak_kb - baseline_kb) / 1024 / args.concurrency_level,
+        "retained_per_request_mb": retained_kb / 1024 / args.concurrency_level
+    }
+
+
+def main(args) -> int:
+    workdir = tempfile.mkdtemp(prefix="superrag_bench_mem_")
+    write_synthetic_corpus(workdir, num_docs=args.docs, sections_per_doc=args.sections, seed=args.seed)
+    context_mb = sum(os.path.getsize(os.path.join(workdir, n)) for n in os.listdir(workdir)) / 1024 / 1024
+    print(f"Context per request: {args.docs} documents, {context_mb:.1f} MB ({'inline' if args.inline else 'cached'} path)")
+
+    header = f"{'concurrency':<13}{'err':>5}{'baseline MB':>13}{'peak MB':>10}{'peak/req MB':>13}{'retained/req MB':>17}"
+    print(header)
+    print("-" * len(header))
+    results = []
+    for level in args.concurrency:
+        command = [
+            sys.executable, "-m", "benchmarks.bench_memory", "--child", "--corpus", workdir,
+            "--concurrency-level", str(level), "--latency", str(args.latency)
+        ] + (["--inline"] if args.inline else [])
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        results.append(r)
+        print(
+            f"{r['concurrency']:<13}{r['errors']:>5}{r['baseline_mb']:>13.1f}{r['peak_mb']:>10.1f}"
+            f"{r['peak_per_request_mb']:>13.1f}{r['retained_per_request_mb']:>17.1f}"
+        )
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"context_mb": context_mb, "results": results}, f, indent=2)
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Peak RSS per concurrent Tier-3 request")
+    parser.add_argument("--docs", type=int, default=6)
+    parser.add_argument("--sections", type=int, default=2000, help="Sections per document (~0.5 KB each)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency", type=float, default=0.5, help="Fixed fake LLM latency (s), keeps requests overlapping")
+    parser.add_argument("--inline", action="store_true", help="Fail context cache creation (inline context path)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json-out")
+    parser.add_argument("--log-level", default="WARNING")
+    # Child process
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", help=argparse.SUPPRESS)
+    parser.add_argument("--concurrency-level", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=args.log_level)
+    if args.child:
+        print(json.dumps(asyncio.run(child(args))))
+        sys.exit(0)
+    sys.exit(main(args))
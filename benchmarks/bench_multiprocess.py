@@ -0,0 +1,180 @@
+"""
+Multi-worker serving benchmark.
+
+Builds a synthetic index in a temporary QDRANT_PATH and publishes a snapshot
+of it, then serves it with `uvicorn benchmarks.fake_app:app --workers N` in
+read-only snapshot mode (QDRANT_READ_ONLY=1) and drives /superchat over HTTP,
+once per worker count:
+
+    python -m benchmarks.bench_multiprocess --workers 1 4 --requests 200 --concurrency 32
+
+Reports throughput, latency percentiles, how many distinct worker processes
+answered /superchat (X-Worker-Pid) and the most of them answering at once.
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.bench_pipeline import summarize
+from benchmarks.corpus import write_synthetic_corpus, unique_queries
+from benchmarks.fakes import FakeGenAIClient, FakeLLMBehaviour, FakeEmbeddings, LatencyModel, install_fakes
+
+
+async def build_index(workdir: str, docs: int, dim: int) -> str:
+    corpus_dir = os.path.join(workdir, "data")
+    qdrant_path = os.path.join(workdir, "qdrant")
+    write_synthetic_corpus(corpus_dir, num_docs=docs)
+
+    install_fakes(
+        FakeGenAIClient(FakeLLMBehaviour(), LatencyModel(), LatencyModel()),
+        FakeEmbeddings(dim=dim),
+        qdrant_path=qdrant_path
+    )
+
+    from infrastructure import qdrant_snapshot
+    from infrastructure.qdrant_client import QdrantClientProvider
+    from ingestion_agents.ingestion_orchestrator import IngestionOrchestrator
+
+    await IngestionOrchestrator().ingest(corpus_dir)
+    QdrantClientProvider.get_client().close()
+    qdrant_snapshot.publish(qdrant_path, os.path.join(workdir, "qdrant_snapshots"))
+    return qdrant_path
+
+
+async def wait_ready(client: httpx.AsyncClient, workers: int, timeout: float):
+    """
+    Waits until /readyz answers 200 from every worker (or the timeout).
+    """
+    deadline = time.monotonic() + timeout
+    ready_pids = set()
+    while time.monotonic() < deadline and len(ready_pids) < workers:
+        try:
+            response = await client.get("/readyz")
+            if response.status_code == 200:
+                ready_pids.add(response.json()["pid"])
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    if not ready_pids:
+        raise RuntimeError("Server did not become ready")
+
+
+async def run_load(base_url: str, workers: int, queries: List[str], concurrency: int) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    spans: List[Tuple[float, float, str]] = []  # (start, end, answering worker pid)
+    errors = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        await wait_ready(client, workers, timeout=120)
+
+        async def one(query: str):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/superchat", json={"query": query})
+                end = time.perf_counter()
+                latencies.append(end - start)
+                if response.status_code != 200 or response.json().get("error"):
+                    errors += 1
+                if "X-Worker-Pid" in response.headers:
+                    spans.append((start, end, response.headers["X-Worker-Pid"]))
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(one(q) for q in queries))
+        wall = time.perf_counter() - wall_start
+
+    # Most distinct workers with a request in flight at the same moment (ends sort before starts)
+    active: Dict[str, int] = {}
+    concurrent_pids = 0
+    for _, delta, pid in sorted([(s, 1, pid) for s, _, pid in spans] + [(e, -1, pid) for _, e, pid in spans]):
+        active[pid] = active.get(pid, 0) + delta
+        concurrent_pids = max(concurrent_pids, sum(1 for n in active.values() if n > 0))
+
+    summary = summarize(latencies, wall)
+    summary.update({
+        "requests": len(queries), "errors": errors,
+        "worker_pids": len({pid for _, _, pid in spans}), "concurrent_pids": concurrent_pids
+    })
+    return summary
+
+
+def serve(workers: int, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "benchmarks.fake_app:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning"
+        ],
+        env=env
+    )
+
+
+async def main(args) -> int:
+    workdir = tempfile.mkdtemp(prefix="superrag_bench_mp_")
+    qdrant_path = await build_index(workdir, args.docs, args.dim)
+
+    env = {
+        **os.environ,
+        "QDRANT_PATH": qdrant_path,
+        "QDRANT_READ_ONLY": "1",
+        "QDRANT_SNAPSHOT_DIR": os.path.join(workdir, "qdrant_snapshots"),
+        "INGEST_JOBS_DB": os.path.join(workdir, "ingest_jobs.db"),
+        "BENCH_DIM": str(args.dim),
+        "BENCH_FLASH_LATENCY": args.flash_latency,
+        "BENCH_EMBED_LATENCY": args.embed_latency,
+        "LOG_FILE": os.path.join(workdir, "logs", "app.log"),
+        "LOG_LEVEL": args.log_level,
+    }
+
+    results = {}
+    for workers in args.workers:
+        multiproc_dir = os.path.join(workdir, f"prometheus_{workers}")
+        os.makedirs(multiproc_dir)
+        server = serve(workers, args.port, {**env, "PROMETHEUS_MULTIPROC_DIR": multiproc_dir})
+        try:
+            queries = unique_queries(args.requests, seed=args.seed + workers)
+            results[workers] = await run_load(f"http://127.0.0.1:{args.port}", workers, queries, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    header = f"{'workers':<10}{'pids':>6}{'at once':>9}{'n':>6}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}"
+    print(header)
+    print("-" * len(header))
+    for workers, r in results.items():
+        print(
+            f"{workers:<10}{r['worker_pids']:>6}{r['concurrent_pids']:>9}{r['requests']:>6}{r['errors']:>6}"
+            f"{r['p50'] * 1000:>10.1f}{r['p95'] * 1000:>10.1f}{r['throughput_rps']:>10.2f}"
+        )
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-worker serving benchmark (read-only Qdrant snapshots)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--flash-latency", default="0.05", help="median[:sigma] seconds")
+    parser.add_argument("--embed-latency", default="0.005", help="median[:sigma] seconds")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=args.log_level)
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,221 @@
+"""
+Offline performance benchmark for the Super RAG pipeline.
+
+Swaps the Gemini client and the embedding model for local fakes with configurable
+latency distributions, runs against a temporary local Qdrant, and reports
+p50/p95/p99 latency and throughput per tier and concurrency level, plus ingestion.
+
+    python -m benchmarks.bench_pipeline --tiers 1 2 3 --concurrency 1 8 32 --requests 64
+
+Use --json-out to save results and --baseline to fail (exit 1) on p95 regressions.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.corpus import write_synthetic_corpus, unique_queries
+from benchmarks.fakes import (
+    LatencyModel, FakeLLMBehaviour, FakeGenAIClient, FakeEmbeddings, install_fakes
+)
+
+TIER_INTENTS = {2: "SIMPLE_LOOKUP", 3: "COMPLEX_REASONING"}
+TIER_MODE_MARKERS = {1: "Semantic Memory", 2: "Simple RAG", 3: "Super RAG"}
+
+
+def summarize(latencies: List[float], wall_seconds: float) -> Dict[str, float]:
+    arr = np.asarray(latencies, dtype=np.float64)
+    return {
+        "p50": float(np.percentile(arr, 50)),
+        "p95": float(np.percentile(arr, 95)),
+        "p99": float(np.percentile(arr, 99)),
+        "mean": float(arr.mean()),
+        "throughput_rps": len(latencies) / wall_seconds if wall_seconds > 0 else 0.0
+    }
+
+
+async def run_load(orchestrator, queries: List[str], concurrency: int, tier: int) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    wrong_tier = 0
+
+    async def one(i: int, query: str):
+        nonlocal errors, wrong_tier
+        async with semaphore:
+            state = {"request_id": f"bench-t{tier}-c{concurrency}-{i}", "query": query}
+            start = time.perf_counter()
+            result = await orchestrator.run(state)
+            latencies.append(time.perf_counter() - start)
+
+            if result.get("error"):
+                errors += 1
+            if TIER_MODE_MARKERS[tier] not in (result.get("mode") or ""):
+                wrong_tier += 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one(i, q) for i, q in enumerate(queries)))
+    wall = time.perf_counter() - wall_start
+
+    summary = summarize(latencies, wall)
+    summary.update({"requests": len(queries), "errors": errors, "wrong_tier": wrong_tier})
+    return summary
+
+
+async def run_ingestion_benchmark(corpus_dir: str, runs: int) -> Dict[str, float]:
+    from infrastructure.qdrant_client import QdrantClientProvider
+    from ingestion_agents.ingestion_orchestrator import IngestionOrchestrator
+    from ingestion_agents.vector_store_agent import VectorStoreAgent
+
+    latencies = []
+    chunks = 0
+    for run in range(runs):
+        ingestion = IngestionOrchestrator()
+        ingestion.vector_store = VectorStoreAgent(collection_name=f"bench_ingest_{run}")
+
+        start = time.perf_counter()
+        await ingestion.ingest(corpus_dir)
+        latencies.append(time.perf_counter() - start)
+
+        chunks = QdrantClientProvider.get_client().count(f"bench_ingest_{run}").count
+
+    summary = summarize(latencies, sum(latencies))
+    summary.update({
+        "runs": runs,
+        "documents": len(os.listdir(corpus_dir)),
+        "chunks": chunks,
+        "chunks_per_second": chunks / (sum(latencies) / runs)
+    })
+    return summary
+
+
+def print_table(results: Dict[str, Dict]):
+    header = f"{'scenario':<16}{'n':>6}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        if name == "ingestion":
+            continue
+        print(
+            f"{name:<16}{r['requests']:>6}{r['errors'] + r['wrong_tier']:>6}"
+            f"{r['p50'] * 1000:>10.1f}{r['p95'] * 1000:>10.1f}{r['p99'] * 1000:>10.1f}"
+            f"{r['throughput_rps']:>10.2f}"
+        )
+
+    if "ingestion" in results:
+        r = results["ingestion"]
+        print(
+            f"\ningestion: {r['documents']} docs, {r['chunks']} chunks, "
+            f"p50 {r['p50']:.2f}s, {r['chunks_per_second']:.0f} chunks/s"
+        )
+
+
+def check_regressions(results: Dict[str, Dict], baseline_path: str, max_regression: float) -> List[str]:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    failures = []
+    for name, r in results.items():
+        if name not in baseline or name == "ingestion":
+            continue
+        allowed = baseline[name]["p95"] * (1 + max_regression)
+        if r["p95"] > allowed:
+            failures.append(f"{name}: p95 {r['p95'] * 1000:.1f}ms > allowed {allowed * 1000:.1f}ms")
+    return failures
+
+
+async def main(args) -> int:
+    workdir = tempfile.mkdtemp(prefix="superrag_bench_")
+    corpus_dir = os.path.join(workdir, "data")
+    write_synthetic_corpus(corpus_dir, num_docs=args.docs)
+
+    behaviour = FakeLLMBehaviour()
+    llm = FakeGenAIClient(
+        behaviour,
+        flash_latency=LatencyModel.parse(args.flash_latency, args.seed),
+        pro_latency=LatencyModel.parse(args.pro_latency, args.seed + 1),
+        cache_latency=LatencyModel.parse(args.cache_latency, args.seed + 2)
+    )
+    embeddings = FakeEmbeddings(dim=args.dim, latency=LatencyModel.parse(args.embed_latency, args.seed + 3))
+    install_fakes(llm, embeddings, qdrant_path=os.path.join(workdir, "qdrant"))
+
+    from orchestrator_agent import OrchestratorAgent
+    from infrastructure.qdrant_client import QdrantClientProvider
+    from ingestion_agents.ingestion_orchestrator import IngestionOrchestrator
+
+    results: Dict[str, Dict] = {}
+
+    results["ingestion"] = await run_ingestion_benchmark(corpus_dir, args.ingest_runs)
+    await IngestionOrchestrator().ingest(corpus_dir)
+
+    orchestrator = OrchestratorAgent()
+    orchestrator.hunter.data_dir = corpus_dir
+    orchestrator.routing_mode = args.routing_mode
+
+    for tier in args.tiers:
+        for concurrency in args.concurrency:
+            queries = unique_queries(args.requests, seed=args.seed + tier * 1000 + concurrency)
+
+            if tier == 1:
+                # Pre-populate semantic memory so every query is a Tier-1 hit
+                for q in queries:
+                    await orchestrator.semantic_memory.store({"query": q, "final_answer": "cached", "mode": "bench"})
+            elif args.routing_mode == "cascade":
+                # Force the cascade outcome: accept everything at Tier-2, or escalate everything
+                orchestrator.cascade_min_top_score = -1.0 if tier == 2 else 2.0
+                orchestrator.cascade_max_sources = 10 ** 6
+            else:
+                behaviour.intent = TIER_INTENTS[tier]
+
+            results[f"tier{tier}_c{concurrency}"] = await run_load(orchestrator, queries, concurrency, tier)
+
+    QdrantClientProvider.get_client().close()
+
+    print_table(results)
+    print(f"\nLLM calls: {llm.calls}")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        failures = check_regressions(results, args.baseline, args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline Super RAG pipeline benchmark")
+    parser.add_argument("--tiers", type=int, nargs="+", default=[1, 2, 3], choices=[1, 2, 3])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=64, help="Requests per tier/concurrency level")
+    parser.add_argument("--docs", type=int, default=20, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=384, help="Fake embedding dimension")
+    parser.add_argument("--flash-latency", default="0.4:0.5", help="median[:sigma] seconds")
+    parser.add_argument("--pro-latency", default="2.0:0.5", help="median[:sigma] seconds")
+    parser.add_argument("--cache-latency", default="0.5:0.3", help="median[:sigma] seconds")
+    parser.add_argument("--embed-latency", default="0.05:0.3", help="median[:sigma] seconds")
+    parser.add_argument("--routing-mode", default="router", choices=["router", "cascade"])
+    parser.add_argument("--ingest-runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json-out")
+    parser.add_argument("--baseline", help="JSON from a previous --json-out run")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Allowed p95 increase (fraction)")
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=args.log_level)
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,340 @@
+"""
+Traffic replay load generator.
+
+Extracts the /superchat query stream from app logs (LOG_FILE, rotated files
+via a glob) or a JSONL file of {"query", ["timestamp", "tenant", "corpora"]}
+and replays it over HTTP:
+
+- open loop: requests are sent on a fixed arrival schedule (Poisson at each
+  --rates value, or the logged inter-arrival gaps divided by --speedup),
+  whether or not earlier ones have finished, so queueing shows up as latency;
+- closed loop: --concurrency workers send back to back, for a concurrency sweep.
+
+Without --base-url a stub server is started (benchmarks.fake_app on a
+synthetic index, like bench_multiprocess); with it, any running deployment
+(real or stubbed backends) is targeted.
+
+    python -m benchmarks.bench_replay --queries "logs/app.log*" --rates 2 5 10 20 --duration 30
+    python -m benchmarks.bench_replay --queries traffic.jsonl --concurrency 1 4 16 64 --requests 200
+    python -m benchmarks.bench_replay --queries "logs/app.log*" --base-url http://localhost:8000 --speedup 4
+
+Reports per-tier latency percentiles, error rate and throughput per step,
+and the saturation point: the last step within --slo-p95 and
+--max-error-rate that also kept up with the offered rate (open loop) or
+still gained throughput (closed loop).
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_multiprocess import build_index, wait_ready
+from infrastructure.query_log import load_queries, tier_for_mode
+
+
+async def send(client: httpx.AsyncClient, entry: Dict) -> Dict:
+    body = {"query": entry["query"]}
+    for field in ("tenant", "corpora"):
+        if entry.get(field):
+            body[field] = entry[field]
+
+    start = time.perf_counter()
+    try:
+        response = await client.post("/superchat", json=body)
+    except httpx.HTTPError as e:
+        return {"latency": time.perf_counter() - start, "tier": "error", "error": type(e).__name__}
+    latency = time.perf_counter() - start
+
+    if response.status_code != 200:
+        tier = "rejected" if response.status_code in (429, 503) else "error"
+        return {"latency": latency, "tier": tier, "error": f"HTTP {response.status_code}"}
+
+    data = response.json()
+    tier = (data.get("timings") or {}).get("tier") or tier_for_mode(data.get("mode")) or "unknown"
+    return {"latency": latency, "tier": tier, "error": data.get("error")}
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {"n": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    arr = np.asarray(latencies)
+    return {
+        "n": len(latencies),
+        "p50": float(np.percentile(arr, 50)),
+        "p95": float(np.percentile(arr, 95)),
+        "p99": float(np.percentile(arr, 99))
+    }
+
+
+def summarize_step(results: List[Dict], wall: float, shed: int = 0, lag: Optional[List[float]] = None) -> Dict:
+    ok = [r for r in results if not r["error"]]
+    by_tier: Dict[str, List[float]] = {}
+    for r in ok:
+        by_tier.setdefault(r["tier"], []).append(r["latency"])
+
+    sent = len(results) + shed
+    summary = {
+        "sent": sent,
+        "ok": len(ok),
+        "errors": len(results) - len(ok),
+        "shed": shed,
+        "error_rate": (sent - len(ok)) / sent if sent else 0.0,
+        "throughput_rps": len(ok) / wall if wall > 0 else 0.0,
+        "all": percentiles([r["latency"] for r in ok]),
+        "by_tier": {tier: percentiles(values) for tier, values in sorted(by_tier.items())}
+    }
+    if lag:
+        summary["send_lag_p95"] = float(np.percentile(lag, 95))
+    return summary
+
+
+def arrival_offsets(queries: List[Dict], count: int, rate: Optional[float], speedup: float, rng: random.Random) -> List[float]:
+    """
+    Seconds from the step start at which each request is sent: Poisson
+    arrivals at `rate`, or the logged gaps divided by `speedup` when no rate
+    is given (requires timestamps).
+    """
+    if rate:
+        offsets, t = [], 0.0
+        for _ in range(count):
+            t += rng.expovariate(rate)
+            offsets.append(t)
+        return offsets
+
+    stamps = [q["timestamp"] for q in queries[:count]]
+    return [(stamp - stamps[0]) / speedup for stamp in stamps]
+
+
+async def open_loop(client: httpx.AsyncClient, queries: List[Dict], offsets: List[float], max_in_flight: int) -> Dict:
+    results: List[Dict] = []
+    lag: List[float] = []
+    tasks = []
+    shed = 0
+    in_flight = 0
+
+    async def one(entry: Dict):
+        nonlocal in_flight
+        try:
+            results.append(await send(client, entry))
+        finally:
+            in_flight -= 1
+
+    start = time.perf_counter()
+    for entry, offset in zip(queries, offsets):
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lag.append(max(time.perf_counter() - start - offset, 0.0))
+
+        if in_flight >= max_in_flight:
+            shed += 1  # the client is out of connections; counts as an error
+            continue
+        in_flight += 1
+        tasks.append(asyncio.create_task(one(entry)))
+
+    await asyncio.gather(*tasks)
+    return summarize_step(results, time.perf_counter() - start, shed, lag)
+
+
+async def closed_loop(client: httpx.AsyncClient, queries: List[Dict], concurrency: int) -> Dict:
+    results: List[Dict] = []
+    pending = iter(queries)
+
+    async def worker():
+        for entry in pending:
+            results.append(await send(client, entry))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize_step(results, time.perf_counter() - start)
+
+
+def take(queries: List[Dict], count: int) -> List[Dict]:
+    # Cycle through the logged stream when a step needs more requests than it has
+    return [queries[i % len(queries)] for i in range(count)]
+
+
+def find_saturation(steps: Dict[str, Dict], args) -> Optional[str]:
+    """
+    Last step of one sweep that met the SLO and error budget and, in open
+    loop, served at least 90% of the offered rate; in closed loop, that
+    still raised throughput by --min-gain over the previous step.
+    """
+    saturated, best = None, 0.0
+    for name, step in steps.items():
+        within = step["error_rate"] <= args.max_error_rate and (not args.slo_p95 or step["all"]["p95"] <= args.slo_p95)
+        if step["offered_rps"]:
+            within = within and step["throughput_rps"] >= 0.9 * step["offered_rps"]
+        elif best:
+            within = within and step["throughput_rps"] >= best * (1 + args.min_gain)
+        if not within:
+            break
+        saturated, best = name, max(best, step["throughput_rps"])
+    return saturated
+
+
+def print_report(steps: Dict[str, Dict]):
+    header = (
+        f"{'step':<14}{'tier':<10}{'n':>6}{'err %':>8}{'req/s':>9}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name, step in steps.items():
+        p = step["all"]
+        print(
+            f"{name:<14}{'all':<10}{step['sent']:>6}{step['error_rate'] * 100:>8.1f}{step['throughput_rps']:>9.2f}"
+            f"{p['p50'] * 1000:>10.1f}{p['p95'] * 1000:>10.1f}{p['p99'] * 1000:>10.1f}"
+            + (f"   offered {step['offered_rps']:.2f}/s, send lag p95 {step['send_lag_p95'] * 1000:.0f}ms"
+               if step["offered_rps"] else "")
+        )
+        for tier, p in step["by_tier"].items():
+            print(
+                f"{'':<14}{tier:<10}{p['n']:>6}{'':>8}{'':>9}"
+                f"{p['p50'] * 1000:>10.1f}{p['p95'] * 1000:>10.1f}{p['p99'] * 1000:>10.1f}"
+            )
+
+
+def print_saturation(sweep: str, steps: Dict[str, Dict], saturation: Optional[str]):
+    if not steps:
+        return
+    if saturation is None:
+        print(f"{sweep}: over the limits from the first step")
+    elif saturation == list(steps)[-1]:
+        print(f"{sweep}: not saturated (last step {saturation} within limits)")
+    else:
+        step = steps[saturation]
+        print(f"{sweep}: saturates after {saturation} ({step['throughput_rps']:.2f} req/s, p95 {step['all']['p95'] * 1000:.0f}ms)")
+
+
+def start_stub(workdir: str, qdrant_path: str, args):
+    from benchmarks.bench_multiprocess import serve
+
+    env = {
+        **os.environ,
+        "QDRANT_PATH": qdrant_path,
+        "INGEST_JOBS_DB": os.path.join(workdir, "ingest_jobs.db"),
+        "BENCH_INTENT": args.stub_intent,
+        "BENCH_DIM": str(args.dim),
+        "BENCH_FLASH_LATENCY": args.flash_latency,
+        "BENCH_PRO_LATENCY": args.pro_latency,
+        "BENCH_EMBED_LATENCY": args.embed_latency,
+        "LOG_FILE": os.path.join(workdir, "logs", "app.log"),
+        "LOG_LEVEL": args.log_level,
+    }
+    if args.workers > 1:
+        env["QDRANT_READ_ONLY"] = "1"
+    return serve(args.workers, args.port, env)
+
+
+async def main(args) -> int:
+    queries = load_queries(args.queries)
+    if not queries:
+        print("No queries found")
+        return 1
+    print(f"Loaded {len(queries)} queries")
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        workdir = tempfile.mkdtemp(prefix="superrag_bench_replay_")
+        qdrant_path = await build_index(workdir, args.docs, args.dim)
+        server = start_stub(workdir, qdrant_path, args)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    steps: Dict[str, Dict] = {}
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+            await wait_ready(client, 1, timeout=120)
+
+            if args.rates or args.speedup:
+                for rate in args.rates or [None]:
+                    if rate:
+                        count = args.requests or int(rate * args.duration)
+                    else:
+                        count = min(args.requests or len(queries), len(queries))
+                        if any(q.get("timestamp") is None for q in queries[:count]):
+                            raise ValueError("--speedup replays logged timing; these queries have no timestamps")
+                    step_queries = take(queries, count)
+                    offsets = arrival_offsets(step_queries, count, rate, args.speedup, rng)
+                    # Realized rate of this schedule, which short Poisson steps can miss by a lot
+                    offered = count / offsets[-1] if offsets[-1] > 0 else 0.0
+                    name = f"rate {rate:g}/s" if rate else f"x{args.speedup:g} replay"
+                    steps[name] = await open_loop(client, step_queries, offsets, args.max_in_flight)
+                    steps[name]["offered_rps"] = offered
+
+            for concurrency in args.concurrency:
+                name = f"conc {concurrency}"
+                steps[name] = await closed_loop(client, take(queries, args.requests or len(queries)), concurrency)
+                steps[name]["offered_rps"] = None
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    sweeps = {
+        "open loop": {name: step for name, step in steps.items() if step["offered_rps"] is not None},
+        "closed loop": {name: step for name, step in steps.items() if step["offered_rps"] is None}
+    }
+    saturation = {sweep: find_saturation(sweep_steps, args) for sweep, sweep_steps in sweeps.items() if sweep_steps}
+
+    print_report(steps)
+    print()
+    for sweep, sweep_steps in sweeps.items():
+        print_saturation(sweep, sweep_steps, saturation.get(sweep))
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"steps": steps, "saturation": saturation}, f, indent=2)
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay logged /superchat traffic against the API")
+    parser.add_argument("--queries", nargs="+", default=["./logs/app.log*"], help="app log or JSONL paths / globs")
+    parser.add_argument("--base-url", help="Target server; omit to start a stub server")
+    parser.add_argument("--rates", type=float, nargs="*", default=[], help="Open-loop Poisson arrival rates (req/s)")
+    parser.add_argument("--speedup", type=float, help="Open-loop replay of the logged timing, sped up by this factor")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per open-loop rate step")
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[], help="Closed-loop concurrency sweep")
+    parser.add_argument("--requests", type=int, help="Requests per step (default: duration x rate, or every query)")
+    parser.add_argument("--max-in-flight", type=int, default=512, help="Client connection cap; arrivals beyond it are shed")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--slo-p95", type=float, help="p95 latency limit in seconds for the saturation point")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--min-gain", type=float, default=0.05, help="Closed loop: throughput gain a step must add")
+    parser.add_argument("--json-out")
+    # Stub server
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--stub-intent", default="SIMPLE_LOOKUP", choices=["SIMPLE_LOOKUP", "COMPLEX_REASONING"])
+    parser.add_argument("--flash-latency", default="0.2:0.4", help="median[:sigma] seconds")
+    parser.add_argument("--pro-latency", default="1.0:0.4", help="median[:sigma] seconds")
+    parser.add_argument("--embed-latency", default="0.01", help="median[:sigma] seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log-level", default="WARNING")
+
+    args = parser.parse_args(argv)
+    if not args.rates and not args.speedup and not args.concurrency:
+        parser.error("give --rates, --speedup and/or --concurrency")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=args.log_level)
+    sys.exit(asyncio.run(main(args)))
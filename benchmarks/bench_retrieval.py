@@ -0,0 +1,129 @@
+"""
+Retrieval engine benchmark: embedded Qdrant (local mode) vs the memory-mapped
+exact-search engine (RETRIEVAL_ENGINE=exact), across corpus sizes.
+
+Fills one collection per size with random unit vectors and ~800-character
+payloads, exports it, then times VectorStoreRegistry.search through each
+engine: sequential latency, and throughput at a given concurrency (where the
+exact engine batches concurrent queries into one matrix product).
+
+    python -m benchmarks.bench_retrieval --sizes 1000 10000 50000 --queries 200 --concurrency 16
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.bench_pipeline import summarize
+from benchmarks.fakes import FakeGenAIClient, FakeLLMBehaviour, FakeEmbeddings, LatencyModel, install_fakes
+
+
+def fill_collection(collection_name: str, size: int, dim: int, rng: np.random.Generator):
+    from qdrant_client.http.models import PointStruct
+    from infrastructure.qdrant_client import QdrantClientProvider
+    from infrastructure.corpora import VectorStoreRegistry
+
+    VectorStoreRegistry.ensure_collection(collection_name)
+    client = QdrantClientProvider.get_client()
+    filler = "policy text " * 66
+    for start in range(0, size, 1000):
+        vectors = rng.normal(size=(min(1000, size - start), dim)).astype(np.float32)
+        client.upsert(collection_name, [
+            PointStruct(
+                id=start + i,
+                vector=vector.tolist(),
+                payload={"page_content": filler, "metadata": {"source": f"doc_{(start + i) // 50}.txt", "chunk_id": start + i}}
+            )
+            for i, vector in enumerate(vectors)
+        ])
+
+
+async def run_engine(engine: str, collection_name: str, queries: List[List[float]], k: int, concurrency: int) -> Dict:
+    from infrastructure.corpora import VectorStoreRegistry
+
+    os.environ["RETRIEVAL_ENGINE"] = engine
+    await VectorStoreRegistry.search([collection_name], "", k, embedding=queries[0])  # open / warm
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        await VectorStoreRegistry.search([collection_name], "", k, embedding=query)
+        latencies.append(time.perf_counter() - start)
+    result = summarize(latencies, sum(latencies))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(query):
+        async with semaphore:
+            await VectorStoreRegistry.search([collection_name], "", k, embedding=query)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    result["concurrent_qps"] = len(queries) / (time.perf_counter() - start)
+    return result
+
+
+async def main(args) -> int:
+    workdir = tempfile.mkdtemp(prefix="superrag_bench_retrieval_")
+    os.environ["EXACT_INDEX_DIR"] = os.path.join(workdir, "exact")
+    os.environ["TENANT_SEARCH_CONCURRENCY"] = str(args.concurrency)
+    install_fakes(
+        FakeGenAIClient(FakeLLMBehaviour(), LatencyModel(), LatencyModel()),
+        FakeEmbeddings(dim=args.dim),
+        qdrant_path=os.path.join(workdir, "qdrant")
+    )
+
+    from infrastructure.exact_index import ExactIndex
+    from infrastructure.qdrant_client import QdrantClientProvider
+
+    rng = np.random.default_rng(args.seed)
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32).tolist()
+
+    header = f"{'size':>8}  {'engine':<8}{'p50 ms':>10}{'p95 ms':>10}{'seq qps':>10}{'conc qps':>10}"
+    print(header)
+    print("-" * len(header))
+
+    for size in args.sizes:
+        collection_name = f"bench_retrieval_{size}"
+        start = time.perf_counter()
+        fill_collection(collection_name, size, args.dim, rng)
+        fill_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ExactIndex.export(collection_name)
+        export_seconds = time.perf_counter() - start
+
+        for engine in ("qdrant", "exact"):
+            r = await run_engine(engine, collection_name, queries, args.k, args.concurrency)
+            print(
+                f"{size:>8}  {engine:<8}{r['p50'] * 1000:>10.2f}{r['p95'] * 1000:>10.2f}"
+                f"{r['throughput_rps']:>10.0f}{r['concurrent_qps']:>10.0f}"
+            )
+        print(f"{'':>8}  (fill {fill_seconds:.1f}s, export {export_seconds:.2f}s)")
+
+    QdrantClientProvider.get_client().close()
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Qdrant local mode vs exact-search engine")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=args.log_level)
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,108 @@
+import os
+import random
+from typing import List
+
+_TOPICS = [
+    "remote work", "leave policy", "travel reimbursement", "security clearance",
+    "laptop provisioning", "overtime", "performance review", "onboarding",
+    "expense approval", "data retention", "access control", "parental leave"
+]
+
+_ROLES = [
+    "Financial Analyst", "Software Engineer", "Data Scientist", "HR Partner",
+    "Security Officer", "Support Engineer", "Product Manager", "Auditor"
+]
+
+_FILLER = (
+    "employees must follow the approved process and obtain written confirmation from "
+    "their line manager before the change takes effect exceptions are reviewed quarterly "
+    "by the policy committee and recorded in the central register"
+).split()
+
+
+def write_synthetic_corpus(target_dir: str, num_docs: int = 20, sections_per_doc: int = 12, seed: int = 7) -> List[str]:
+    """
+    Writes policy-like TXT documents (numbered sections, roles, tiers) to target_dir.
+    Returns the written file names.
+    """
+    rng = random.Random(seed)
+    os.makedirs(target_dir, exist_ok=True)
+    names = []
+
+    for d in range(num_docs):
+        topic = _TOPICS[d % len(_TOPICS)]
+        lines = [f"POLICY DOCUMENT {d}: {topic.upper()}", ""]
+
+        for s in range(1, sections_per_doc + 1):
+            role = rng.choice(_ROLES)
+            tier = rng.randint(1, 3)
+            filler = " ".join(rng.choice(_FILLER) for _ in range(rng.randint(40, 90)))
+            lines.append(f"SECTION {s}: {topic.title()} rules for {role}")
+            lines.append(f"    {role} positions are classified as Tier-{tier}. {filler}.")
+            lines.append("")
+
+        name = f"policy_{d:04d}.txt"
+        with open(os.path.join(target_dir, name), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        names.append(name)
+
+    return names
+
+
+_CJK_SENTENCES = [
+    "员工必须遵守批准的流程并在变更生效前获得直属经理的书面确认。",
+    "例外情况由政策委员会每季度审查并记录在中央登记册中。",
+    "リモートワークの申請は上長の承認後に有効となります。",
+]
+
+
+def mixed_documents(num_docs: int = 1000, seed: int = 13) -> List[dict]:
+    """
+    In-memory documents mixing the policy prose above with numbered clauses,
+    pipe tables and CJK paragraphs, so character-based chunks vary a lot in
+    token count. Returns [{"source", "path", "text"}].
+    """
+    rng = random.Random(seed)
+    documents = []
+
+    for d in range(num_docs):
+        topic = _TOPICS[d % len(_TOPICS)]
+        lines = [f"# {topic.title()} Policy {d}", ""]
+
+        for s in range(1, rng.randint(6, 14)):
+            kind = rng.random()
+            lines.append(f"SECTION {s}: {topic.title()} rules")
+            if kind < 0.5:
+                for c in range(1, rng.randint(2, 6)):
+                    filler = " ".join(rng.choice(_FILLER) for _ in range(rng.randint(15, 60)))
+                    lines.append(f"{s}.{c} {rng.choice(_ROLES)} staff: {filler}.")
+            elif kind < 0.75:
+                lines.append("| Role | Tier | Limit | Approver |")
+                lines.append("|---|---|---|---|")
+                for _ in range(rng.randint(5, 30)):
+                    lines.append(
+                        f"| {rng.choice(_ROLES)} | {rng.randint(1, 3)} | {rng.randint(100, 99999)}.{rng.randint(0, 99):02d} "
+                        f"| {rng.choice(_ROLES)} |"
+                    )
+            else:
+                lines.append("".join(rng.choice(_CJK_SENTENCES) for _ in range(rng.randint(5, 40))))
+            lines.append("")
+
+        documents.append({"source": f"mixed_{d:05d}.txt", "path": None, "text": "\n".join(lines)})
+
+    return documents
+
+
+def unique_queries(n: int, seed: int = 11) -> List[str]:
+    """
+    Queries that are distinct enough not to hit each other in semantic memory,
+    while still mentioning corpus vocabulary so retrieval returns documents.
+    """
+    rng = random.Random(seed)
+    queries = []
+    for i in range(n):
+        role = rng.choice(_ROLES)
+        topic = rng.choice(_TOPICS)
+        noise = " ".join(f"w{rng.randint(0, 10**6)}" for _ in range(6))
+        queries.append(f"What is the {topic} rule for a {role}? case {i} {noise}")
+    return queries
@@ -0,0 +1,37 @@
+"""
+The FastAPI app with the Gemini client and embedding model swapped for the
+benchmark fakes, for serving benchmarks under uvicorn:
+
+    uvicorn benchmarks.fake_app:app --workers 4
+
+Qdrant is left to the environment (QDRANT_URL / QDRANT_PATH / QDRANT_READ_ONLY).
+Responses carry the answering worker's pid in X-Worker-Pid.
+Fake latencies come from BENCH_FLASH_LATENCY, BENCH_PRO_LATENCY and
+BENCH_EMBED_LATENCY ("median[:sigma]" seconds); BENCH_DIM sets the vector size.
+"""
+import os
+
+from benchmarks.fakes import LatencyModel, FakeLLMBehaviour, FakeGenAIClient, FakeEmbeddings, install_fakes
+
+install_fakes(
+    FakeGenAIClient(
+        FakeLLMBehaviour(intent=os.getenv("BENCH_INTENT", "SIMPLE_LOOKUP")),
+        flash_latency=LatencyModel.parse(os.getenv("BENCH_FLASH_LATENCY", "0.05")),
+        pro_latency=LatencyModel.parse(os.getenv("BENCH_PRO_LATENCY", "0.2")),
+        cache_latency=LatencyModel.parse(os.getenv("BENCH_FLASH_LATENCY", "0.05"))
+    ),
+    FakeEmbeddings(
+        dim=int(os.getenv("BENCH_DIM", "384")),
+        latency=LatencyModel.parse(os.getenv("BENCH_EMBED_LATENCY", "0.005"))
+    ),
+    install_qdrant=False
+)
+
+from app import app  # noqa: E402  (fakes must be installed first)
+
+
+@app.middleware("http")
+async def worker_pid(request, call_next):
+    response = await call_next(request)
+    response.headers["X-Worker-Pid"] = str(os.getpid())
+    return response
@@ -0,0 +1,280 @@
+import json
+import time
+import random
+import asyncio
+import tempfile
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from infrastructure.embedding_backends import HashingEmbeddings
+
+
+class LatencyModel:
+    """
+    Log-normal latency distribution described by its median and sigma.
+    Spec format: "median_seconds[:sigma]", e.g. "0.4:0.6". sigma=0 gives a fixed delay.
+    """
+
+    def __init__(self, median: float = 0.0, sigma: float = 0.0, seed: Optional[int] = None):
+        self.median = median
+        self.sigma = sigma
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> "LatencyModel":
+        median, _, sigma = spec.partition(":")
+        return cls(float(median), float(sigma or 0.0), seed)
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        if self.sigma <= 0:
+            return self.median
+        return self.median * self.rng.lognormvariate(0.0, self.sigma)
+
+
+def _iter_texts(contents: Any) -> Iterator[str]:
+    """
+    Text segments of `contents` (strings, parts, contents or lists of them),
+    without joining them: long-context requests stay one copy in memory.
+    """
+    if isinstance(contents, str):
+        yield contents
+        return
+    if isinstance(contents, (list, tuple)):
+        for c in contents:
+            yield from _iter_texts(c)
+        return
+    text = getattr(contents, "text", None)
+    if text is not None:
+        yield text
+        return
+    parts = getattr(contents, "parts", None)
+    if parts:
+        for p in parts:
+            yield from _iter_texts(p)
+        return
+    yield str(contents)
+
+
+class FakeLLMBehaviour:
+    """
+    Canned outputs for every agent prompt, recognised by the prompt's role line.
+    `intent` controls what the router answers, which selects the tier under test.
+    """
+
+    def __init__(self, intent: str = "SIMPLE_LOOKUP", fenced_json: bool = True):
+        self.intent = intent
+        self.fenced_json = fenced_json
+
+    def _json(self, payload: Dict[str, Any]) -> str:
+        text = json.dumps(payload, indent=2)
+        return f"```json\n{text}\n```" if self.fenced_json else text
+
+    def respond(self, texts: List[str]) -> str:
+        """
+        `texts` are the request's text segments; the role line may be in any of them.
+        """
+        def asks(phrase: str) -> bool:
+            return any(phrase in text for text in texts)
+
+        if asks("routing classifier"):
+            return self._json({"intent": self.intent, "reason": "benchmark stub"})
+
+        if asks("Query Planning Agent"):
+            return self._json({
+                "entities": ["Financial Analyst"],
+                "required_attributes": ["Tier", "WFH Policy"],
+                "document_hints": ["HR policy", "IT roles"],
+                "reasoning_steps": ["Find the role tier", "Look up the WFH rule for that tier"]
+            })
+
+        if asks("senior enterprise analyst"):
+            return self._json({
+                "entities": ["Financial Analyst"],
+                "derived_facts": {"tier": "Tier-2", "wfh_days": "2 per week"},
+                "analysis": "The role maps to Tier-2; Tier-2 allows two WFH days.",
+                "final_conclusion": "A Financial Analyst may work from home 2 days per week.",
+                "confidence": 0.9
+            })
+
+        if asks("document fact extractor"):
+            return self._json({
+                "relevant": True,
+                "facts": [
+                    {"fact": "Financial Analyst tier", "value": "Tier-2", "section": "3.1",
+                     "evidence": "Financial Analyst positions are classified as Tier-2."},
+                    {"fact": "Tier-2 WFH allowance", "value": "2 days per week", "section": "4.2",
+                     "evidence": "Tier-2 employees may work from home two days per week."}
+                ]
+            })
+
+        if asks("Evidence Grounding Agent"):
+            evidence = {"document": "hr_policy.txt", "section": "4.2", "evidence": "Tier-2 employees..."}
+            return self._json({
+                "citations": {
+                    "derived_facts": {"tier": evidence, "wfh_days": evidence},
+                    "final_conclusion": evidence
+                }
+            })
+
+        if asks("Enterprise Answer Generator"):
+            return "A Financial Analyst may work from home 2 days per week [hr_policy.txt, 4.2]."
+
+        return "Benchmark stub answer based on the provided context."
+
+
+class _FakeModels:
+
+    def __init__(self, owner: "FakeGenAIClient"):
+        self.owner = owner
+
+    def generate_content(self, model: str, contents: Any, config: Any = None):
+        response = self.owner.build_response(model, contents, config)
+        time.sleep(self.owner.delay_for(model, response))
+        return response
+
+
+class _FakeAsyncModels:
+
+    def __init__(self, owner: "FakeGenAIClient"):
+        self.owner = owner
+
+    async def generate_content(self, model: str, contents: Any, config: Any = None):
+        response = self.owner.build_response(model, contents, config)
+        await asyncio.sleep(self.owner.delay_for(model, response))
+        return response
+
+
+class _FakeCaches:
+
+    def __init__(self, owner: "FakeGenAIClient"):
+        self.owner = owner
+
+    def create(self, model: str, config: Any = None):
+        time.sleep(self.owner.cache_latency.sample())
+        return self.owner.build_cache(config)
+
+
+class _FakeAsyncCaches:
+
+    def __init__(self, owner: "FakeGenAIClient"):
+        self.owner = owner
+
+    async def create(self, model: str, config: Any = None):
+        await asyncio.sleep(self.owner.cache_latency.sample())
+        return self.owner.build_cache(config)
+
+
+class FakeGenAIClient:
+    """
+    Drop-in stand-in for `google.genai.Client` (models, caches and their `aio` variants).
+    Latency is sampled per call from the model's LatencyModel: any model name
+    containing "pro" uses `pro_latency`, everything else `flash_latency`.
+    `*_seconds_per_1k_tokens` adds input-size dependent time (prompt plus
+    cached content), so long-context calls are slower than short ones.
+    Token counts are len(text) // 4; cached content counts as cached tokens.
+    """
+
+    def __init__(
+        self,
+        behaviour: FakeLLMBehaviour,
+        flash_latency: LatencyModel,
+        pro_latency: LatencyModel,
+        cache_latency: Optional[LatencyModel] = None,
+        flash_seconds_per_1k_tokens: float = 0.0,
+        pro_seconds_per_1k_tokens: float = 0.0
+    ):
+        self.behaviour = behaviour
+        self.flash_latency = flash_latency
+        self.pro_latency = pro_latency
+        self.cache_latency = cache_latency or LatencyModel()
+        self.flash_seconds_per_1k_tokens = flash_seconds_per_1k_tokens
+        self.pro_seconds_per_1k_tokens = pro_seconds_per_1k_tokens
+        self.calls: Dict[str, int] = {}
+        self._cached_chars: Dict[str, int] = {}
+
+        self.models = _FakeModels(self)
+        self.caches = _FakeCaches(self)
+        self.aio = SimpleNamespace(models=_FakeAsyncModels(self), caches=_FakeAsyncCaches(self))
+
+    def latency_for(self, model: str) -> LatencyModel:
+        return self.pro_latency if "pro" in model else self.flash_latency
+
+    def delay_for(self, model: str, response) -> float:
+        per_1k = self.pro_seconds_per_1k_tokens if "pro" in model else self.flash_seconds_per_1k_tokens
+        return self.latency_for(model).sample() + per_1k * response.usage_metadata.prompt_token_count / 1000
+
+    def build_cache(self, config: Any = None):
+        self.calls["caches.create"] = self.calls.get("caches.create", 0) + 1
+        name = f"cachedContents/bench-{self.calls['caches.create']}"
+        self._cached_chars[name] = sum(len(t) for t in _iter_texts(getattr(config, "contents", None) or ""))
+        return SimpleNamespace(name=name)
+
+    def build_response(self, model: str, contents: Any, config: Any = None):
+        self.calls[model] = self.calls.get(model, 0) + 1
+        texts = list(_iter_texts(contents))
+        prompt_chars = sum(len(t) for t in texts)
+        cached_chars = self._cached_chars.get(getattr(config, "cached_content", None) or "", 0)
+        text = self.behaviour.respond(texts)
+        usage = SimpleNamespace(
+            prompt_token_count=(prompt_chars + cached_chars) // 4,
+            cached_content_token_count=cached_chars // 4 or None,
+            candidates_token_count=len(text) // 4,
+            thoughts_token_count=None,
+            total_token_count=(prompt_chars + cached_chars + len(text)) // 4
+        )
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    HashingEmbeddings with an artificial per-call delay, standing in for a
+    remote embedding service (one round trip per embed call / batch).
+    """
+
+    def __init__(self, dim: int = 384, latency: Optional[LatencyModel] = None):
+        self.inner = HashingEmbeddings(dim=dim)
+        self.dim = dim
+        self.latency = latency or LatencyModel()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency.sample())
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency.sample())
+        return self.inner.embed_query(text)
+
+
+def install_fakes(
+    llm_client: FakeGenAIClient,
+    embeddings: FakeEmbeddings,
+    qdrant_path: Optional[str] = None,
+    install_qdrant: bool = True
+) -> Optional[str]:
+    """
+    Points the shared client providers at the fakes and a temporary local Qdrant.
+    Must run before the providers are first used (first request or warmup).
+    With install_qdrant=False, Qdrant stays configured from the environment
+    (QDRANT_URL / QDRANT_PATH / QDRANT_READ_ONLY).
+    Returns the Qdrant storage path.
+    """
+    from qdrant_client import QdrantClient
+
+    from infrastructure.llm_client import LLMClientProvider
+    from infrastructure.embedding_client import EmbeddingClientProvider, TracedEmbeddings
+    from infrastructure.qdrant_client import QdrantClientProvider, TracedQdrantClient
+
+    LLMClientProvider._client = llm_client
+    EmbeddingClientProvider._embeddings = TracedEmbeddings(embeddings)
+    EmbeddingClientProvider._vector_size = embeddings.dim
+
+    if not install_qdrant:
+        return None
+
+    qdrant_path = qdrant_path or tempfile.mkdtemp(prefix="superrag_bench_qdrant_")
+    QdrantClientProvider._client = TracedQdrantClient(QdrantClient(path=qdrant_path))
+    return qdrant_path
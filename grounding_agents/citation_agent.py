@@ -4,6 +4,10 @@ import json
 from google import genai
 from google.genai import types
 from infrastructure.llm_client import LLMClientProvider
+from infrastructure.llm_scheduler import LLMOverloadedError
+from infrastructure.logging_config import log_payload
+from infrastructure.structured_output import generate_structured
+from state import CitationResult
 
 logger = logging.getLogger("CitationAgent")
 
@@ -12,10 +16,14 @@ class CitationAgent:
     """
     Grounds each derived fact and the final conclusion
     in exact document sources (name + section/paragraph).
+
+    Last consumer of the inline context: state["context_parts"] is dropped
+    when it finishes, so finished requests don't keep the documents alive.
+    Runs on the analyst's model (state["analyst_model"] when overridden),
+    which the context cache was created for.
     """
 
     def __init__(self):
-        self.client = LLMClientProvider.get_client()
         self.model = LLMClientProvider.get_analyst_model()
 
     async def run(self, state: dict) -> dict:
@@ -23,13 +31,14 @@ class CitationAgent:
 
         analysis = state.get("analysis_json")
         cache_id = state.get("cache_id")
-        big_context = state.get("big_context_fallback")
+        context_parts = state.pop("context_parts", None) or []
+        model = state.get("analyst_model") or self.model
 
         if not analysis:
             logger.warning(f"[{request_id}] No analysis_json found. Skipping citation.")
             return state
 
-        logger.info(f"[{request_id}] CitationAgent started using model {self.model}")
+        logger.info(f"[{request_id}] CitationAgent started using model {model}")
 
         citation_prompt = f"""
 You are an Evidence Grounding Agent.
@@ -48,13 +57,14 @@ Return ONLY valid JSON in this format:
 
 {{
   "citations": {{
-     "derived_facts": {{
-         "<fact_key>": {{
+     "derived_facts": [
+         {{
+             "fact": "<fact_key>",
              "document": "...",
              "section": "...",
              "evidence": "..."
          }}
-     }},
+     ],
      "final_conclusion": {{
          "document": "...",
          "section": "...",
@@ -71,46 +81,48 @@ Structured Analysis:
             if cache_id:
                 logger.info(f"[{request_id}] Using cached long-context for citation grounding")
 
-                response = self.client.models.generate_content(
-                    model=self.model,
+                result, raw_text = await generate_structured(
+                    agent="citation",
+                    model=model,
                     contents=citation_prompt,
+                    schema=CitationResult,
                     config=types.GenerateContentConfig(
                         cached_content=cache_id,
                         temperature=0.1
-                    )
+                    ),
+                    request_id=request_id
                 )
             else:
                 logger.info(f"[{request_id}] Using inline long-context fallback for citation grounding")
 
-                full_prompt = f"""
-Context Documents:
-{big_context}
-
-{citation_prompt}
-"""
-
-                response = self.client.models.generate_content(
-                    model=self.model,
-                    contents=full_prompt,
+                contents = [
+                    types.Part.from_text(text="Context Documents:"),
+                    *context_parts,
+                    types.Part.from_text(text=citation_prompt)
+                ]
+
+                result, raw_text = await generate_structured(
+                    agent="citation",
+                    model=model,
+                    contents=contents,
+                    schema=CitationResult,
                     config=types.GenerateContentConfig(
                         temperature=0.1
-                    )
+                    ),
+                    request_id=request_id
                 )
 
-            raw_text = response.text.strip()
-            logger.info(f"[{request_id}] Citation raw response received {raw_text}")
-
-            # Remove Markdown code fences if present
-            if raw_text.startswith("```"):
-                raw_text: str = raw_text.replace("```json", "").replace("```", "").strip()
+            log_payload(logger, request_id, "Citation raw response received", raw_text)
 
-            citation_json = json.loads(raw_text)
-            state["citations"] = citation_json.get("citations", {})
+            state["citations"] = result.to_state()
 
             logger.info(f"[{request_id}] CitationAgent successfully grounded the answer")
 
             return state
 
+        except LLMOverloadedError:
+            raise
+
         except Exception as e:
             logger.exception(f"[{request_id}] CitationAgent failed")
             state["error"] = str(e)
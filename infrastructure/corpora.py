@@ -0,0 +1,173 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_qdrant import QdrantVectorStore
+from prometheus_client import Histogram
+from qdrant_client.http.models import Distance, VectorParams
+
+from infrastructure.qdrant_client import QdrantClientProvider
+from infrastructure.embedding_client import EmbeddingClientProvider
+from infrastructure.exact_index import ExactIndex, exact_engine_enabled
+
+logger = logging.getLogger("Corpora")
+
+DEFAULT_TENANT = "default"
+DEFAULT_CORPUS = "docs"
+
+# The default tenant keeps the original collection names, so existing storage keeps working
+LEGACY_DOCS_COLLECTION = "enterprise_docs"
+LEGACY_MEMORY_COLLECTION = "chat_history_cache"
+
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+TENANT_SEARCH_LATENCY = Histogram(
+    "superrag_tenant_search_seconds",
+    "Vector search latency per tenant (one fan-out across the request's corpora)",
+    ["tenant"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+
+def _check_name(kind: str, value: str) -> str:
+    if not _NAME_PATTERN.match(value):
+        raise ValueError(f"Invalid {kind} name: {value!r} (letters, digits, '_' and '-' only)")
+    return value
+
+
+def corpus_collection(tenant: Optional[str] = None, corpus: Optional[str] = None) -> str:
+    tenant = _check_name("tenant", tenant or DEFAULT_TENANT)
+    corpus = _check_name("corpus", corpus or DEFAULT_CORPUS)
+    if tenant == DEFAULT_TENANT and corpus == DEFAULT_CORPUS:
+        return LEGACY_DOCS_COLLECTION
+    return f"{tenant}__{corpus}"
+
+
+def memory_collection(tenant: Optional[str] = None) -> str:
+    tenant = _check_name("tenant", tenant or DEFAULT_TENANT)
+    if tenant == DEFAULT_TENANT:
+        return LEGACY_MEMORY_COLLECTION
+    return f"{tenant}__{LEGACY_MEMORY_COLLECTION}"
+
+
+def resolve_collections(tenant: Optional[str] = None, corpora: Optional[List[str]] = None) -> List[str]:
+    """
+    Collections a request searches: the tenant's default corpus unless corpora are given.
+    """
+    return [corpus_collection(tenant, corpus) for corpus in (corpora or [DEFAULT_CORPUS])]
+
+
+class VectorStoreRegistry:
+    """
+    One shared QdrantVectorStore per collection, plus fan-out search.
+
+    Searching several corpora embeds the query once and queries the
+    collections concurrently in worker threads. Each tenant gets at most
+    TENANT_SEARCH_CONCURRENCY searches in flight, so one busy tenant can't
+    take over the thread pool used by everyone else.
+
+    With RETRIEVAL_ENGINE=exact, collections that have an ExactIndex export
+    are searched by brute force over it instead of through Qdrant.
+    """
+
+    _stores: Dict[str, QdrantVectorStore] = {}
+    _exact: Dict[str, ExactIndex] = {}
+    _tenant_slots: Dict[str, asyncio.Semaphore] = {}
+
+    @classmethod
+    def collection_exists(cls, collection_name: str) -> bool:
+        if collection_name in cls._stores:
+            return True
+        return QdrantClientProvider.get_client().collection_exists(collection_name)
+
+    @classmethod
+    def ensure_collection(cls, collection_name: str):
+        client = QdrantClientProvider.get_client()
+        if not client.collection_exists(collection_name):
+            logger.info(f"Creating Qdrant collection: {collection_name}")
+            client.create_collection(
+                collection_name=collection_name,
+                vectors_config=VectorParams(
+                    size=EmbeddingClientProvider.get_vector_size(),
+                    distance=Distance.COSINE
+                )
+            )
+
+    @classmethod
+    def get_store(cls, collection_name: str, create: bool = False) -> QdrantVectorStore:
+        if collection_name not in cls._stores:
+            if create:
+                cls.ensure_collection(collection_name)
+            cls._stores[collection_name] = QdrantVectorStore(
+                client=QdrantClientProvider.get_client(),
+                collection_name=collection_name,
+                embedding=EmbeddingClientProvider.get_embeddings()
+            )
+        return cls._stores[collection_name]
+
+    @classmethod
+    def exact_index(cls, collection_name: str) -> Optional[ExactIndex]:
+        """
+        The collection's exact index, or None if it has not been exported yet.
+        """
+        if collection_name not in cls._exact:
+            cls._exact[collection_name] = ExactIndex(collection_name)
+        index = cls._exact[collection_name]
+        try:
+            return index if index.refresh() else None
+        except Exception:
+            logger.exception(f"Failed to open exact index for {collection_name}, using Qdrant")
+            return None
+
+    @classmethod
+    def _slots(cls, tenant: str) -> asyncio.Semaphore:
+        if tenant not in cls._tenant_slots:
+            cls._tenant_slots[tenant] = asyncio.Semaphore(int(os.getenv("TENANT_SEARCH_CONCURRENCY", "8")))
+        return cls._tenant_slots[tenant]
+
+    @classmethod
+    async def search(
+        cls,
+        collections: List[str],
+        query: str,
+        k: int,
+        tenant: Optional[str] = None,
+        embedding: Optional[List[float]] = None
+    ) -> List[Tuple[Document, float, str]]:
+        """
+        Returns the top k (document, score, collection) across `collections`,
+        best first. Collections that don't exist yet are skipped.
+        Pass `embedding` when the query was already embedded (state["query_embedding"]).
+        """
+        tenant = tenant or DEFAULT_TENANT
+        start = time.perf_counter()
+
+        async with cls._slots(tenant):
+            if embedding is None:
+                embedding = await asyncio.to_thread(EmbeddingClientProvider.get_embeddings().embed_query, query)
+
+            async def _search_one(collection_name: str):
+                index = cls.exact_index(collection_name) if exact_engine_enabled() else None
+                if index is not None:
+                    hits = await index.search(embedding, k)
+                    return [(doc, score, collection_name) for doc, score in hits]
+
+                if not await asyncio.to_thread(cls.collection_exists, collection_name):
+                    logger.warning(f"Collection {collection_name} does not exist, skipping")
+                    return []
+                store = cls.get_store(collection_name)
+                hits = await asyncio.to_thread(store.similarity_search_with_score_by_vector, embedding, k)
+                return [(doc, score, collection_name) for doc, score in hits]
+
+            results = await asyncio.gather(*(_search_one(c) for c in collections))
+
+        TENANT_SEARCH_LATENCY.labels(tenant=tenant).observe(time.perf_counter() - start)
+
+        # Same embedding model and cosine distance everywhere, so scores are comparable
+        merged = [hit for hits in results for hit in hits]
+        merged.sort(key=lambda hit: hit[1], reverse=True)
+        return merged[:k]
@@ -0,0 +1,89 @@
+import re
+import hashlib
+import logging
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger("EmbeddingBackends")
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+@lru_cache(maxsize=200_000)
+def _hash_token(token: str) -> int:
+    # blake2b is stable across processes (unlike hash()), so vectors are reproducible
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic CPU-only embeddings (signed feature hashing).
+    No network, no model download: meant for offline runs, tests and benchmarks.
+    Words and word bigrams are hashed into `dim` buckets and L2-normalized,
+    so cosine similarity behaves like a bag-of-words overlap score.
+    """
+
+    def __init__(self, dim: int = 384, batch_size: int = 256):
+        self.dim = dim
+        self.batch_size = batch_size
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN_PATTERN.findall(text.lower())
+        bigrams = [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return words + bigrams
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = _hash_token(feature)
+                rows.append(row)
+                cols.append(h % self.dim)
+                signs.append(1.0 if (h >> 63) & 1 else -1.0)
+
+        if rows:
+            np.add.at(matrix, (np.asarray(rows), np.asarray(cols)), np.asarray(signs, dtype=np.float32))
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed_batch(texts[i:i + self.batch_size]).tolist())
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0].tolist()
+
+
+class FastEmbedEmbeddings(Embeddings):
+    """
+    Local ONNX embeddings on CPU via `fastembed`.
+    The model is downloaded once and then runs fully offline, batched.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 64):
+        try:
+            from fastembed import TextEmbedding
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND=onnx requires the 'fastembed' package (pip install fastembed)"
+            ) from e
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = TextEmbedding(model_name=model_name)
+        self.dim = len(self.embed_query("dimension probe"))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [vec.tolist() for vec in self.model.embed(texts, batch_size=self.batch_size)]
+
+    def embed_query(self, text: str) -> List[float]:
+        return next(iter(self.model.query_embed(text))).tolist()
@@ -1,9 +1,44 @@
 import os
 import logging
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+import threading
+from typing import List
+from langchain_core.embeddings import Embeddings
+
+from infrastructure.telemetry import span
 
 logger = logging.getLogger("EmbeddingClient")
 
+# Known output sizes of the hosted models (avoids a network probe at startup)
+GOOGLE_EMBEDDING_DIMS = {
+    "models/text-embedding-004": 768,
+    "models/embedding-001": 768,
+    "models/gemini-embedding-001": 3072,
+}
+
+
+class TracedEmbeddings(Embeddings):
+    """
+    Wraps any embedding backend so each call shows up as an "embedding" span.
+    Other attributes (e.g. `dim`) are delegated to the wrapped backend.
+    """
+
+    def __init__(self, inner: Embeddings):
+        self.inner = inner
+
+    def __getattr__(self, item):
+        if item == "inner":
+            raise AttributeError(item)
+        return getattr(self.inner, item)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with span("embed_documents", kind="embedding"):
+            return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with span("embed_query", kind="embedding"):
+            return self.inner.embed_query(text)
+
+
 class EmbeddingClientProvider:
     """
     Centralized embedding model access.
@@ -11,21 +46,83 @@ class EmbeddingClientProvider:
     - Ingestion (to embed chunks)
     - Retrieval (to embed queries)
     - Semantic Memory
+
+    Backend is selected with EMBEDDING_BACKEND:
+    - google  : GoogleGenerativeAIEmbeddings (default, network)
+    - onnx    : local CPU ONNX model via fastembed
+    - hashing : deterministic hashing vectorizer (offline tests / benchmarks)
     """
 
     _embeddings = None
+    _vector_size = None
+    _lock = threading.Lock()  # warmup initializes the backend from a worker thread
+
+    @staticmethod
+    def get_backend() -> str:
+        return os.getenv("EMBEDDING_BACKEND", "google").lower()
 
     @classmethod
-    def get_embeddings(cls) -> GoogleGenerativeAIEmbeddings:
+    def get_embeddings(cls) -> Embeddings:
         if cls._embeddings is None:
-            api_key = os.getenv("API_KEY")
-            model = os.getenv("EMBEDDING_MODEL", "models/text-embedding-004")
+            with cls._lock:
+                if cls._embeddings is not None:
+                    return cls._embeddings
+                backend = cls.get_backend()
+                batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+
+                embeddings: Embeddings
 
-            logger.info(f"Initializing Embedding Model: {model} with api_key={api_key[:10]}***")
+                if backend == "google":
+                    from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
-            cls._embeddings = GoogleGenerativeAIEmbeddings(
-                model=model,
-                google_api_key=api_key
-            )
+                    api_key = os.getenv("API_KEY")
+                    model = os.getenv("EMBEDDING_MODEL", "models/text-embedding-004")
+
+                    logger.info(f"Initializing Embedding Model: {model} with api_key={api_key[:10]}***")
+
+                    embeddings = GoogleGenerativeAIEmbeddings(
+                        model=model,
+                        google_api_key=api_key
+                    )
+
+                elif backend == "onnx":
+                    from infrastructure.embedding_backends import FastEmbedEmbeddings
+
+                    model = os.getenv("ONNX_EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+                    logger.info(f"Initializing local ONNX Embedding Model: {model}")
+                    embeddings = FastEmbedEmbeddings(model_name=model, batch_size=batch_size)
+
+                elif backend == "hashing":
+                    from infrastructure.embedding_backends import HashingEmbeddings
+
+                    dim = int(os.getenv("EMBEDDING_DIM", "384"))
+                    logger.info(f"Initializing hashing embeddings (dim={dim})")
+                    embeddings = HashingEmbeddings(dim=dim, batch_size=batch_size)
+
+                else:
+                    raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+
+                cls._embeddings = TracedEmbeddings(embeddings)
 
         return cls._embeddings
+
+    @classmethod
+    def get_vector_size(cls) -> int:
+        """
+        Dimension of the vectors produced by the active backend.
+        Used when creating Qdrant collections.
+        """
+        if cls._vector_size is None:
+            embeddings = cls.get_embeddings()
+
+            if hasattr(embeddings, "dim"):
+                cls._vector_size = embeddings.dim
+            elif os.getenv("EMBEDDING_DIM"):
+                cls._vector_size = int(os.getenv("EMBEDDING_DIM"))
+            else:
+                model = os.getenv("EMBEDDING_MODEL", "models/text-embedding-004")
+                cls._vector_size = GOOGLE_EMBEDDING_DIMS.get(model) or len(embeddings.embed_query("dimension probe"))
+
+            logger.info(f"Embedding vector size: {cls._vector_size}")
+
+        return cls._vector_size
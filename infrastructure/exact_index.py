@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import shutil
+import asyncio
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_qdrant import QdrantVectorStore
+
+from infrastructure.qdrant_client import QdrantClientProvider
+
+logger = logging.getLogger("ExactIndex")
+
+# Caps the (queries x rows) score block, so memory stays bounded for big batches
+_SCORE_BLOCK_ELEMENTS = 1 << 24
+
+
+def exact_engine_enabled() -> bool:
+    return os.getenv("RETRIEVAL_ENGINE", "qdrant") == "exact"
+
+
+def _index_root() -> str:
+    return os.getenv("EXACT_INDEX_DIR", "./exact_index")
+
+
+class ExactIndex:
+    """
+    Brute-force cosine search over a memory-mapped export of one collection.
+
+    Layout under EXACT_INDEX_DIR/<collection>/:
+    - CURRENT        : name of the live version directory (replaced atomically)
+    - <version>/vectors.f32 : rows x dim float32, unit length (memory-mapped)
+    - <version>/payloads.jsonl + offsets.i64 : one JSON payload per row, read by offset
+    - <version>/manifest.json : rows, dim, created_at
+
+    export() rebuilds the files from the Qdrant collection after ingestion.
+    Readers pick up a new version on their next search (checked at most once
+    a second), so every API worker sees fresh data without a restart.
+
+    Concurrent searches are batched: while one batch runs in a worker thread,
+    new queries queue up and go out together as one matrix product.
+    """
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+        self.directory = os.path.join(_index_root(), collection_name)
+        self.version: Optional[str] = None
+        self.rows = 0
+        self.vectors: Optional[np.ndarray] = None
+        self._payloads: Optional[np.memmap] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[np.ndarray, int, asyncio.Future]] = []
+        self._running = False
+
+    # ---------------- Export ----------------
+
+    @staticmethod
+    def export(collection_name: str, batch_size: int = 2048) -> Optional[str]:
+        """
+        Writes a new version from the Qdrant collection and makes it current.
+        Returns the version name, or None if the collection does not exist.
+        """
+        client = QdrantClientProvider.get_client()
+        if not client.collection_exists(collection_name):
+            return None
+
+        start = time.perf_counter()
+        directory = os.path.join(_index_root(), collection_name)
+        version = f"v{time.time_ns()}"
+        target = os.path.join(directory, version)
+        os.makedirs(target)
+
+        total = client.count(collection_name, exact=True).count
+        dim = None
+        vectors = None
+        offsets = np.zeros(total + 1, dtype=np.int64)
+        rows = 0
+
+        with open(os.path.join(target, "payloads.jsonl"), "wb") as payloads:
+            offset = None
+            while True:
+                records, offset = client.scroll(
+                    collection_name=collection_name,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                for record in records:
+                    if rows == total:
+                        break  # points added while exporting go into the next export
+                    vector = np.asarray(record.vector, dtype=np.float32)
+                    if vectors is None:
+                        dim = len(vector)
+                        vectors = np.memmap(
+                            os.path.join(target, "vectors.f32"), dtype=np.float32, mode="w+",
+                            shape=(max(total, 1), dim)
+                        )
+                    norm = np.linalg.norm(vector)
+                    vectors[rows] = vector / norm if norm else vector
+                    line = json.dumps(record.payload, ensure_ascii=False).encode() + b"\n"
+                    payloads.write(line)
+                    offsets[rows + 1] = offsets[rows] + len(line)
+                    rows += 1
+                if offset is None or rows == total:
+                    break
+
+        if vectors is not None:
+            vectors.flush()
+            del vectors
+        offsets[:rows + 1].tofile(os.path.join(target, "offsets.i64"))
+        with open(os.path.join(target, "manifest.json"), "w") as f:
+            json.dump({"collection": collection_name, "rows": rows, "dim": dim, "created_at": time.time()}, f)
+
+        # Atomic switch, then drop old versions (open memory maps stay valid on POSIX)
+        current_tmp = os.path.join(directory, f"CURRENT.{os.getpid()}")
+        with open(current_tmp, "w") as f:
+            f.write(version)
+        os.replace(current_tmp, os.path.join(directory, "CURRENT"))
+        for name in os.listdir(directory):
+            if name.startswith("v") and name != version:
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+        logger.info(
+            f"Exported {rows} points of {collection_name} to {target} in {time.perf_counter() - start:.2f}s"
+        )
+        return version
+
+    # ---------------- Loading ----------------
+
+    def _current_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, "CURRENT")) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def refresh(self) -> bool:
+        """
+        Opens the current version if it changed. Returns False when there is no export.
+        CURRENT is read at most once a second, whether or not an export exists.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < 1.0:
+            return self.version is not None
+
+        with self._lock:
+            self._checked_at = now
+            version = self._current_version()
+            if version is None:
+                return False
+            if version == self.version:
+                return True
+
+            path = os.path.join(self.directory, version)
+            with open(os.path.join(path, "manifest.json")) as f:
+                manifest = json.load(f)
+
+            rows, dim = manifest["rows"], manifest["dim"]
+            vectors = (
+                np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r", shape=(rows, dim))
+                if rows else np.zeros((0, 0), dtype=np.float32)
+            )
+            payloads_path = os.path.join(path, "payloads.jsonl")
+            payloads = np.memmap(payloads_path, dtype=np.uint8, mode="r") if os.path.getsize(payloads_path) else None
+
+            self.vectors, self._payloads, self.rows = vectors, payloads, rows
+            self._offsets = np.fromfile(os.path.join(path, "offsets.i64"), dtype=np.int64)
+            self.version = version
+            logger.info(f"Opened exact index {self.collection_name} {version} ({rows} rows)")
+            return True
+
+    # ---------------- Search ----------------
+
+    @staticmethod
+    def search_batch(vectors: np.ndarray, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        """
+        Top k (row, cosine score) per query; `queries` is (q, dim), unit length.
+        Scores come from one matrix product per row block; argpartition picks
+        the top k of each block without a full sort.
+        """
+        if vectors is None or not len(vectors):
+            return [[] for _ in range(len(queries))]
+
+        k = min(k, len(vectors))
+        block = max(k, _SCORE_BLOCK_ELEMENTS // max(len(queries), 1))
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+
+        for start in range(0, len(vectors), block):
+            scores = queries @ vectors[start:start + block].T
+            top = np.argpartition(-scores, min(k, scores.shape[1]) - 1, axis=1)[:, :k]
+            best_rows = np.concatenate([best_rows, top + start], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+
+        order = np.argsort(-best_scores, axis=1)[:, :k]
+        rows = np.take_along_axis(best_rows, order, axis=1)
+        scores = np.take_along_axis(best_scores, order, axis=1)
+        return [list(zip(r.tolist(), s.tolist())) for r, s in zip(rows, scores)]
+
+    async def search(self, embedding: List[float], k: int) -> List[Tuple[Document, float]]:
+        """
+        Same shape as QdrantVectorStore.similarity_search_with_score_by_vector.
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((query / norm if norm else query, k, future))
+
+        # The drain task is not tied to any request, so a cancelled caller can't strand the others
+        if not self._running:
+            self._running = True
+            asyncio.create_task(self._drain())
+
+        return await future
+
+    async def _drain(self):
+        try:
+            while self._pending:
+                batch, self._pending = self._pending, []
+                try:
+                    results = await asyncio.to_thread(self._run_batch, batch)
+                    for (_, _, waiter), result in zip(batch, results):
+                        if not waiter.done():
+                            waiter.set_result(result)
+                except Exception as e:
+                    for _, _, waiter in batch:
+                        if not waiter.done():
+                            waiter.set_exception(e)
+        finally:
+            self._running = False
+
+    def _run_batch(self, batch) -> List[List[Tuple[Document, float]]]:
+        # One consistent version for the whole batch, even if refresh() swaps it meanwhile
+        with self._lock:
+            vectors, payloads, offsets = self.vectors, self._payloads, self._offsets
+
+        queries = np.stack([query for query, _, _ in batch])
+        k = max(k for _, k, _ in batch)
+        results = []
+        for (_, query_k, _), hits in zip(batch, self.search_batch(vectors, queries, k)):
+            documents = []
+            for row, score in hits[:query_k]:
+                payload = json.loads(bytes(payloads[offsets[row]:offsets[row + 1]]))
+                documents.append((
+                    Document(
+                        page_content=payload.get(QdrantVectorStore.CONTENT_KEY) or "",
+                        metadata=payload.get(QdrantVectorStore.METADATA_KEY) or {}
+                    ),
+                    score
+                ))
+            results.append(documents)
+        return results
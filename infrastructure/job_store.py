@@ -0,0 +1,127 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("JobStore")
+
+ACTIVE_STATUSES = ("queued", "running", "cancelling")
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    SQLite-backed record of ingestion jobs, so status survives restarts.
+    The database may be shared by several API worker processes; each job
+    records the pid that runs it, and active jobs whose process is gone
+    are marked failed on open.
+
+    Calls block on SQLite; one connection is shared under a lock, so they
+    can run in threads (IngestionJobManager calls them via asyncio.to_thread).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("INGEST_JOBS_DB", "./ingest_jobs.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS ingest_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    data_dir TEXT NOT NULL,
+                    collection TEXT,
+                    owner_pid INTEGER,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    files_total INTEGER DEFAULT 0,
+                    files_done INTEGER DEFAULT 0,
+                    chunks_done INTEGER DEFAULT 0,
+                    embeddings_done INTEGER DEFAULT 0,
+                    points_stored INTEGER DEFAULT 0,
+                    chunks_deduplicated INTEGER DEFAULT 0,
+                    error TEXT
+                )
+            """)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(ingest_jobs)")}
+            if "collection" not in columns:
+                self._conn.execute("ALTER TABLE ingest_jobs ADD COLUMN collection TEXT")
+            if "owner_pid" not in columns:
+                self._conn.execute("ALTER TABLE ingest_jobs ADD COLUMN owner_pid INTEGER")
+            if "chunks_deduplicated" not in columns:
+                self._conn.execute("ALTER TABLE ingest_jobs ADD COLUMN chunks_deduplicated INTEGER DEFAULT 0")
+
+            active = self._conn.execute(
+                f"SELECT job_id, owner_pid FROM ingest_jobs WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+                ACTIVE_STATUSES
+            ).fetchall()
+            orphaned = [row["job_id"] for row in active if not _pid_alive(row["owner_pid"])]
+            for job_id in orphaned:
+                self._conn.execute(
+                    "UPDATE ingest_jobs SET status = 'failed', error = 'Interrupted by restart', finished_at = ? "
+                    "WHERE job_id = ?",
+                    (time.time(), job_id)
+                )
+            interrupted = len(orphaned)
+
+        if interrupted:
+            logger.warning(f"Marked {interrupted} interrupted ingestion job(s) as failed")
+
+    def create(self, job_id: str, data_dir: str, collection: Optional[str] = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO ingest_jobs (job_id, data_dir, collection, owner_pid, status, created_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, data_dir, collection, os.getpid(), time.time())
+            )
+
+    def update(self, job_id: str, **fields: Any):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE ingest_jobs SET {columns} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM ingest_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM ingest_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+
+        started, finished = job["started_at"], job["finished_at"]
+        elapsed = ((finished or time.time()) - started) if started else 0.0
+        job["elapsed_seconds"] = round(elapsed, 2)
+        job["chunks_per_second"] = round(job["embeddings_done"] / elapsed, 1) if elapsed else 0.0
+        job["progress"] = round(job["files_done"] / job["files_total"], 3) if job["files_total"] else 0.0
+        # Duplicate chunks are not embedded: each one is an embedding call saved
+        job["embeddings_saved"] = job["chunks_deduplicated"]
+        job["dedup_ratio"] = round(job["chunks_deduplicated"] / job["chunks_done"], 3) if job["chunks_done"] else 0.0
+        return job
@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import logging
+from typing import Dict, List, Optional
+
+from prometheus_client import Counter
+
+from infrastructure.llm_hedging import RollingLatency
+
+logger = logging.getLogger("LatencyBudget")
+
+# Seconds per Tier-3 stage (queue wait included) until enough requests have been
+# observed; override with LATENCY_BUDGET_ESTIMATES_JSON='{"analyst": 40, ...}'.
+# "_flash" stages run on the fast analyst model after a downgrade.
+DEFAULT_STAGE_ESTIMATES = {
+    "context_loader": 5.0,
+    "analyst": 30.0,
+    "analyst_flash": 10.0,
+    "citation": 20.0,
+    "citation_flash": 8.0,
+    "formatter": 6.0,
+}
+
+DEGRADATIONS = Counter(
+    "superrag_latency_budget_degradations_total",
+    "Tier-3 stages skipped or downgraded to stay within a request's latency budget",
+    ["degradation"]
+)
+
+
+def _load_estimates() -> Dict[str, float]:
+    estimates = dict(DEFAULT_STAGE_ESTIMATES)
+    override = os.getenv("LATENCY_BUDGET_ESTIMATES_JSON")
+    if override:
+        estimates.update(json.loads(override))
+    return estimates
+
+
+class StageEstimates:
+    """
+    Expected duration of each pipeline stage: the rolling
+    LATENCY_BUDGET_PERCENTILE (default 90) of its recent wall times, once
+    LATENCY_BUDGET_MIN_SAMPLES runs were observed; the configured default before.
+    """
+
+    def __init__(self):
+        self.defaults = _load_estimates()
+        self.percentile = float(os.getenv("LATENCY_BUDGET_PERCENTILE", "90"))
+        self.min_samples = int(os.getenv("LATENCY_BUDGET_MIN_SAMPLES", "5"))
+        self.windows: Dict[str, RollingLatency] = {}
+
+    def observe(self, stage: str, seconds: float):
+        if stage not in self.windows:
+            self.windows[stage] = RollingLatency()
+        self.windows[stage].add(seconds)
+
+    def estimate(self, stage: str) -> float:
+        window = self.windows.get(stage)
+        if window is None or len(window) < self.min_samples:
+            return self.defaults.get(stage, 0.0)
+        return window.percentile(self.percentile)
+
+
+class LatencyBudget:
+    """
+    One request's latency budget, counted from when its pipeline run starts.
+    The orchestrator asks fits() before each optional Tier-3 stage and
+    records what it gave up with degrade().
+    """
+
+    def __init__(self, seconds: float, estimates: StageEstimates, request_id: str = "NA"):
+        self.seconds = seconds
+        self.deadline = time.perf_counter() + seconds
+        self.estimates = estimates
+        self.request_id = request_id
+        self.degradations: List[str] = []
+
+    def remaining(self) -> float:
+        return self.deadline - time.perf_counter()
+
+    def fits(self, *stages: str) -> bool:
+        """
+        Whether the stages are expected to finish before the deadline.
+        """
+        return sum(self.estimates.estimate(stage) for stage in stages) <= self.remaining()
+
+    def degrade(self, degradation: str):
+        self.degradations.append(degradation)
+        DEGRADATIONS.labels(degradation=degradation).inc()
+        logger.info(
+            f"[{self.request_id}] Latency budget {self.seconds:g}s at risk "
+            f"({self.remaining():.1f}s left): {degradation}"
+        )
+
+
+def parse_budget(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds from an X-Latency-Budget header or LATENCY_BUDGET_SECONDS;
+    None when unset or 0. Raises ValueError for anything else that isn't a
+    positive number.
+    """
+    if value is None or not value.strip():
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = float("nan")
+    if not seconds >= 0:
+        raise ValueError(f"Invalid latency budget: {value!r} (seconds, > 0)")
+    return seconds or None
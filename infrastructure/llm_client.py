@@ -1,6 +1,14 @@
 import os
+import time
 import logging
+from typing import Any, Optional
 from google import genai
+from google.genai import types
+
+from infrastructure.telemetry import span, record_span
+from infrastructure.usage import record_llm_usage
+from infrastructure.llm_scheduler import LLMScheduler
+from infrastructure.llm_hedging import HedgePolicy
 
 logger = logging.getLogger("LLMClient")
 
@@ -13,9 +21,17 @@ class LLMClientProvider:
     - AnalystAgent (Pro)
     - CitationAgent (Pro)
     - FormatterAgent (Flash)
+
+    Agents call generate_content() / create_cache() here rather than the SDK
+    directly, so every LLM call is traced and its token usage recorded
+    under the calling agent's name. Calls use the async SDK and pass through
+    the LLMScheduler (per-model concurrency / rate limits, agent priorities)
+    and the HedgePolicy (per-agent deadlines, optional hedging).
     """
 
     _client = None
+    _scheduler = None
+    _hedge_policy = None
 
     @classmethod
     def get_client(cls) -> genai.Client:
@@ -25,6 +41,66 @@ class LLMClientProvider:
             cls._client = genai.Client(api_key=api_key)
         return cls._client
 
+    @classmethod
+    def get_scheduler(cls) -> LLMScheduler:
+        if cls._scheduler is None:
+            cls._scheduler = LLMScheduler()
+        return cls._scheduler
+
+    @classmethod
+    def get_hedge_policy(cls) -> HedgePolicy:
+        if cls._hedge_policy is None:
+            cls._hedge_policy = HedgePolicy()
+        return cls._hedge_policy
+
+    @classmethod
+    async def _attempt(cls, agent: str, model: str, contents: Any, config) -> types.GenerateContentResponse:
+        queued_at = time.perf_counter()
+        async with cls.get_scheduler().slot(agent, model) as waited:
+            if waited:
+                record_span(f"{agent}/{model}", "llm_queue", queued_at, waited)
+
+            with span(f"{agent}/{model}", kind="llm"):
+                response = await cls.get_client().aio.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=config
+                )
+
+        record_llm_usage(agent, model, response)
+        return response
+
+    @classmethod
+    async def generate_content(
+        cls,
+        agent: str,
+        model: str,
+        contents: Any,
+        config: Optional[types.GenerateContentConfig] = None,
+        timeout: Optional[float] = None
+    ) -> types.GenerateContentResponse:
+        """
+        timeout overrides the agent's default deadline (seconds, queue wait included).
+        Raises asyncio.TimeoutError when it passes.
+        """
+        lane = cls.get_scheduler().lane(model)
+        return await cls.get_hedge_policy().run(
+            agent,
+            lambda: cls._attempt(agent, model, contents, config),
+            timeout=timeout,
+            can_hedge=lambda: lane.queued == 0
+        )
+
+    @classmethod
+    async def create_cache(
+        cls,
+        agent: str,
+        model: str,
+        config: types.CreateCachedContentConfig
+    ) -> types.CachedContent:
+        with span(f"{agent}/caches.create", kind="llm"):
+            return await cls.get_client().aio.caches.create(model=model, config=config)
+
     @staticmethod
     def get_planner_model() -> str:
         return os.getenv("PLANNER_MODEL", "gemini-2.5-flash")
@@ -33,6 +109,17 @@ class LLMClientProvider:
     def get_analyst_model() -> str:
         return os.getenv("ANALYST_MODEL", "gemini-2.5-pro")
 
+    @staticmethod
+    def get_extractor_model() -> str:
+        return os.getenv("EXTRACTOR_MODEL", "gemini-2.5-flash")
+
+    @staticmethod
+    def get_fast_analyst_model() -> str:
+        """
+        Analyst / citation model when a latency budget forces a downgrade.
+        """
+        return os.getenv("FAST_ANALYST_MODEL", "gemini-2.5-flash")
+
     @staticmethod
     def get_router_model() -> str:
         return os.getenv("ROUTER_MODEL", "gemini-2.5-flash")
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger("LLMHedging")
+
+# Seconds; override with LLM_TIMEOUTS_JSON='{"router": 5, ...}'. Covers queue wait + call.
+DEFAULT_TIMEOUTS = {
+    "router": 15.0,
+    "planner": 30.0,
+    "formatter": 45.0,
+    "simple_rag": 45.0,
+    "analyst": 180.0,
+    "analyst_map": 60.0,
+    "citation": 180.0,
+}
+DEFAULT_TIMEOUT = 120.0
+
+TIMEOUTS = Counter("superrag_llm_timeouts_total", "LLM calls that exceeded their deadline", ["agent"])
+HEDGES = Counter("superrag_llm_hedges_total", "Hedged LLM calls by outcome (fired / won)", ["agent", "outcome"])
+LATENCY_P99 = Gauge(
+    "superrag_llm_latency_p99_seconds",
+    "Rolling p99 of LLM call latency: what callers saw (effective) vs the first attempt alone (primary)",
+    ["agent", "series"]
+)
+
+
+def _load_timeouts() -> Dict[str, float]:
+    timeouts = dict(DEFAULT_TIMEOUTS)
+    override = os.getenv("LLM_TIMEOUTS_JSON")
+    if override:
+        timeouts.update(json.loads(override))
+    return timeouts
+
+
+class RollingLatency:
+    """
+    Last `window` latencies of one agent's calls.
+    """
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            if not self.samples:
+                return None
+            return float(np.percentile(np.fromiter(self.samples, dtype=np.float64), p))
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class HedgePolicy:
+    """
+    Per-agent deadlines plus optional hedging.
+
+    A hedged agent's call that is still running after the agent's rolling p95
+    gets a duplicate; whichever attempt finishes first wins and the other is
+    cancelled. Hedging needs LLM_HEDGE_MIN_SAMPLES observations first and is
+    skipped while the model's queue is non-empty (a hedge would only add load).
+
+    To report the tail-latency improvement, "primary" latency is tracked next to
+    "effective" latency. When a hedge wins, the cancelled primary only gives a
+    lower bound; LLM_HEDGE_SHADOW_RATE lets that fraction of losing primaries
+    run to completion so their true latency is measured.
+    """
+
+    def __init__(self):
+        self.timeouts = _load_timeouts()
+        self.enabled = os.getenv("LLM_HEDGING", "0") == "1"
+        self.hedge_agents = set(
+            a.strip() for a in os.getenv("LLM_HEDGE_AGENTS", "router,planner,formatter").split(",") if a.strip()
+        )
+        self.hedge_percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+        self.min_samples = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.shadow_rate = float(os.getenv("LLM_HEDGE_SHADOW_RATE", "0"))
+
+        self.attempt_latency: Dict[str, RollingLatency] = {}
+        self.effective_latency: Dict[str, RollingLatency] = {}
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+    def timeout_for(self, agent: str) -> float:
+        return self.timeouts.get(agent, DEFAULT_TIMEOUT)
+
+    def hedge_delay(self, agent: str) -> Optional[float]:
+        if not self.enabled or agent not in self.hedge_agents:
+            return None
+        window = self.attempt_latency.get(agent)
+        if window is None or len(window) < self.min_samples:
+            return None
+        return window.percentile(self.hedge_percentile)
+
+    def _window(self, table: Dict[str, RollingLatency], agent: str) -> RollingLatency:
+        if agent not in table:
+            table[agent] = RollingLatency()
+        return table[agent]
+
+    def _count(self, agent: str, outcome: str):
+        HEDGES.labels(agent=agent, outcome=outcome).inc()
+        bucket = self.counts.setdefault(agent, {"calls": 0, "fired": 0, "won": 0})
+        bucket[outcome] += 1
+
+    def _export_p99(self, agent: str):
+        LATENCY_P99.labels(agent=agent, series="primary").set(self.attempt_latency[agent].percentile(99))
+        if agent in self.effective_latency:
+            LATENCY_P99.labels(agent=agent, series="effective").set(self.effective_latency[agent].percentile(99))
+
+    def observe_primary(self, agent: str, seconds: float):
+        """
+        Latency of a first attempt (or a lower bound when it was cancelled).
+        Also the window the hedge delay is computed from.
+        """
+        self._window(self.attempt_latency, agent).add(seconds)
+        self._export_p99(agent)
+
+    def observe_effective(self, agent: str, seconds: float):
+        self._window(self.effective_latency, agent).add(seconds)
+        self.counts.setdefault(agent, {"calls": 0, "fired": 0, "won": 0})["calls"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-agent calls, hedge / win rates and p99 latencies (served under GET /usage/llm).
+        """
+        report = {}
+        for agent, counts in self.counts.items():
+            report[agent] = {
+                **counts,
+                "hedge_rate": counts["fired"] / counts["calls"] if counts["calls"] else 0.0,
+                "hedge_win_rate": counts["won"] / counts["fired"] if counts["fired"] else 0.0,
+                "primary_p99": self.attempt_latency[agent].percentile(99) if agent in self.attempt_latency else None,
+                "effective_p99": self.effective_latency[agent].percentile(99) if agent in self.effective_latency else None,
+            }
+        return report
+
+    def _shadow(self, agent: str, primary: asyncio.Future, start: float):
+        """
+        Lets a losing primary finish in the background to record its true latency.
+        """
+        def _record(task: asyncio.Future):
+            if not task.cancelled() and task.exception() is None:
+                self.observe_primary(agent, time.perf_counter() - start)
+
+        primary.add_done_callback(_record)
+
+    async def run(
+        self,
+        agent: str,
+        attempt: Callable[[], Awaitable],
+        timeout: Optional[float] = None,
+        can_hedge: Callable[[], bool] = lambda: True
+    ):
+        """
+        Runs attempt() under the agent's deadline, hedging if configured.
+        Raises asyncio.TimeoutError when the deadline passes.
+        """
+        timeout = timeout if timeout is not None else self.timeout_for(agent)
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(attempt())
+        hedge = None
+
+        try:
+            delay = self.hedge_delay(agent)
+            pending = {primary}
+
+            if delay is not None and delay < timeout:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done and can_hedge():
+                    logger.info(f"{agent} call exceeded p{self.hedge_percentile:g} ({delay:.2f}s), firing hedge")
+                    self._count(agent, "fired")
+                    hedge = asyncio.ensure_future(attempt())
+                    pending = {primary, hedge}
+
+            while pending:
+                remaining = timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError()
+
+                winner = next((t for t in done if t.exception() is None), next(iter(done)))
+                if winner.exception() is not None and pending:
+                    continue  # the other attempt may still succeed
+
+                result = winner.result()  # re-raises the last attempt's error
+                elapsed = time.perf_counter() - start
+                self.observe_effective(agent, elapsed)
+
+                if winner is hedge:
+                    self._count(agent, "won")
+                    if not primary.done() and random.random() < self.shadow_rate:
+                        self._shadow(agent, primary, start)
+                        primary = None
+                    else:
+                        self.observe_primary(agent, elapsed)
+                else:
+                    self.observe_primary(agent, elapsed)
+
+                return result
+
+        except asyncio.TimeoutError:
+            TIMEOUTS.labels(agent=agent).inc()
+            logger.warning(f"{agent} LLM call exceeded its {timeout:.1f}s deadline")
+            raise
+
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
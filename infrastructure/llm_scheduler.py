@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger("LLMScheduler")
+
+# Lower value = served first. Cheap latency-critical calls go ahead of
+# the long Pro calls so a Tier-3 burst can't starve routing and Tier-2.
+AGENT_PRIORITIES = {
+    "router": 0,
+    "simple_rag": 0,
+    "planner": 1,
+    "formatter": 1,
+    "context_loader": 2,
+    "analyst": 2,
+    "citation": 2,
+    "batch": 3,
+}
+DEFAULT_PRIORITY = 1
+
+# Per-model limits; override / extend with LLM_LIMITS_JSON='{"model": {"concurrency": .., "rpm": .., "max_queue": ..}}'
+# rpm = 0 disables rate limiting.
+DEFAULT_LIMITS = {
+    "default": {"concurrency": 16, "rpm": 0, "max_queue": 100},
+    "gemini-2.5-flash": {"concurrency": 16, "rpm": 0, "max_queue": 200},
+    "gemini-2.5-pro": {"concurrency": 4, "rpm": 0, "max_queue": 40},
+}
+
+QUEUE_WAIT = Histogram(
+    "superrag_llm_queue_seconds",
+    "Time LLM calls wait for a scheduler slot",
+    ["model", "priority"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+QUEUE_DEPTH = Gauge("superrag_llm_queue_depth", "LLM calls waiting for a slot", ["model"])
+IN_FLIGHT = Gauge("superrag_llm_in_flight", "LLM calls currently running", ["model"])
+REJECTIONS = Counter("superrag_llm_rejections_total", "LLM calls rejected because the queue was full", ["model"])
+CALLS = Counter("superrag_llm_calls_total", "LLM calls that got a scheduler slot", ["agent", "model"])
+
+_batch_mode: ContextVar[bool] = ContextVar("superrag_llm_batch", default=False)
+
+
+@contextmanager
+def batch_priority():
+    """
+    LLM calls made inside (including tasks started inside) queue at the
+    "batch" priority, behind all live traffic, whichever agent makes them.
+    """
+    token = _batch_mode.set(True)
+    try:
+        yield
+    finally:
+        _batch_mode.reset(token)
+
+
+class LLMOverloadedError(Exception):
+    """
+    Raised when a model's queue is over its bound.
+    `retry_after` is a rough estimate (seconds) of when capacity frees up.
+    """
+
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(f"LLM queue for {model} is full, retry after {retry_after:.0f}s")
+        self.model = model
+        self.retry_after = retry_after
+
+
+class ModelLane:
+    """
+    Concurrency slots + optional token-bucket rate limit + priority queue for one model.
+    """
+
+    def __init__(self, model: str, concurrency: int, rpm: int, max_queue: int):
+        self.model = model
+        self.concurrency = concurrency
+        self.rpm = rpm
+        self.max_queue = max_queue
+
+        self.active = 0
+        self._waiters: List = []          # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._tokens = float(rpm) if rpm else 0.0
+        self._last_refill = time.monotonic()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._avg_call_seconds = 5.0      # EWMA, used only for Retry-After estimates
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, f in self._waiters if not f.done())
+
+    def retry_after(self) -> float:
+        backlog = self.queued + self.active
+        return max(1.0, backlog / max(self.concurrency, 1) * self._avg_call_seconds)
+
+    def _take_token(self) -> bool:
+        if not self.rpm:
+            return True
+        now = time.monotonic()
+        self._tokens = min(float(self.rpm), self._tokens + (now - self._last_refill) * self.rpm / 60.0)
+        self._last_refill = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    def _dispatch(self):
+        self._timer = None
+        while self._waiters and self.active < self.concurrency:
+            _, _, future = self._waiters[0]
+            if future.done():               # cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+            if not self._take_token():
+                delay = (1.0 - self._tokens) * 60.0 / self.rpm
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                break
+            heapq.heappop(self._waiters)
+            self.active += 1
+            future.set_result(None)
+        self._export()
+
+    def _export(self):
+        QUEUE_DEPTH.labels(model=self.model).set(self.queued)
+        IN_FLIGHT.labels(model=self.model).set(self.active)
+
+    async def acquire(self, priority: int) -> float:
+        """
+        Waits for a slot; returns the time spent queued.
+        """
+        start = time.perf_counter()
+
+        if not self._waiters and self.active < self.concurrency and self._take_token():
+            self.active += 1
+            self._export()
+            return 0.0
+
+        if self.queued >= self.max_queue:
+            REJECTIONS.labels(model=self.model).inc()
+            raise LLMOverloadedError(self.model, self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._export()
+        if self._timer is None:
+            self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(None)          # slot was granted as we got cancelled
+            self._export()
+            raise
+
+        return time.perf_counter() - start
+
+    def release(self, call_seconds: Optional[float]):
+        self.active -= 1
+        if call_seconds is not None:
+            self._avg_call_seconds = 0.8 * self._avg_call_seconds + 0.2 * call_seconds
+        if self._timer is None:
+            self._dispatch()
+        else:
+            self._export()
+
+
+class LLMScheduler:
+    """
+    Admission control for Gemini calls: one lane per model with its own
+    concurrency / rate limits and a priority queue (see AGENT_PRIORITIES).
+    Calls beyond a lane's queue bound fail fast with LLMOverloadedError.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, int]]] = None):
+        self.limits = dict(DEFAULT_LIMITS)
+        override = os.getenv("LLM_LIMITS_JSON")
+        if override:
+            self.limits.update(json.loads(override))
+        if limits:
+            self.limits.update(limits)
+        self._lanes: Dict[str, ModelLane] = {}
+
+    def lane(self, model: str) -> ModelLane:
+        if model not in self._lanes:
+            cfg = {**self.limits["default"], **self.limits.get(model, {})}
+            self._lanes[model] = ModelLane(model, cfg["concurrency"], cfg["rpm"], cfg["max_queue"])
+        return self._lanes[model]
+
+    def check_admission(self, *models: str):
+        """
+        Raises LLMOverloadedError if the queue of one of `models` (the models
+        the request is about to call) is already at its bound, so new requests
+        can be turned away before they start spending. A full Pro queue does
+        not turn away requests that only need Flash.
+        """
+        for model in dict.fromkeys(models):
+            lane = self._lanes.get(model)
+            if lane is not None and lane.queued >= lane.max_queue:
+                REJECTIONS.labels(model=lane.model).inc()
+                raise LLMOverloadedError(lane.model, lane.retry_after())
+
+    @asynccontextmanager
+    async def slot(self, agent: str, model: str):
+        priority = AGENT_PRIORITIES["batch"] if _batch_mode.get() else AGENT_PRIORITIES.get(agent, DEFAULT_PRIORITY)
+        lane = self.lane(model)
+
+        waited = await lane.acquire(priority)
+        QUEUE_WAIT.labels(model=model, priority=str(priority)).observe(waited)
+        CALLS.labels(agent=agent, model=model).inc()
+
+        start = time.perf_counter()
+        try:
+            yield waited
+        finally:
+            lane.release(time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Current state of each model lane (served under GET /usage/llm).
+        """
+        return {
+            model: {
+                "active": lane.active,
+                "queued": lane.queued,
+                "concurrency": lane.concurrency,
+                "max_queue": lane.max_queue
+            }
+            for model, lane in self._lanes.items()
+        }
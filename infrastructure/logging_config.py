@@ -0,0 +1,117 @@
+import os
+import queue
+import logging
+import zlib
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    The stock QueueHandler formats every record on the calling thread.
+    The queue never leaves the process, so records are enqueued as-is
+    and the listener's handlers do the formatting.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(
+    log_file: Optional[str] = None,
+    level: Optional[str] = None,
+    async_logging: Optional[bool] = None
+) -> Optional[QueueListener]:
+    """
+    Configures the root logger.
+    - File output is size-bounded and rotated (LOG_MAX_BYTES, LOG_BACKUP_COUNT).
+    - With LOG_ASYNC=1 (default) callers only enqueue records; formatting and
+      disk / console I/O happen on a background listener thread.
+    """
+    global _listener
+
+    log_file = log_file or os.getenv("LOG_FILE", "./logs/app.log")
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    if async_logging is None:
+        async_logging = os.getenv("LOG_ASYNC", "1") == "1"
+
+    os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+        backupCount=int(os.getenv("LOG_BACKUP_COUNT", "5")),
+        encoding="utf-8"
+    )
+    stream_handler = logging.StreamHandler()
+    handlers = [file_handler, stream_handler]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    shutdown_logging()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(level)
+
+    if async_logging:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        root.addHandler(_DeferredQueueHandler(log_queue))
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in handlers:
+            root.addHandler(handler)
+
+    return _listener
+
+
+def shutdown_logging():
+    """
+    Flushes queued records and stops the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def _payload_sampled(request_id: str) -> bool:
+    rate = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))
+    if rate >= 1.0:
+        return True
+    if rate <= 0.0:
+        return False
+    # Decided per request, so a sampled request keeps all of its payloads
+    return zlib.crc32(request_id.encode("utf-8")) % 10_000 < rate * 10_000
+
+
+def log_payload(logger: logging.Logger, request_id: str, label: str, payload):
+    """
+    Logs a raw LLM payload (responses, plans, answers) subject to
+    LOG_PAYLOAD_SAMPLE_RATE and truncated to LOG_PAYLOAD_MAX_CHARS (0 = no limit).
+    Unsampled requests log only the payload size.
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+
+    text = payload if isinstance(payload, str) else str(payload)
+
+    if not _payload_sampled(request_id):
+        logger.info(f"[{request_id}] {label}: <{len(text)} chars, not sampled>")
+        return
+
+    max_chars = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "500"))
+    if max_chars and len(text) > max_chars:
+        text = f"{text[:max_chars]}... [+{len(text) - max_chars} chars]"
+
+    logger.info(f"[{request_id}] {label}: {text}")
@@ -1,23 +1,148 @@
 import os
+import time
+import atexit
+import shutil
 import logging
+import functools
+import threading
+from typing import List, Optional, Tuple
 from qdrant_client import QdrantClient
 
+from infrastructure import qdrant_snapshot
+from infrastructure.telemetry import span
+
 logger = logging.getLogger("QdrantClient")
 
+# Data-plane calls that get a "qdrant" span; everything else passes through untouched
+TRACED_QDRANT_METHODS = {
+    "query_points", "query_batch_points", "search", "upsert",
+    "delete", "scroll", "count", "retrieve", "get_collection"
+}
+
+
+class TracedQdrantClient:
+    """
+    Thin proxy around QdrantClient that times data-plane calls.
+    """
+
+    def __init__(self, client: QdrantClient):
+        self._client = client
+
+    def __getattr__(self, item):
+        if item == "_client":
+            raise AttributeError(item)
+
+        attr = getattr(self._client, item)
+        if item not in TRACED_QDRANT_METHODS:
+            return attr
+
+        @functools.wraps(attr)
+        def traced(*args, **kwargs):
+            with span(item, kind="qdrant"):
+                return attr(*args, **kwargs)
+
+        return traced
+
+
 class QdrantClientProvider:
     """
     Centralized Qdrant client.
     All agents (ingestion, retrieval, memory) will reuse this.
+
+    Modes:
+    - QDRANT_URL set        : Qdrant server; any number of processes can read and write.
+    - QDRANT_READ_ONLY=1    : embedded mode on a private copy of the snapshot the writer
+                              process publishes (see qdrant_snapshot), so several query
+                              workers can share one index while a single writer owns
+                              QDRANT_PATH. Every QDRANT_SNAPSHOT_REFRESH seconds (default 30)
+                              a newer version is copied and swapped in behind the proxy.
+                              Writes are refused by the callers (see is_read_only) and the
+                              copies are removed on exit.
+    - otherwise             : embedded mode on QDRANT_PATH (one process only).
     """
 
     _client = None
+    _lock = threading.Lock()  # warmup opens the client from a worker thread
+    _snapshot_version: Optional[str] = None
+    _snapshot_path: Optional[str] = None
+    _retired: List[Tuple[QdrantClient, str]] = []  # replaced snapshot clients, closed one refresh later
+
+    @staticmethod
+    def is_read_only() -> bool:
+        return not os.getenv("QDRANT_URL") and os.getenv("QDRANT_READ_ONLY", "0") == "1"
+
+    @classmethod
+    def snapshot_version(cls) -> Optional[str]:
+        """
+        Published snapshot version this read-only worker currently serves (else None).
+        """
+        return cls._snapshot_version
+
+    @classmethod
+    def _open_snapshot(cls) -> Tuple[QdrantClient, str]:
+        """
+        Client on a private copy of the current published snapshot.
+        Refuses to start without one rather than copying the live QDRANT_PATH.
+        """
+        version = qdrant_snapshot.current_version()
+        if version is None:
+            raise RuntimeError(
+                f"No published Qdrant snapshot in {qdrant_snapshot.snapshot_dir()}: run the writer with "
+                "QDRANT_SNAPSHOT_INTERVAL set, or `python -m infrastructure.qdrant_snapshot`"
+            )
+        private = qdrant_snapshot.copy_version(version)
+        atexit.register(shutil.rmtree, private, True)
+        cls._snapshot_version = version
+        logger.info(f"Opening read-only snapshot {version} at {private} (pid {os.getpid()})")
+        return QdrantClient(path=private), private
+
+    @classmethod
+    def _refresh_snapshots(cls, interval: float):
+        """
+        Background thread: swaps newer published versions in behind the
+        TracedQdrantClient proxy. A replaced client is closed one refresh
+        later, after calls already running on it have finished.
+        """
+        while True:
+            time.sleep(interval)
+            try:
+                if qdrant_snapshot.current_version() in (None, cls._snapshot_version):
+                    continue
+                for client, private in cls._retired:
+                    client.close()
+                    shutil.rmtree(private, ignore_errors=True)
+                cls._retired = []
+
+                client, private = cls._open_snapshot()
+                cls._retired.append((cls._client._client, cls._snapshot_path))
+                cls._client._client, cls._snapshot_path = client, private
+            except Exception:
+                logger.exception("Refreshing the Qdrant snapshot failed; keeping the current one")
 
     @classmethod
     def get_client(cls) -> QdrantClient:
         if cls._client is None:
-            qdrant_path = os.getenv("QDRANT_PATH", "./qdrant_storage")
-            logger.info(f"Initializing Qdrant at path: {qdrant_path}")
+            with cls._lock:
+                if cls._client is None:
+                    qdrant_url = os.getenv("QDRANT_URL")
+                    qdrant_path = os.getenv("QDRANT_PATH", "./qdrant_storage")
+
+                    if qdrant_url:
+                        logger.info(f"Connecting to Qdrant server at {qdrant_url}")
+                        client = QdrantClient(url=qdrant_url, api_key=os.getenv("QDRANT_API_KEY"))
+                    elif cls.is_read_only():
+                        client, cls._snapshot_path = cls._open_snapshot()
+                    else:
+                        logger.info(f"Initializing Qdrant at path: {qdrant_path}")
+                        client = QdrantClient(path=qdrant_path)
+
+                    cls._client = TracedQdrantClient(client)
 
-            cls._client = QdrantClient(path=qdrant_path)
+                    refresh = float(os.getenv("QDRANT_SNAPSHOT_REFRESH", "30"))
+                    if cls._snapshot_path and refresh > 0:
+                        threading.Thread(
+                            target=cls._refresh_snapshots, args=(refresh,),
+                            name="qdrant-snapshot-refresh", daemon=True
+                        ).start()
 
         return cls._client
@@ -0,0 +1,173 @@
+"""
+Published read-only snapshots of an embedded QDRANT_PATH, for query workers.
+
+Layout under QDRANT_SNAPSHOT_DIR (default <QDRANT_PATH>_snapshots):
+- CURRENT     : name of the live version directory (replaced atomically)
+- <version>/  : consistent copy of QDRANT_PATH
+
+Each collection's storage.sqlite is copied with SQLite's online backup, so a
+version is consistent even while the writer keeps writing. Query workers
+(QDRANT_READ_ONLY=1) copy the current version into a private directory
+(embedded Qdrant locks its directory to one process) and move to newer
+versions in the background (see QdrantClientProvider).
+
+    python -m infrastructure.qdrant_snapshot     # publish QDRANT_PATH once
+"""
+import os
+import json
+import time
+import shutil
+import sqlite3
+import asyncio
+import logging
+import tempfile
+from typing import Optional
+
+logger = logging.getLogger("QdrantSnapshot")
+
+# Versions kept on disk: the live one, plus the previous one for workers still copying it
+KEEP_VERSIONS = 2
+
+
+def qdrant_path() -> str:
+    return os.getenv("QDRANT_PATH", "./qdrant_storage")
+
+
+def snapshot_dir() -> str:
+    return os.getenv("QDRANT_SNAPSHOT_DIR") or f"{qdrant_path().rstrip(os.sep)}_snapshots"
+
+
+def current_version(directory: Optional[str] = None) -> Optional[str]:
+    try:
+        with open(os.path.join(directory or snapshot_dir(), "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def last_modified(path: str) -> float:
+    """
+    Newest mtime under an embedded Qdrant directory (its lock file aside).
+    """
+    newest = 0.0
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name != ".lock":
+                newest = max(newest, os.path.getmtime(os.path.join(root, name)))
+    return newest
+
+
+def _backup_sqlite(source: str, target: str):
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def publish(source: Optional[str] = None, directory: Optional[str] = None) -> str:
+    """
+    Writes a new version of `source` (default QDRANT_PATH) and makes it
+    CURRENT. Safe while the writer process has `source` open.
+    """
+    source = source or qdrant_path()
+    directory = directory or snapshot_dir()
+    start = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+
+    version = f"v{time.time_ns()}"
+    target = os.path.join(directory, version)
+    os.makedirs(os.path.join(target, "collection"))
+
+    # meta.json first: collections created after it are left for the next version
+    meta_path = os.path.join(source, "meta.json")
+    collections = []
+    if os.path.exists(meta_path):
+        shutil.copy2(meta_path, os.path.join(target, "meta.json"))
+        with open(meta_path) as f:
+            collections = list(json.load(f).get("collections", {}))
+
+    for name in collections:
+        storage = os.path.join(source, "collection", name, "storage.sqlite")
+        if os.path.exists(storage):
+            os.makedirs(os.path.join(target, "collection", name))
+            _backup_sqlite(storage, os.path.join(target, "collection", name, "storage.sqlite"))
+
+    # Atomic switch, then drop all but the newest versions
+    current_tmp = os.path.join(directory, f"CURRENT.{os.getpid()}")
+    with open(current_tmp, "w") as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(directory, "CURRENT"))
+    versions = sorted(name for name in os.listdir(directory) if name.startswith("v"))
+    for name in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+    logger.info(
+        f"Published Qdrant snapshot {version} ({len(collections)} collections) "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    return version
+
+
+def copy_version(version: str, directory: Optional[str] = None) -> str:
+    """
+    Private copy of a published version, for one worker's embedded client.
+    """
+    private = tempfile.mkdtemp(prefix=f"qdrant_snapshot_{os.getpid()}_")
+    shutil.copytree(os.path.join(directory or snapshot_dir(), version), private, dirs_exist_ok=True)
+    return private
+
+
+class SnapshotPublisher:
+    """
+    Runs in the writer process: every QDRANT_SNAPSHOT_INTERVAL seconds,
+    publishes a new version if QDRANT_PATH changed since the last one.
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval if interval is not None else float(os.getenv("QDRANT_SNAPSHOT_INTERVAL", "0"))
+        self._published_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def publish_if_changed(self) -> Optional[str]:
+        source = qdrant_path()
+        if not os.path.isdir(source):
+            return None
+        modified = last_modified(source)
+        if modified <= self._published_at and current_version() is not None:
+            return None
+        version = publish(source)
+        self._published_at = modified
+        return version
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.publish_if_changed)
+            except Exception:
+                logger.exception("Publishing the Qdrant snapshot failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"Publishing Qdrant snapshots to {snapshot_dir()} every {self.interval:g}s when data changed")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(publish())
@@ -0,0 +1,116 @@
+import re
+import json
+import glob
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("QueryLog")
+
+# One record per line in LOG_FORMAT: "asctime | level | logger | message"
+_LOG_LINE = re.compile(
+    r"^(?P<asctime>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) \| (?P<level>\w+) \| (?P<logger>[^|]+?) \| (?P<message>.*)$"
+)
+_INCOMING = re.compile(r"^\[(?P<request_id>[^\]]+)\] Incoming query: (?P<query>.*)$", re.DOTALL)
+_RESPONSE = re.compile(
+    r"^\[(?P<request_id>[^\]]+)\] Response ready in (?P<latency>[\d.]+)s, "
+    r"(?:tier=(?P<tier>\w+), )?mode=(?P<mode>.*)$"
+)
+
+# Older logs only carry the answer mode
+_MODE_TIERS = {"Semantic Memory": "tier1", "Simple RAG": "tier2", "Super RAG": "tier3"}
+
+
+def tier_for_mode(mode: Optional[str]) -> Optional[str]:
+    for marker, tier in _MODE_TIERS.items():
+        if mode and marker in mode:
+            return tier
+    return None
+
+
+def _log_records(lines: Iterable[str]) -> Iterable[Dict[str, str]]:
+    """
+    Yields parsed log records; lines without a timestamp prefix continue the
+    previous message (multi-line queries and tracebacks).
+    """
+    record = None
+    for line in lines:
+        line = line.rstrip("\n")
+        match = _LOG_LINE.match(line)
+        if match:
+            if record is not None:
+                yield record
+            record = match.groupdict()
+        elif record is not None:
+            record["message"] += "\n" + line
+    if record is not None:
+        yield record
+
+
+def parse_app_log(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Extracts the /superchat query stream from app.log lines:
+    [{"request_id", "timestamp", "query", "latency_seconds", "tier", "mode"}],
+    in arrival order. Latency / tier / mode are None for requests that never
+    logged a response (errors, or the log ending mid-request).
+    """
+    queries: Dict[str, Dict[str, Any]] = {}
+
+    for record in _log_records(lines):
+        message = record["message"]
+        incoming = _INCOMING.match(message)
+        if incoming:
+            queries[incoming["request_id"]] = {
+                "request_id": incoming["request_id"],
+                "timestamp": datetime.strptime(record["asctime"], "%Y-%m-%d %H:%M:%S,%f").timestamp(),
+                "query": incoming["query"],
+                "latency_seconds": None,
+                "tier": None,
+                "mode": None
+            }
+            continue
+
+        response = _RESPONSE.match(message)
+        if response and response["request_id"] in queries:
+            entry = queries[response["request_id"]]
+            entry["latency_seconds"] = float(response["latency"])
+            entry["mode"] = response["mode"]
+            entry["tier"] = response["tier"] or tier_for_mode(response["mode"])
+
+    return sorted(queries.values(), key=lambda q: q["timestamp"])
+
+
+def read_jsonl(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    One JSON object per line with at least "query"; optional "timestamp"
+    (epoch seconds), "tenant", "corpora" and "tier".
+    """
+    queries = []
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if not entry.get("query"):
+            raise ValueError(f"Line {number}: missing 'query'")
+        queries.append(entry)
+    return queries
+
+
+def load_queries(patterns: List[str]) -> List[Dict[str, Any]]:
+    """
+    Loads queries from app logs or JSONL files (by extension). Patterns may
+    be globs, e.g. "logs/app.log*" to include rotated files. Entries with
+    timestamps are returned in arrival order.
+    """
+    paths = sorted({path for pattern in patterns for path in (glob.glob(pattern) or [pattern])})
+    queries: List[Dict[str, Any]] = []
+
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            loaded = read_jsonl(f) if path.endswith((".jsonl", ".ndjson")) else parse_app_log(f)
+        logger.info(f"Loaded {len(loaded)} queries from {path}")
+        queries.extend(loaded)
+
+    if all(q.get("timestamp") is not None for q in queries):
+        queries.sort(key=lambda q: q["timestamp"])
+    return queries
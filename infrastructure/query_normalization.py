@@ -0,0 +1,13 @@
+import re
+
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form used as a cache / coalescing key:
+    lowercased, punctuation removed, whitespace collapsed.
+    """
+    text = _PUNCTUATION.sub(" ", query.lower())
+    return _WHITESPACE.sub(" ", text).strip()
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("SingleFlight")
+
+
+class _Call:
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.vector: Optional[np.ndarray] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller (leader)
+    runs the work, later callers (followers) await the leader's result.
+
+    With `similarity_threshold` and `embed_fn` set, a caller whose text embedding
+    is at least that cosine-similar to an in-flight call also follows it.
+    The leader's work is shielded, so a cancelled leader (client disconnect)
+    doesn't cancel the result its followers are waiting for.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: Optional[float] = None,
+        embed_fn: Optional[Callable[[str], List[float]]] = None
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+        self._calls: Dict[str, _Call] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(await asyncio.to_thread(self.embed_fn, text), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm else None
+        except Exception:
+            logger.exception("Embedding for similarity coalescing failed; using exact keys only")
+            return None
+
+    def _most_similar(self, key: str, vector: np.ndarray) -> Optional[_Call]:
+        best, best_score = None, self.similarity_threshold
+        for other_key, call in self._calls.items():
+            if other_key == key or call.vector is None:
+                continue
+            score = float(np.dot(vector, call.vector))
+            if score >= best_score:
+                best, best_score = call, score
+        return best
+
+    def _release(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def run(self, key: str, text: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, Optional[str]]:
+        """
+        Returns (result, match) where match is None for the leader,
+        "exact" or "similar" for a follower.
+        """
+        existing = self._calls.get(key)
+        if existing is not None:
+            return await asyncio.shield(existing.future), "exact"
+
+        loop = asyncio.get_running_loop()
+        call = _Call(loop.create_future())
+        self._calls[key] = call
+
+        if self.similarity_threshold is not None and self.embed_fn is not None:
+            vector = await self._embed(text)
+            if vector is not None:
+                similar = self._most_similar(key, vector)
+                if similar is not None:
+                    try:
+                        result = await asyncio.shield(similar.future)
+                        call.future.set_result(result)
+                        return result, "similar"
+                    except BaseException as e:
+                        if not call.future.done():
+                            call.future.set_exception(e)
+                        raise
+                    finally:
+                        self._release(key, call)
+                call.vector = vector
+
+        task = asyncio.ensure_future(fn())
+
+        def _settle(t: asyncio.Future):
+            self._release(key, call)
+            if call.future.done():
+                return
+            if t.cancelled():
+                call.future.cancel()
+            elif t.exception() is not None:
+                call.future.set_exception(t.exception())
+            else:
+                call.future.set_result(t.result())
+
+        task.add_done_callback(_settle)
+        return await asyncio.shield(call.future), None
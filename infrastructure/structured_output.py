@@ -0,0 +1,208 @@
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+
+from google.genai import types
+from prometheus_client import Counter, Gauge
+from pydantic import BaseModel, ValidationError
+
+from infrastructure.llm_client import LLMClientProvider
+
+logger = logging.getLogger("StructuredOutput")
+
+T = TypeVar("T", bound=BaseModel)
+
+STRUCTURED_OUTPUTS = Counter(
+    "superrag_structured_outputs_total",
+    "Structured LLM replies by how they were recovered (ok / tolerant / repaired / wasted)",
+    ["agent", "outcome"]
+)
+WASTED_RATIO = Gauge(
+    "superrag_structured_output_wasted_ratio",
+    "Share of structured LLM calls whose reply could not be used, since process start",
+    ["agent"]
+)
+
+_outcomes: Dict[str, Dict[str, int]] = {}
+_outcome_lock = threading.Lock()
+
+
+def _record_outcome(agent: str, outcome: str):
+    STRUCTURED_OUTPUTS.labels(agent=agent, outcome=outcome).inc()
+    with _outcome_lock:
+        counts = _outcomes.setdefault(agent, {"ok": 0, "tolerant": 0, "repaired": 0, "wasted": 0})
+        counts[outcome] += 1
+        WASTED_RATIO.labels(agent=agent).set(counts["wasted"] / sum(counts.values()))
+
+
+def get_structured_output_stats() -> Dict[str, Dict[str, int]]:
+    with _outcome_lock:
+        return {agent: dict(counts) for agent, counts in _outcomes.items()}
+
+
+# ---------------- Tolerant JSON parsing ----------------
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _strip_trailing_comma(buffer: List[str]):
+    i = len(buffer) - 1
+    while i >= 0 and buffer[i].isspace():
+        i -= 1
+    if i >= 0 and buffer[i] == ",":
+        del buffer[i:]
+
+
+def parse_json(text: str) -> Any:
+    """
+    Parses the first JSON object / array in `text`, tolerating what LLM replies
+    usually get wrong: Markdown fences or prose around the JSON, trailing commas
+    and output truncated mid-object (open strings and brackets are closed, and a
+    dangling key or partial value is dropped).
+
+    Single pass over the text; raises ValueError if nothing usable is found.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("No JSON object found in LLM reply")
+
+    buffer: List[str] = []
+    stack: List[str] = []
+    # (buffer length, stack) after each complete member: where a truncated reply can be cut
+    safe_points: List[Tuple[int, List[str]]] = []
+    in_string = False
+    escaped = False
+
+    for ch in text[min(starts):]:
+        if in_string:
+            buffer.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+        elif ch in "}]":
+            if not stack or stack[-1] != ch:
+                break
+            _strip_trailing_comma(buffer)
+            stack.pop()
+            buffer.append(ch)
+            if not stack:
+                return json.loads("".join(buffer))
+            continue
+        elif ch == ",":
+            safe_points.append((len(buffer), list(stack)))
+
+        buffer.append(ch)
+
+    # Truncated: close what is open, falling back to the last complete member
+    candidates = []
+    tail = list(buffer)
+    if in_string:
+        tail.append('"')
+    _strip_trailing_comma(tail)
+    candidates.append(("".join(tail), stack))
+    for length, open_stack in reversed(safe_points):
+        candidates.append(("".join(buffer[:length]), open_stack))
+
+    for prefix, open_stack in candidates:
+        try:
+            return json.loads(prefix + "".join(reversed(open_stack)))
+        except json.JSONDecodeError:
+            continue
+
+    raise ValueError("Could not recover JSON from truncated LLM reply")
+
+
+# ---------------- Schema-constrained generation ----------------
+
+def _validate(schema: Type[T], response: Any, raw: str) -> Tuple[T, str]:
+    """
+    Returns (parsed, outcome) or raises ValueError / ValidationError.
+    """
+    parsed = getattr(response, "parsed", None)
+    if isinstance(parsed, schema):
+        return parsed, "ok"
+
+    try:
+        return schema.model_validate_json(raw), "ok"
+    except ValidationError:
+        pass
+
+    return schema.model_validate(parse_json(raw)), "tolerant"
+
+
+async def generate_structured(
+    agent: str,
+    model: str,
+    contents: Any,
+    schema: Type[T],
+    config: Optional[types.GenerateContentConfig] = None,
+    request_id: str = "NA"
+) -> Tuple[T, str]:
+    """
+    Calls the LLM with `schema` as the response schema and returns
+    (validated model, raw reply text).
+
+    Replies that don't parse go through parse_json; if that still fails a short
+    repair prompt (Flash, broken reply + error only) is sent instead of failing
+    the whole call. Raises ValueError if the repair doesn't validate either.
+    """
+    config = (config or types.GenerateContentConfig()).model_copy(update={
+        "response_mime_type": "application/json",
+        "response_schema": schema,
+    })
+
+    response = await LLMClientProvider.generate_content(agent=agent, model=model, contents=contents, config=config)
+    raw = (response.text or "").strip()
+
+    try:
+        parsed, outcome = _validate(schema, response, raw)
+        _record_outcome(agent, outcome)
+        return parsed, raw
+    except (ValueError, ValidationError) as e:
+        error = str(e)
+
+    logger.warning(f"[{request_id}] {agent} reply failed schema validation, attempting repair: {error[:200]}")
+    repair_prompt = f"""
+The JSON below does not match the required schema.
+Fix it and return only the corrected JSON. Keep all content that is already present.
+
+Error:
+{error}
+
+Schema:
+{json.dumps(schema.model_json_schema())}
+
+JSON:
+{raw}
+"""
+
+    try:
+        response = await LLMClientProvider.generate_content(
+            agent=f"{agent}_repair",
+            model=LLMClientProvider.get_router_model(),
+            contents=repair_prompt,
+            config=types.GenerateContentConfig(
+                temperature=0.0,
+                response_mime_type="application/json",
+                response_schema=schema
+            )
+        )
+        repaired_raw = (response.text or "").strip()
+        parsed, _ = _validate(schema, response, repaired_raw)
+    except Exception:
+        _record_outcome(agent, "wasted")
+        raise
+
+    _record_outcome(agent, "repaired")
+    logger.info(f"[{request_id}] {agent} reply repaired")
+    return parsed, repaired_raw
@@ -0,0 +1,181 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger("Telemetry")
+
+# ---------------- Prometheus metrics ----------------
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+REQUEST_LATENCY = Histogram(
+    "superrag_request_latency_seconds",
+    "End-to-end /superchat orchestration latency",
+    ["tier"],
+    buckets=LATENCY_BUCKETS
+)
+
+SPAN_LATENCY = Histogram(
+    "superrag_span_latency_seconds",
+    "Latency of agent runs and embedding / Qdrant / LLM calls",
+    ["kind", "name", "tier"],
+    buckets=LATENCY_BUCKETS
+)
+
+ERRORS = Counter(
+    "superrag_errors_total",
+    "Errors raised or reported by agents and dependencies",
+    ["kind", "name"]
+)
+
+CACHE_LOOKUPS = Counter(
+    "superrag_cache_lookups_total",
+    "Cache lookups by outcome",
+    ["cache", "result"]
+)
+
+CACHE_HIT_RATIO = Gauge(
+    "superrag_cache_hit_ratio",
+    "Hit ratio since process start",
+    ["cache"]
+)
+
+CASCADE_DECISIONS = Counter(
+    "superrag_cascade_decisions_total",
+    "Cascade routing outcomes (answered at Tier-2 or escalated, with reason)",
+    ["outcome"]
+)
+
+COALESCED = Counter(
+    "superrag_coalesced_requests_total",
+    "Requests answered by awaiting an in-flight identical request (pipeline runs saved)",
+    ["match"]
+)
+
+_cache_counts: Dict[str, List[int]] = {}
+_cache_lock = threading.Lock()
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+    with _cache_lock:
+        counts = _cache_counts.setdefault(cache, [0, 0])
+        counts[0 if hit else 1] += 1
+        CACHE_HIT_RATIO.labels(cache=cache).set(counts[0] / (counts[0] + counts[1]))
+
+
+def record_cascade_decision(outcome: str):
+    CASCADE_DECISIONS.labels(outcome=outcome).inc()
+
+
+def record_coalesced(match: str):
+    COALESCED.labels(match=match).inc()
+
+
+def record_error(kind: str, name: str):
+    ERRORS.labels(kind=kind, name=name).inc()
+
+
+# ---------------- Request traces ----------------
+
+class RequestTrace:
+    """
+    Collects the spans of one request.
+    Histograms are observed when the trace finishes, so every span is labelled
+    with the tier the request actually ended up in.
+    """
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.tier: Optional[str] = None
+        self.total_seconds: Optional[float] = None
+
+    def add_span(self, kind: str, name: str, start: float, duration: float, error: bool):
+        self.spans.append({
+            "kind": kind,
+            "name": name,
+            "start_ms": round((start - self.started) * 1000, 2),
+            "duration_ms": round(duration * 1000, 2),
+            "error": error
+        })
+
+    def to_dict(self) -> Dict[str, Any]:
+        by_kind: Dict[str, float] = {}
+        for s in self.spans:
+            # agent spans contain the dependency spans, so only sum dependency kinds
+            if s["kind"] != "agent":
+                by_kind[s["kind"]] = round(by_kind.get(s["kind"], 0.0) + s["duration_ms"], 2)
+
+        return {
+            "tier": self.tier,
+            "total_ms": round((self.total_seconds or 0.0) * 1000, 2),
+            "dependency_ms": by_kind,
+            "spans": self.spans
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("superrag_trace", default=None)
+
+
+def start_trace(request_id: str) -> RequestTrace:
+    trace = RequestTrace(request_id)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def finish_trace(trace: RequestTrace, tier: str) -> Dict[str, Any]:
+    trace.tier = tier
+    trace.total_seconds = time.perf_counter() - trace.started
+
+    REQUEST_LATENCY.labels(tier=tier).observe(trace.total_seconds)
+    for s in trace.spans:
+        SPAN_LATENCY.labels(kind=s["kind"], name=s["name"], tier=tier).observe(s["duration_ms"] / 1000)
+
+    _current_trace.set(None)
+    return trace.to_dict()
+
+
+def record_span(name: str, kind: str, start: float, duration: float):
+    """
+    Adds an already-measured interval (perf_counter based) as a span.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(kind, name, start, duration, False)
+    else:
+        SPAN_LATENCY.labels(kind=kind, name=name, tier="none").observe(duration)
+
+
+@contextmanager
+def span(name: str, kind: str = "agent"):
+    """
+    Times a block. Inside a request the span joins the request trace;
+    outside one (e.g. ingestion) it is observed immediately with tier="none".
+    """
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        record_error(kind, name)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(kind, name, start, duration, error)
+        else:
+            SPAN_LATENCY.labels(kind=kind, name=name, tier="none").observe(duration)
@@ -0,0 +1,52 @@
+import os
+import re
+import logging
+from functools import lru_cache
+from typing import Callable
+
+logger = logging.getLogger("TokenCounter")
+
+# CJK characters are roughly one token each, other words one token per 4 characters
+# (\w{1,4} splits a long word into 4-character pieces), punctuation one each
+_APPROX_TOKEN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]|\w{1,4}|[^\w\s]")
+
+# Long texts are counted in windows of about this many characters, so only
+# one window's token list is alive at a time (a whole document's can be 100+ MB)
+_WINDOW_CHARS = 1 << 18
+
+
+def approximate_token_count(text: str) -> int:
+    return len(_APPROX_TOKEN.findall(text))
+
+
+@lru_cache(maxsize=1)
+def get_token_counter() -> Callable[[str], int]:
+    """
+    Token counter used for token-based sizing. Uses tiktoken (TOKENIZER_ENCODING,
+    default cl100k_base) when installed; Gemini's tokenizer is not available
+    offline, so this is an estimate either way. Falls back to a regex
+    approximation without tiktoken.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        logger.info("tiktoken not installed, using approximate token counts")
+        return approximate_token_count
+
+    encoding = tiktoken.get_encoding(os.getenv("TOKENIZER_ENCODING", "cl100k_base"))
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def count_tokens(text: str) -> int:
+    counter = get_token_counter()
+    if len(text) <= _WINDOW_CHARS:
+        return counter(text)
+
+    # Windows end at a space, which never falls inside a token
+    count, start = 0, 0
+    while start < len(text):
+        end = text.find(" ", start + _WINDOW_CHARS)
+        end = len(text) if end == -1 else end
+        count += counter(text[start:end])
+        start = end
+    return count
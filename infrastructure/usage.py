@@ -0,0 +1,189 @@
+import os
+import json
+import logging
+import threading
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Counter
+
+logger = logging.getLogger("UsageTracker")
+
+# USD per 1M tokens. Override with LLM_PRICING_JSON='{"model": {"input": .., "cached": .., "output": ..}}'
+DEFAULT_PRICING = {
+    "gemini-2.5-flash": {"input": 0.30, "cached": 0.075, "output": 2.50},
+    "gemini-2.5-pro": {"input": 1.25, "cached": 0.31, "output": 10.00},
+}
+
+TOKENS = Counter(
+    "superrag_llm_tokens_total",
+    "LLM tokens by agent, model, token kind and tier",
+    ["agent", "model", "kind", "tier"]
+)
+
+COST = Counter(
+    "superrag_llm_cost_usd_total",
+    "Estimated LLM spend in USD by agent, model and tier",
+    ["agent", "model", "tier"]
+)
+
+TOKEN_KINDS = ("prompt_tokens", "cached_tokens", "output_tokens", "thinking_tokens")
+
+
+@lru_cache(maxsize=1)
+def get_pricing() -> Dict[str, Dict[str, float]]:
+    """
+    Loaded on first use rather than at import, so LLM_PRICING_JSON from .env
+    (read by app.py after its imports) is honoured.
+    """
+    pricing = dict(DEFAULT_PRICING)
+    override = os.getenv("LLM_PRICING_JSON")
+    if override:
+        try:
+            pricing.update(json.loads(override))
+        except ValueError:
+            logger.exception("Invalid LLM_PRICING_JSON, using default pricing")
+    return pricing
+
+
+def _price_for(model: str) -> Optional[Dict[str, float]]:
+    pricing = get_pricing()
+    if model in pricing:
+        return pricing[model]
+    # Versioned names such as "gemini-2.5-flash-001" fall back to their family
+    for name, price in pricing.items():
+        if model.startswith(name):
+            return price
+    return None
+
+
+def _new_bucket() -> Dict[str, float]:
+    bucket = {kind: 0 for kind in TOKEN_KINDS}
+    bucket.update({"calls": 0, "cost_usd": 0.0, "cache_savings_usd": 0.0})
+    return bucket
+
+
+def _add(bucket: Dict[str, float], record: Dict[str, Any]):
+    for key in (*TOKEN_KINDS, "cost_usd", "cache_savings_usd"):
+        bucket[key] += record[key]
+    bucket["calls"] += 1
+
+
+def build_record(agent: str, model: str, usage_metadata: Any) -> Dict[str, Any]:
+    """
+    Normalizes `response.usage_metadata` into one usage record.
+    prompt_tokens includes the cached tokens (as reported by Gemini);
+    cost bills the cached part at the cached rate.
+    """
+    def count(field: str) -> int:
+        return int(getattr(usage_metadata, field, None) or 0)
+
+    record = {
+        "agent": agent,
+        "model": model,
+        "prompt_tokens": count("prompt_token_count"),
+        "cached_tokens": count("cached_content_token_count"),
+        "output_tokens": count("candidates_token_count"),
+        "thinking_tokens": count("thoughts_token_count"),
+        "cost_usd": 0.0,
+        "cache_savings_usd": 0.0
+    }
+
+    price = _price_for(model)
+    if price:
+        uncached = record["prompt_tokens"] - record["cached_tokens"]
+        billed_output = record["output_tokens"] + record["thinking_tokens"]
+        record["cost_usd"] = (
+            uncached * price["input"]
+            + record["cached_tokens"] * price["cached"]
+            + billed_output * price["output"]
+        ) / 1_000_000
+        record["cache_savings_usd"] = record["cached_tokens"] * (price["input"] - price["cached"]) / 1_000_000
+
+    return record
+
+
+class RequestUsage:
+    """
+    Token usage of every LLM call made while serving one request.
+    """
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+
+    def add(self, record: Dict[str, Any]):
+        self.records.append(record)
+
+    def summary(self) -> Dict[str, Any]:
+        totals = _new_bucket()
+        by_agent: Dict[str, Dict[str, float]] = {}
+        by_model: Dict[str, Dict[str, float]] = {}
+
+        for r in self.records:
+            _add(totals, r)
+            _add(by_agent.setdefault(r["agent"], _new_bucket()), r)
+            _add(by_model.setdefault(r["model"], _new_bucket()), r)
+
+        return {"totals": totals, "by_agent": by_agent, "by_model": by_model}
+
+
+_current_usage: ContextVar[Optional[RequestUsage]] = ContextVar("superrag_usage", default=None)
+
+_tier_totals: Dict[str, Dict[str, Dict[str, float]]] = {}
+_tier_lock = threading.Lock()
+
+
+def start_request_usage() -> RequestUsage:
+    usage = RequestUsage()
+    _current_usage.set(usage)
+    return usage
+
+
+def record_llm_usage(agent: str, model: str, response: Any):
+    """
+    Called after every LLM response. Outside a request (no tracker set)
+    the usage is still counted in Prometheus under tier="none".
+    """
+    usage_metadata = getattr(response, "usage_metadata", None)
+    if usage_metadata is None:
+        return
+
+    record = build_record(agent, model, usage_metadata)
+    usage = _current_usage.get()
+
+    if usage is not None:
+        usage.add(record)
+    else:
+        _export(record, "none")
+
+
+def _export(record: Dict[str, Any], tier: str):
+    for kind in TOKEN_KINDS:
+        if record[kind]:
+            TOKENS.labels(agent=record["agent"], model=record["model"], kind=kind, tier=tier).inc(record[kind])
+    if record["cost_usd"]:
+        COST.labels(agent=record["agent"], model=record["model"], tier=tier).inc(record["cost_usd"])
+
+
+def finish_request_usage(usage: RequestUsage, tier: str) -> Dict[str, Any]:
+    """
+    Adds the request to the running per-tier totals and returns its summary.
+    """
+    with _tier_lock:
+        tier_bucket = _tier_totals.setdefault(tier, {"requests": 0, "totals": _new_bucket(), "by_agent": {}})
+        tier_bucket["requests"] += 1
+        for r in usage.records:
+            _add(tier_bucket["totals"], r)
+            _add(tier_bucket["by_agent"].setdefault(r["agent"], _new_bucket()), r)
+
+    for r in usage.records:
+        _export(r, tier)
+
+    _current_usage.set(None)
+    return usage.summary()
+
+
+def get_tier_totals() -> Dict[str, Any]:
+    with _tier_lock:
+        return json.loads(json.dumps(_tier_totals))
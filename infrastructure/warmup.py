@@ -0,0 +1,125 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Gauge
+
+from infrastructure.corpora import LEGACY_DOCS_COLLECTION, LEGACY_MEMORY_COLLECTION, VectorStoreRegistry
+from infrastructure.embedding_client import EmbeddingClientProvider
+from infrastructure.llm_client import LLMClientProvider
+from infrastructure.qdrant_client import QdrantClientProvider
+
+logger = logging.getLogger("Warmup")
+
+STARTUP_SECONDS = Gauge(
+    "superrag_startup_seconds",
+    "Time spent in each startup phase (import = module load + agent construction)",
+    ["phase"]
+)
+READY = Gauge("superrag_ready", "1 once warmup has completed")
+
+
+class Readiness:
+    """
+    Startup / warmup state behind /readyz.
+    """
+
+    def __init__(self, process_started: float):
+        self.process_started = process_started
+        self.status = "starting"
+        self.steps: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.import_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def mark_imported(self):
+        self.import_seconds = time.perf_counter() - self.process_started
+        STARTUP_SECONDS.labels(phase="import").set(self.import_seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "import_seconds": round(self.import_seconds, 3) if self.import_seconds is not None else None,
+            "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            "steps_ms": {name: round(seconds * 1000, 1) for name, seconds in self.steps.items()},
+        }
+
+
+def _timed(readiness: Readiness, name: str, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    readiness.steps[name] = time.perf_counter() - start
+    return result
+
+
+def _warm_collection(collection_name: str, vector: List[float]):
+    """
+    Creates the collection if needed and runs one search, so the first real
+    request doesn't pay for loading its segments / HNSW graph.
+    """
+    VectorStoreRegistry.ensure_collection(collection_name)
+    store = VectorStoreRegistry.get_store(collection_name)
+    store.similarity_search_with_score_by_vector(vector, k=1)
+
+
+def _warmup_once(readiness: Readiness, collections: List[str]):
+    _timed(readiness, "qdrant", lambda: QdrantClientProvider.get_client().get_collections())
+
+    # First call loads local models / opens the HTTP connection pool
+    vector = _timed(readiness, "embeddings", lambda: EmbeddingClientProvider.get_embeddings().embed_query("warmup"))
+    _timed(readiness, "vector_size", EmbeddingClientProvider.get_vector_size)
+
+    for collection_name in collections:
+        _timed(readiness, f"collection:{collection_name}", _warm_collection, collection_name, vector)
+
+    # Client construction only; no API call is made
+    _timed(readiness, "llm_client", LLMClientProvider.get_client)
+
+
+async def run_warmup(
+    readiness: Readiness,
+    collections: Optional[List[str]] = None,
+    retry_interval: Optional[float] = None
+):
+    """
+    Warms shared clients and collections in a worker thread, retrying until it
+    succeeds, so a dependency that is down at boot delays readiness instead of
+    crashing the process.
+    """
+    collections = collections or [LEGACY_DOCS_COLLECTION, LEGACY_MEMORY_COLLECTION]
+    retry_interval = retry_interval or float(os.getenv("WARMUP_RETRY_SECONDS", "10"))
+    start = time.perf_counter()
+
+    while True:
+        readiness.status = "warming"
+        readiness.attempts += 1
+        try:
+            await asyncio.to_thread(_warmup_once, readiness, collections)
+            break
+        except Exception as e:
+            readiness.status = "failed"
+            readiness.error = str(e)
+            logger.exception(f"Warmup attempt {readiness.attempts} failed, retrying in {retry_interval:.0f}s")
+            await asyncio.sleep(retry_interval)
+
+    readiness.warmup_seconds = time.perf_counter() - start
+    readiness.error = None
+    readiness.status = "ready"
+    STARTUP_SECONDS.labels(phase="warmup").set(readiness.warmup_seconds)
+    STARTUP_SECONDS.labels(phase="total").set(time.perf_counter() - readiness.process_started)
+    READY.set(1)
+
+    logger.info(
+        f"Ready in {time.perf_counter() - readiness.process_started:.2f}s "
+        f"(import {readiness.import_seconds or 0:.2f}s, warmup {readiness.warmup_seconds:.2f}s): "
+        + ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in readiness.steps.items())
+    )
@@ -1,36 +1,155 @@
+import os
+import asyncio
 import logging
-from typing import List, Dict
+import multiprocessing as mp
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from infrastructure.token_counter import count_tokens
+
 logger = logging.getLogger("ChunkerAgent")
 
+# Token mode splits at the first of these that occurs in the text, then only
+# breaks oversized pieces at the later ones: headings and numbered clauses
+# first, then paragraphs, lines, sentences and words.
+STRUCTURE_SEPARATORS = [
+    r"\n(?=#{1,6} )",                                                   # markdown headings
+    r"\n(?=(?:SECTION|Section|ARTICLE|Article|CHAPTER|Chapter|PART|Part)\s+[\dIVX]+)",
+    r"\n(?=[A-Z][A-Z0-9 ,:&/()-]{3,}\n)",                               # ALL CAPS heading lines
+    r"\n\s*\n",
+    r"\n(?=\s*(?:\d+(?:\.\d+)*[.)]|\([a-z0-9]+\)|[a-z][.)])\s)",        # numbered / lettered clauses
+    r"\n",
+    r"(?<=[.!?;])\s+|(?<=[。！？；])",                                  # sentences (CJK ones have no space)
+    r" ",
+    r"",
+]
+
+
+@lru_cache(maxsize=4)
+def _build_splitter(mode: str, chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    if mode == "tokens":
+        return RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=STRUCTURE_SEPARATORS,
+            is_separator_regex=True,
+            keep_separator="start",
+            length_function=count_tokens
+        )
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def _attach_short_pieces(pieces: List[str], min_tokens: int) -> List[str]:
+    """
+    The splitter emits a heading or clause number as its own tiny piece when
+    the section after it is too long to merge; prepend it to the next piece
+    instead, so headings stay with their content.
+    """
+    merged: List[str] = []
+    carry = ""
+    for piece in pieces:
+        piece = f"{carry}\n{piece}" if carry else piece
+        carry = ""
+        if count_tokens(piece) < min_tokens:
+            carry = piece
+        else:
+            merged.append(piece)
+    if carry:
+        if merged:
+            merged[-1] = f"{merged[-1]}\n{carry}"
+        else:
+            merged.append(carry)
+    return merged
+
+
+def split_documents(documents: List[Dict], mode: str, chunk_size: int, chunk_overlap: int) -> List[List[Dict]]:
+    """
+    Splits each document into chunk dicts. Module-level so process pool workers can run it.
+    """
+    splitter = _build_splitter(mode, chunk_size, chunk_overlap)
+    results = []
+    for doc in documents:
+        pieces = splitter.split_text(doc["text"])
+        if mode == "tokens":
+            pieces = _attach_short_pieces(pieces, max(chunk_size // 8, 1))
+        results.append([
+            {"source": doc["source"], "path": doc.get("path"), "chunk_id": idx, "text": chunk}
+            for idx, chunk in enumerate(pieces)
+        ])
+    return results
+
+
 class ChunkerAgent:
     """
     Splits documents into overlapping semantic chunks.
+
+    Modes (CHUNKER_MODE):
+    - chars  : chunk_size / chunk_overlap in characters (default).
+    - tokens : CHUNK_TOKENS / CHUNK_OVERLAP_TOKENS in tokens (see token_counter),
+               splitting at headings and numbered clauses before paragraphs
+               and sentences, so chunk sizes stay even across languages and tables.
+
+    With at least CHUNKER_PARALLEL_MIN_DOCS documents, splitting runs in a
+    process pool of CHUNKER_WORKERS processes; otherwise in a worker thread.
     """
 
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
-        )
+    def __init__(
+        self,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        mode: Optional[str] = None,
+        workers: Optional[int] = None
+    ):
+        self.mode = mode or os.getenv("CHUNKER_MODE", "chars")
+        if self.mode not in ("chars", "tokens"):
+            raise ValueError(f"Unknown chunker mode: {self.mode}")
+
+        if self.mode == "tokens":
+            self.chunk_size = chunk_size or int(os.getenv("CHUNK_TOKENS", "256"))
+            self.chunk_overlap = chunk_overlap if chunk_overlap is not None else int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+        else:
+            self.chunk_size = chunk_size or 1000
+            self.chunk_overlap = chunk_overlap if chunk_overlap is not None else 200
+
+        self.workers = workers or int(os.getenv("CHUNKER_WORKERS", str(os.cpu_count() or 1)))
+        self.parallel_min_docs = int(os.getenv("CHUNKER_PARALLEL_MIN_DOCS", "8"))
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"))
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
 
     async def run(self, documents: List[Dict]) -> List[Dict]:
-        logger.info("Chunking documents")
+        logger.info(f"Chunking documents ({self.mode} mode)")
 
         if not documents:
             raise ValueError("No documents provided to ChunkerAgent")
 
         try:
-            chunks = []
-            for doc in documents:
-                splits = self.splitter.split_text(doc["text"])
-                for idx, chunk in enumerate(splits):
-                    chunks.append({
-                        "source": doc["source"],
-                        "chunk_id": idx,
-                        "text": chunk
-                    })
+            config = (self.mode, self.chunk_size, self.chunk_overlap)
+
+            if self.workers > 1 and len(documents) >= self.parallel_min_docs:
+                # A few batches per worker keeps pickling overhead low and the load balanced
+                batch_size = -(-len(documents) // (self.workers * 4))
+                loop = asyncio.get_running_loop()
+                executor = self._get_executor()
+                batches = await asyncio.gather(*(
+                    loop.run_in_executor(executor, split_documents, documents[i:i + batch_size], *config)
+                    for i in range(0, len(documents), batch_size)
+                ))
+                per_document = [chunks for batch in batches for chunks in batch]
+            else:
+                per_document = await asyncio.to_thread(split_documents, documents, *config)
+
+            chunks = [chunk for doc_chunks in per_document for chunk in doc_chunks]
 
             logger.info(f"Created {len(chunks)} chunks")
             return chunks
@@ -0,0 +1,211 @@
+import os
+import re
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from prometheus_client import Counter
+
+logger = logging.getLogger("DedupAgent")
+
+DEDUP_CHUNKS = Counter(
+    "superrag_ingest_dedup_chunks_total",
+    "Chunks seen by the dedup stage: unique (embedded) vs exact / near duplicates (not embedded)",
+    ["result"]
+)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_WORD = re.compile(r"\w+")
+
+
+def record_dedup_stats(stats: Dict[str, int]):
+    for result in ("unique", "exact", "near"):
+        if stats.get(result):
+            DEDUP_CHUNKS.labels(result=result).inc(stats[result])
+
+
+def source_ref(chunk: Dict) -> Dict:
+    return {"source": chunk["source"], "chunk_id": chunk["chunk_id"], "path": chunk.get("path")}
+
+
+class DedupAgent:
+    """
+    Collapses exact and near-duplicate chunks before embedding.
+
+    Exact duplicates (same text after lowercasing and whitespace folding) are
+    found by hash. Near duplicates are found with MinHash over word shingles:
+    LSH banding picks candidates, and a candidate counts as a duplicate when
+    its estimated Jaccard similarity reaches `threshold`.
+
+    The first chunk of a group is kept (canonical) and gets a "sources" list
+    with a reference ({"source", "chunk_id", "path"}) to every copy. State
+    spans calls, so one instance dedups across all files of an ingestion run;
+    only hashes, signatures and references are kept, not texts or vectors.
+
+    Unique chunks carry their "digest" and MinHash "minhash" (hex), which the
+    vector store keeps in the point payload; seed() loads them back, so a
+    job re-ingesting a few files also dedups against the rest of the collection.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.threshold = threshold if threshold is not None else float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+        self.enabled = os.getenv("DEDUP_ENABLED", "1") == "1"
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        # a, b < 2^31 keep a * h + b below 2^64 for 32-bit shingle hashes
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+        self.reset()
+
+    def reset(self):
+        self._exact: Dict[str, int] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        self._signatures: List[np.ndarray] = []
+        self._canonical: List[Dict] = []
+        self.stats = {"unique": 0, "exact": 0, "near": 0}
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def _signature(self, normalized: str) -> np.ndarray:
+        words = _WORD.findall(normalized)
+        n = self.shingle_size
+        shingles = {" ".join(words[i:i + n]) for i in range(max(len(words) - n + 1, 1))}
+
+        hashes = np.frombuffer(
+            b"".join(hashlib.blake2b(s.encode(), digest_size=4).digest() for s in shingles),
+            dtype=np.uint32
+        ).astype(np.uint64)
+
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def seed(self, entries: List[Dict]):
+        """
+        Registers already stored canonical chunks: {"source", "chunk_id",
+        "sources", "digest", "minhash"}. Copies found later are reported in
+        dedup()'s `updated` like those of earlier calls.
+        """
+        for entry in entries:
+            signature = np.frombuffer(bytes.fromhex(entry["minhash"]), dtype=np.uint32)
+            if len(signature) != self.num_perm:
+                continue  # stored with other MinHash settings
+            idx = len(self._canonical)
+            self._canonical.append({"source": entry["source"], "chunk_id": entry["chunk_id"], "sources": entry["sources"]})
+            self._signatures.append(signature)
+            self._exact.setdefault(entry["digest"], idx)
+            for key in self._band_keys(signature):
+                self._buckets.setdefault(key, []).append(idx)
+        if entries:
+            logger.info(f"Seeded dedup state with {len(entries)} stored chunks")
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def _find_near(self, signature: np.ndarray, keys: List[Tuple[int, bytes]]) -> Optional[int]:
+        candidates = {idx for key in keys for idx in self._buckets.get(key, ())}
+        best, best_score = None, self.threshold
+        for idx in candidates:
+            score = float(np.mean(self._signatures[idx] == signature))
+            if score >= best_score:
+                best, best_score = idx, score
+        return best
+
+    def dedup(self, chunks: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Returns (unique, updated):
+        - unique: chunks seen for the first time, each with its "sources"
+          (including copies found in this call); only these need embedding.
+        - updated: {"source", "chunk_id", "sources"} of canonical chunks from
+          earlier calls that gained copies here, so their stored points need
+          the new "sources" list.
+        """
+        if not self.enabled:
+            for chunk in chunks:
+                chunk["sources"] = [source_ref(chunk)]
+            self.stats["unique"] += len(chunks)
+            return chunks, []
+
+        unique: List[Dict] = []
+        first_new = len(self._canonical)
+        updated_idx = set()
+
+        for chunk in chunks:
+            normalized = self._normalize(chunk["text"])
+            digest = hashlib.sha1(normalized.encode()).hexdigest()
+
+            idx = self._exact.get(digest)
+            if idx is not None:
+                kind = "exact"
+            else:
+                signature = self._signature(normalized)
+                keys = self._band_keys(signature)
+                idx = self._find_near(signature, keys)
+                kind = "near"
+
+            if idx is not None:
+                self._canonical[idx]["sources"].append(source_ref(chunk))
+                self._exact.setdefault(digest, idx)
+                if idx < first_new:
+                    updated_idx.add(idx)
+                self.stats[kind] += 1
+                continue
+
+            idx = len(self._canonical)
+            chunk["sources"] = [source_ref(chunk)]
+            chunk["digest"] = digest
+            chunk["minhash"] = signature.tobytes().hex()
+            self._canonical.append({"source": chunk["source"], "chunk_id": chunk["chunk_id"], "sources": chunk["sources"]})
+            self._signatures.append(signature)
+            self._exact[digest] = idx
+            for key in keys:
+                self._buckets.setdefault(key, []).append(idx)
+            unique.append(chunk)
+            self.stats["unique"] += 1
+
+        return unique, [self._canonical[idx] for idx in sorted(updated_idx)]
+
+    async def run(self, chunks: List[Dict]) -> List[Dict]:
+        """
+        One-shot dedup of a full set of chunks (starts from a clean state).
+        """
+        logger.info("Deduplicating chunks")
+
+        if not chunks:
+            raise ValueError("No chunks provided to DedupAgent")
+
+        try:
+            self.reset()
+            unique, _ = self.dedup(chunks)
+
+            duplicates = len(chunks) - len(unique)
+            logger.info(
+                f"Kept {len(unique)} of {len(chunks)} chunks "
+                f"({duplicates} duplicates, {duplicates / len(chunks):.1%} embedding calls saved)"
+            )
+            return unique
+
+        except Exception as e:
+            logger.exception("Chunk deduplication failed")
+            raise
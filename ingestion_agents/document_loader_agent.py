@@ -1,45 +1,57 @@
 import os
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 from PyPDF2 import PdfReader
 
 logger = logging.getLogger("DocumentLoaderAgent")
 
+SUPPORTED_EXTENSIONS = (".txt", ".pdf")
+
 class DocumentLoaderAgent:
     """
     Loads raw text from PDF and TXT files.
     """
 
-    async def run(self, data_dir: str) -> List[Dict]:
-        logger.info(f"Loading documents from directory: {data_dir}")
-
+    def list_files(self, data_dir: str) -> List[str]:
         if not os.path.exists(data_dir):
             raise FileNotFoundError(f"Data directory not found: {data_dir}")
 
-        documents = []
+        return [
+            os.path.join(data_dir, filename)
+            for filename in sorted(os.listdir(data_dir))
+            if filename.lower().endswith(SUPPORTED_EXTENSIONS)
+        ]
+
+    def load_file(self, file_path: str) -> Optional[Dict]:
+        """
+        Returns {"source", "path", "text"} for a supported file, None otherwise.
+        """
+        filename = os.path.basename(file_path)
+
+        if filename.lower().endswith(".txt"):
+            try:
+                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                    return {"source": filename, "path": os.path.abspath(file_path), "text": f.read()}
+            except Exception as e:
+                logger.exception(f"Failed to read TXT file: {filename}")
+                raise
+
+        elif filename.lower().endswith(".pdf"):
+            try:
+                reader = PdfReader(file_path)
+                pages = [page.extract_text() for page in reader.pages if page.extract_text()]
+                return {"source": filename, "path": os.path.abspath(file_path), "text": "\n".join(pages)}
+            except Exception as e:
+                logger.exception(f"Failed to read PDF file: {filename}")
+                raise
+
+        return None
+
+    async def run(self, data_dir: str) -> List[Dict]:
+        logger.info(f"Loading documents from directory: {data_dir}")
 
         try:
-            for filename in os.listdir(data_dir):
-                file_path = os.path.join(data_dir, filename)
-
-                if filename.lower().endswith(".txt"):
-                    try:
-                        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                            text = f.read()
-                            documents.append({"source": filename, "text": text})
-                    except Exception as e:
-                        logger.exception(f"Failed to read TXT file: {filename}")
-                        raise
-
-                elif filename.lower().endswith(".pdf"):
-                    try:
-                        reader = PdfReader(file_path)
-                        pages = [page.extract_text() for page in reader.pages if page.extract_text()]
-                        full_text = "\n".join(pages)
-                        documents.append({"source": filename, "text": full_text})
-                    except Exception as e:
-                        logger.exception(f"Failed to read PDF file: {filename}")
-                        raise
+            documents = [self.load_file(path) for path in self.list_files(data_dir)]
 
             logger.info(f"Loaded {len(documents)} documents successfully")
             return documents
@@ -0,0 +1,314 @@
+import os
+import time
+import queue
+import asyncio
+import logging
+import multiprocessing as mp
+from uuid import uuid4
+from typing import Any, Dict, List, Optional
+
+from infrastructure.job_store import JobStore
+from ingestion_agents.dedup_agent import record_dedup_stats
+from ingestion_agents.vector_store_agent import VectorStoreAgent
+
+logger = logging.getLogger("IngestionJobs")
+
+# Seconds a cancelled worker gets to stop on its own before it is terminated
+CANCEL_GRACE_SECONDS = 5.0
+
+
+def _ingestion_worker(
+    data_dir: str,
+    files: Optional[List[str]],
+    out: "mp.Queue",
+    cancel: "mp.Event",
+    embed_batch_size: int,
+    seeds: Optional[List[Dict]] = None
+):
+    """
+    Worker process entry point: load, chunk, dedup and embed one file at a
+    time and stream the embedded chunks back. Qdrant writes stay in the parent,
+    since embedded (path) mode allows a single process per storage directory.
+
+    `files` limits the job to those paths (watch mode); a listed file that no
+    longer exists is reported with no chunks so its points get removed.
+    Duplicates are collapsed across all files of the job, and against the
+    stored chunks in `seeds` (partial jobs), so only unique chunks are
+    embedded and sent.
+
+    Messages: ("start", sources), ("chunks", chunks), ("sources", updated canonical refs),
+    ("file_done", (source, stored chunk_ids, dedup stats)), ("done", None),
+    ("cancelled", None), ("error", message).
+    """
+    from infrastructure.logging_config import LOG_FORMAT
+    from ingestion_agents.document_loader_agent import DocumentLoaderAgent
+    from ingestion_agents.chunker_agent import ChunkerAgent
+    from ingestion_agents.dedup_agent import DedupAgent
+    from ingestion_agents.embedding_agent import EmbeddingAgent
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format=LOG_FORMAT)
+
+    async def _run():
+        loader = DocumentLoaderAgent()
+        chunker = ChunkerAgent()
+        deduper = DedupAgent()
+        deduper.seed(seeds or [])
+        embedder = EmbeddingAgent()
+
+        paths = files if files is not None else loader.list_files(data_dir)
+        out.put(("start", [os.path.basename(path) for path in paths]))
+
+        for path in paths:
+            if cancel.is_set():
+                out.put(("cancelled", None))
+                return
+
+            chunks, unique, updated = [], [], []
+            before = dict(deduper.stats)
+            document = loader.load_file(path) if os.path.exists(path) else None
+            if document and document["text"].strip():
+                chunks = await chunker.run([document])
+                unique, updated = deduper.dedup(chunks)
+                for i in range(0, len(unique), embed_batch_size):
+                    if cancel.is_set():
+                        out.put(("cancelled", None))
+                        return
+                    out.put(("chunks", await embedder.run(unique[i:i + embed_batch_size])))
+                if updated:
+                    out.put(("sources", updated))
+
+            stats = {key: deduper.stats[key] - before[key] for key in before}
+            stats["chunks"] = len(chunks)
+            out.put(("file_done", (os.path.basename(path), [c["chunk_id"] for c in unique], stats)))
+
+        out.put(("done", None))
+
+    try:
+        asyncio.run(_run())
+    except Exception as e:
+        logging.getLogger("IngestionWorker").exception("Ingestion worker failed")
+        out.put(("error", str(e)))
+
+
+class IngestionJobManager:
+    """
+    Runs ingestion jobs in a separate process so serving is not blocked.
+
+    Jobs run one at a time in submission order. Progress, throughput, dedup
+    savings and the final status are persisted in a JobStore. Before anything
+    is written, the job's files are released from points they share with other
+    files; the worker's embedded chunks are then upserted batch by batch, and a
+    finished file's points that were not re-stored are removed, so re-ingesting
+    a changed file is idempotent.
+
+    JobStore calls block on SQLite, so they run in threads rather than on
+    the event loop.
+    """
+
+    def __init__(self, vector_store: VectorStoreAgent, store: Optional[JobStore] = None):
+        self.vector_store = vector_store
+        self.store = store or JobStore()
+        self.embed_batch_size = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "256"))
+        self.deduplicate = os.getenv("DEDUP_ENABLED", "1") == "1"
+        self._ctx = mp.get_context("spawn")
+        self._lock = asyncio.Lock()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._cancel_events: Dict[str, Any] = {}
+
+    async def submit(
+        self,
+        data_dir: str,
+        files: Optional[List[str]] = None,
+        collection_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Queues a job for every supported file in data_dir, or only `files` if given.
+        Chunks go to `collection_name` (default: the vector store's collection).
+        """
+        if not os.path.isdir(data_dir):
+            raise FileNotFoundError(f"Data directory not found: {data_dir}")
+
+        collection_name = collection_name or self.vector_store.collection_name
+        job_id = str(uuid4())
+        await asyncio.to_thread(self.store.create, job_id, data_dir, collection_name)
+        self._cancel_events[job_id] = self._ctx.Event()
+        self._tasks[job_id] = asyncio.create_task(self._run_job(job_id, data_dir, files, collection_name))
+        logger.info(
+            f"[{job_id}] Ingestion job queued for directory: {data_dir} -> {collection_name}"
+            + (f" ({len(files)} changed files)" if files is not None else "")
+        )
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def wait(self, job_id: str) -> Optional[Dict[str, Any]]:
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.shield(task)
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.list, limit)
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Jobs owned by another API worker are flagged "cancelling" in the
+        shared store; their owner picks that up while polling its worker.
+        """
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or job["status"] not in ("queued", "running"):
+            return job
+
+        logger.info(f"[{job_id}] Cancelling ingestion job")
+        if job_id not in self._cancel_events:
+            await asyncio.to_thread(self.store.update, job_id, status="cancelling")
+            return await asyncio.to_thread(self.store.get, job_id)
+
+        self._cancel_events[job_id].set()
+        if job["status"] == "queued":
+            await asyncio.to_thread(self.store.update, job_id, status="cancelled", finished_at=time.time())
+        else:
+            await asyncio.to_thread(self.store.update, job_id, status="cancelling")
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def remove_sources(self, sources: List[str], collection_name: Optional[str] = None):
+        """
+        Removes deleted files' points. Holds the job lock, so it never
+        interleaves with a job rewriting the same shared-duplicate points.
+        """
+        collection_name = collection_name or self.vector_store.collection_name
+
+        def remove():
+            self.vector_store.release_sources(sources, collection_name)
+            for source in sources:
+                self.vector_store.delete_source(source, collection_name=collection_name)
+
+        async with self._lock:
+            await asyncio.to_thread(remove)
+
+    async def shutdown(self):
+        for job_id in list(self._tasks):
+            await self.cancel(job_id)
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self.store.close()
+
+    async def _run_job(self, job_id: str, data_dir: str, files: Optional[List[str]], collection_name: str):
+        cancel = self._cancel_events[job_id]
+        try:
+            async with self._lock:
+                job = await asyncio.to_thread(self.store.get, job_id)
+                if cancel.is_set() or job["status"] != "queued":
+                    return
+                await self._execute(job_id, data_dir, files, collection_name, cancel)
+        finally:
+            self._tasks.pop(job_id, None)
+            self._cancel_events.pop(job_id, None)
+
+    async def _execute(self, job_id: str, data_dir: str, files: Optional[List[str]], collection_name: str, cancel):
+        # A partial job dedups against what the rest of the collection already stores
+        seeds = None
+        if files is not None and self.deduplicate:
+            sources = [os.path.basename(path) for path in files]
+            seeds = await asyncio.to_thread(self.vector_store.dedup_seeds, sources, collection_name)
+
+        out = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_ingestion_worker,
+            args=(data_dir, files, out, cancel, self.embed_batch_size, seeds),
+            name=f"ingest-{job_id[:8]}",
+            daemon=True
+        )
+
+        await asyncio.to_thread(self.store.update, job_id, status="running", started_at=time.time())
+        process.start()
+        logger.info(f"[{job_id}] Ingestion worker started (pid {process.pid})")
+
+        progress = {
+            "files_done": 0, "chunks_done": 0, "chunks_deduplicated": 0,
+            "embeddings_done": 0, "points_stored": 0
+        }
+        status, error = "failed", None
+        cancel_deadline = None
+
+        try:
+            while True:
+                try:
+                    kind, payload = await asyncio.to_thread(out.get, True, 0.5)
+                except queue.Empty:
+                    if not cancel.is_set():
+                        job = await asyncio.to_thread(self.store.get, job_id)
+                        if job["status"] == "cancelling":
+                            cancel.set()  # requested through another API worker
+                    if cancel.is_set():
+                        cancel_deadline = cancel_deadline or time.monotonic() + CANCEL_GRACE_SECONDS
+                        if time.monotonic() > cancel_deadline:
+                            process.terminate()
+                            status = "cancelled"
+                            break
+                    if not process.is_alive():
+                        error = f"Ingestion worker exited unexpectedly (code {process.exitcode})"
+                        break
+                    continue
+
+                if kind == "start":
+                    await asyncio.to_thread(self.store.update, job_id, files_total=len(payload))
+                    await asyncio.to_thread(self.vector_store.release_sources, payload, collection_name)
+
+                elif kind == "chunks":
+                    progress["embeddings_done"] += len(payload)
+                    if not cancel.is_set():
+                        await self.vector_store.run(payload, collection_name=collection_name)
+                        progress["points_stored"] += len(payload)
+                    await asyncio.to_thread(self.store.update, job_id, **progress)
+
+                elif kind == "sources":
+                    if not cancel.is_set():
+                        await asyncio.to_thread(self.vector_store.set_sources, payload, collection_name)
+
+                elif kind == "file_done":
+                    source, stored_chunk_ids, stats = payload
+                    if not cancel.is_set():
+                        await asyncio.to_thread(
+                            self.vector_store.delete_source, source, stored_chunk_ids, collection_name
+                        )
+                    record_dedup_stats(stats)
+                    progress["files_done"] += 1
+                    progress["chunks_done"] += stats["chunks"]
+                    progress["chunks_deduplicated"] += stats["exact"] + stats["near"]
+                    await asyncio.to_thread(self.store.update, job_id, **progress)
+
+                elif kind in ("done", "cancelled"):
+                    status = "cancelled" if cancel.is_set() else "completed"
+                    break
+
+                elif kind == "error":
+                    error = payload
+                    break
+
+        except Exception as e:
+            logger.exception(f"[{job_id}] Ingestion job failed")
+            error = str(e)
+            cancel.set()
+
+        finally:
+            process.join(timeout=CANCEL_GRACE_SECONDS)
+            if process.is_alive():
+                process.terminate()
+            out.close()
+
+        try:
+            await asyncio.to_thread(self.vector_store.export_exact_index, collection_name)
+        except Exception as e:
+            logger.exception(f"[{job_id}] Exact index export failed")
+
+        await asyncio.to_thread(
+            self.store.update, job_id, status=status, error=error, finished_at=time.time(), **progress
+        )
+        job = await asyncio.to_thread(self.store.get, job_id)
+        logger.info(
+            f"[{job_id}] Ingestion job {status}: {job['files_done']}/{job['files_total']} files, "
+            f"{job['points_stored']} points, {job['chunks_per_second']} chunks/s, "
+            f"{job['embeddings_saved']} duplicate chunks not embedded (dedup ratio {job['dedup_ratio']})"
+        )
@@ -1,6 +1,9 @@
+import asyncio
 import logging
+from typing import Optional
 from ingestion_agents.document_loader_agent import DocumentLoaderAgent
 from ingestion_agents.chunker_agent import ChunkerAgent
+from ingestion_agents.dedup_agent import DedupAgent, record_dedup_stats
 from ingestion_agents.embedding_agent import EmbeddingAgent
 from ingestion_agents.vector_store_agent import VectorStoreAgent
 
@@ -11,18 +14,22 @@ class IngestionOrchestrator:
     def __init__(self):
         self.loader = DocumentLoaderAgent()
         self.chunker = ChunkerAgent()
+        self.deduper = DedupAgent()
         self.embedder = EmbeddingAgent()
         self.vector_store = VectorStoreAgent()
 
-    async def ingest(self, data_dir: str):
+    async def ingest(self, data_dir: str, collection_name: Optional[str] = None):
         logger.info("Starting ingestion pipeline")
 
         try:
-            # Ingestion pipeline: Load, Chunk, Embed, Store
+            # Ingestion pipeline: Load, Chunk, Dedup, Embed, Store
             documents = await self.loader.run(data_dir)
             chunks = await self.chunker.run(documents)
-            embedded_chunks = await self.embedder.run(chunks)
-            await self.vector_store.run(embedded_chunks)
+            unique_chunks = await self.deduper.run(chunks)
+            record_dedup_stats(self.deduper.stats)
+            embedded_chunks = await self.embedder.run(unique_chunks)
+            await self.vector_store.run(embedded_chunks, collection_name=collection_name)
+            await asyncio.to_thread(self.vector_store.export_exact_index, collection_name)
 
             logger.info("Ingestion pipeline completed successfully")
 
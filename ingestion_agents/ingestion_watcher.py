@@ -0,0 +1,138 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Optional, Set, Tuple
+
+from prometheus_client import Counter, Histogram
+
+from ingestion_agents.document_loader_agent import DocumentLoaderAgent
+from ingestion_agents.ingestion_jobs import IngestionJobManager
+
+logger = logging.getLogger("IngestionWatcher")
+
+WATCH_CHANGES = Counter(
+    "superrag_ingest_watch_changes_total",
+    "Data directory changes picked up by the ingestion watcher",
+    ["change"]
+)
+FRESHNESS_LAG = Histogram(
+    "superrag_ingest_freshness_lag_seconds",
+    "Time from a file change being detected to it being searchable (or removed)",
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+)
+
+
+class IngestionWatcher:
+    """
+    Keeps Qdrant in sync with a data directory by polling it.
+
+    Files are compared by (mtime, size). Changes are collected until the
+    directory has been quiet for `debounce` seconds, then added / modified
+    files are re-ingested as one job and deleted files' points are removed.
+    Polling keeps it dependency-free and works on network mounts where
+    inotify doesn't.
+    """
+
+    def __init__(
+        self,
+        job_manager: IngestionJobManager,
+        data_dir: Optional[str] = None,
+        poll_interval: Optional[float] = None,
+        debounce: Optional[float] = None
+    ):
+        self.job_manager = job_manager
+        self.loader = DocumentLoaderAgent()
+        self.data_dir = data_dir or os.getenv("INGEST_WATCH_DIR", "data")
+        self.poll_interval = poll_interval or float(os.getenv("INGEST_WATCH_INTERVAL", "2"))
+        self.debounce = debounce or float(os.getenv("INGEST_WATCH_DEBOUNCE", "2"))
+
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for path in self.loader.list_files(self.data_dir):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _diff(self, current: Dict[str, Tuple[int, int]]) -> Tuple[Set[str], Set[str]]:
+        changed = {p for p, sig in current.items() if self._snapshot.get(p) != sig}
+        deleted = set(self._snapshot) - set(current)
+        return changed, deleted
+
+    def start(self):
+        self._snapshot = self._scan()
+        self._task = asyncio.create_task(self._watch())
+        logger.info(
+            f"Watching {self.data_dir} ({len(self._snapshot)} files, "
+            f"poll {self.poll_interval}s, debounce {self.debounce}s)"
+        )
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self):
+        pending_changed: Set[str] = set()
+        pending_deleted: Set[str] = set()
+        first_seen: Optional[float] = None
+        last_seen = 0.0
+
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                current = await asyncio.to_thread(self._scan)
+            except Exception:
+                logger.exception(f"Failed to scan {self.data_dir}")
+                continue
+
+            changed, deleted = self._diff(current)
+            self._snapshot = current
+
+            if changed or deleted:
+                now = time.monotonic()
+                first_seen = first_seen or now
+                last_seen = now
+                pending_changed = (pending_changed | changed) - deleted
+                pending_deleted = (pending_deleted | deleted) - changed
+                continue
+
+            # Quiet for at least one poll: flush once the debounce window has passed
+            if first_seen is not None and time.monotonic() - last_seen >= self.debounce:
+                try:
+                    await self._apply(pending_changed, pending_deleted, first_seen)
+                except Exception:
+                    logger.exception("Incremental ingestion failed")
+                pending_changed, pending_deleted, first_seen = set(), set(), None
+
+    async def _apply(self, changed: Set[str], deleted: Set[str], first_seen: float):
+        logger.info(f"Detected {len(changed)} added/modified and {len(deleted)} deleted files")
+
+        if deleted:
+            await self.job_manager.remove_sources(sorted(os.path.basename(path) for path in deleted))
+            WATCH_CHANGES.labels(change="deleted").inc(len(deleted))
+
+        if deleted and not changed:
+            await asyncio.to_thread(self.job_manager.vector_store.export_exact_index)
+
+        if changed:
+            WATCH_CHANGES.labels(change="added_or_modified").inc(len(changed))
+            job = await self.job_manager.submit(self.data_dir, files=sorted(changed))
+            job = await self.job_manager.wait(job["job_id"])
+            if job["status"] != "completed":
+                logger.warning(f"[{job['job_id']}] Incremental ingestion ended as {job['status']}: {job['error']}")
+                return
+
+        lag = time.monotonic() - first_seen
+        FRESHNESS_LAG.observe(lag)
+        logger.info(f"Data directory in sync, freshness lag {lag:.1f}s")
@@ -1,62 +1,275 @@
+import uuid
+import asyncio
 import logging
-from typing import List, Dict
-from qdrant_client.http.models import Distance, VectorParams
+from typing import Iterable, List, Dict, Optional
+from qdrant_client.http.models import (
+    PointStruct, Filter, FieldCondition, MatchValue, MatchAny, ValuesCount, FilterSelector,
+    IsEmptyCondition, PayloadField,
+    SetPayload, SetPayloadOperation
+)
 from langchain_qdrant import QdrantVectorStore
-from langchain_core.documents import Document
 
 from infrastructure.qdrant_client import QdrantClientProvider
-from infrastructure.embedding_client import EmbeddingClientProvider
+from infrastructure.corpora import LEGACY_DOCS_COLLECTION, VectorStoreRegistry
+from infrastructure.exact_index import ExactIndex, exact_engine_enabled
 
 logger = logging.getLogger("VectorStoreAgent")
 
+def chunk_point_id(source: str, chunk_id: int) -> str:
+    """
+    Deterministic point id, so re-ingesting a file overwrites its chunks instead of duplicating them.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#{chunk_id}"))
+
+
 class VectorStoreAgent:
     """
     Stores embeddings in Qdrant.
+    `collection_name` is the default target; run() / delete_source() can
+    write to another tenant's collection. Collections are created on first use.
+
+    A deduplicated point is stored under its canonical chunk's id and lists
+    every copy in metadata["sources"]; release_sources() moves those references
+    off files that are about to be re-ingested or removed.
+
+    Qdrant calls are blocking: run() does the upserts in a worker thread,
+    and callers on the event loop should do the same for the other writes.
     """
 
-    def __init__(self, collection_name: str = "enterprise_docs"):
+    def __init__(self, collection_name: str = LEGACY_DOCS_COLLECTION, batch_size: int = 256):
         self.collection_name = collection_name
-        self.client = QdrantClientProvider.get_client()
-        self.embeddings = EmbeddingClientProvider.get_embeddings()
-        self._ensure_collection()
-
-        self.store = QdrantVectorStore(
-            client=self.client,
-            collection_name=self.collection_name,
-            embedding=self.embeddings
-        )
+        self.batch_size = batch_size
+        self._ready = set()
+
+    @property
+    def client(self):
+        return QdrantClientProvider.get_client()
 
-    def _ensure_collection(self):
+    def _ensure_collection(self, collection_name: str):
+        if collection_name in self._ready:
+            return
         try:
-            existing = [c.name for c in self.client.get_collections().collections]
-            if self.collection_name not in existing:
-                logger.info(f"Creating Qdrant collection: {self.collection_name}")
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=768, distance=Distance.COSINE)
-                )
+            VectorStoreRegistry.ensure_collection(collection_name)
+            self._ready.add(collection_name)
         except Exception as e:
-            logger.exception("Failed to initialize Qdrant collection")
+            logger.exception(f"Failed to initialize Qdrant collection {collection_name}")
             raise
 
-    async def run(self, chunks: List[Dict]):
-        logger.info("Storing chunks in Qdrant")
+    @staticmethod
+    def _check_writable():
+        if QdrantClientProvider.is_read_only():
+            raise PermissionError("Vector store is read-only in this process (QDRANT_READ_ONLY=1)")
+
+    async def run(self, chunks: List[Dict], collection_name: Optional[str] = None):
+        await asyncio.to_thread(self.store, chunks, collection_name)
+
+    def store(self, chunks: List[Dict], collection_name: Optional[str] = None):
+        self._check_writable()
+        collection_name = collection_name or self.collection_name
+        logger.info(f"Storing chunks in Qdrant collection {collection_name}")
 
         if not chunks:
             raise ValueError("No chunks provided to VectorStoreAgent")
 
         try:
-            docs = [
-                Document(
-                    page_content=c["text"],
-                    metadata={"source": c["source"], "chunk_id": c["chunk_id"]}
+            self._ensure_collection(collection_name)
+
+            # Chunks already carry vectors from EmbeddingAgent: upsert them directly
+            # instead of add_documents(), which would embed every chunk a second time.
+            # Payload layout matches QdrantVectorStore so retrieval keeps working.
+            points = [
+                PointStruct(
+                    id=chunk_point_id(c["source"], c["chunk_id"]),
+                    vector=c["vector"],
+                    payload={
+                        QdrantVectorStore.CONTENT_KEY: c["text"],
+                        QdrantVectorStore.METADATA_KEY: {
+                            "source": c["source"],
+                            "chunk_id": c["chunk_id"],
+                            "path": c.get("path"),
+                            "sources": c.get("sources") or [
+                                {"source": c["source"], "chunk_id": c["chunk_id"], "path": c.get("path")}
+                            ],
+                            # Dedup keys (see DedupAgent.seed); absent with DEDUP_ENABLED=0
+                            **{key: c[key] for key in ("digest", "minhash") if key in c}
+                        }
+                    }
                 )
                 for c in chunks
             ]
 
-            self.store.add_documents(docs)
-            logger.info("Chunks successfully stored in vector DB")
+            for i in range(0, len(points), self.batch_size):
+                self.client.upsert(
+                    collection_name=collection_name,
+                    points=points[i:i + self.batch_size]
+                )
+
+            logger.info(f"{len(points)} chunks successfully stored in vector DB")
 
         except Exception as e:
             logger.exception("Failed to store vectors in Qdrant")
             raise
+
+    def set_sources(self, chunks: List[Dict], collection_name: Optional[str] = None):
+        """
+        Rewrites metadata["sources"] of already stored canonical chunks that
+        gained duplicates later in the run, one request per batch.
+        """
+        self._check_writable()
+        collection_name = collection_name or self.collection_name
+
+        operations = [
+            SetPayloadOperation(set_payload=SetPayload(
+                payload={"sources": c["sources"]},
+                key=QdrantVectorStore.METADATA_KEY,
+                points=[chunk_point_id(c["source"], c["chunk_id"])]
+            ))
+            for c in chunks
+        ]
+        for i in range(0, len(operations), self.batch_size):
+            self.client.batch_update_points(
+                collection_name=collection_name,
+                update_operations=operations[i:i + self.batch_size]
+            )
+
+    def release_sources(self, sources: List[str], collection_name: Optional[str] = None):
+        """
+        Detaches `sources` from points they share with other files, so those
+        files keep their chunks when `sources` are re-ingested or deleted:
+        - a shared point owned by one of `sources` moves to its next copy's id;
+        - references to `sources` are dropped from points owned by other files.
+        """
+        self._check_writable()
+        collection_name = collection_name or self.collection_name
+        if not sources or not VectorStoreRegistry.collection_exists(collection_name):
+            return
+
+        metadata_key = QdrantVectorStore.METADATA_KEY
+        released = set(sources)
+        owned = Filter(must=[
+            FieldCondition(key=f"{metadata_key}.source", match=MatchAny(any=list(released))),
+            FieldCondition(key=f"{metadata_key}.sources", values_count=ValuesCount(gt=1))
+        ])
+        referenced = Filter(
+            must=[FieldCondition(key=f"{metadata_key}.sources[].source", match=MatchAny(any=list(released)))],
+            must_not=[FieldCondition(key=f"{metadata_key}.source", match=MatchAny(any=list(released)))]
+        )
+
+        try:
+            for record in self._scroll(collection_name, owned, with_vectors=True):
+                metadata = record.payload[metadata_key]
+                remaining = [ref for ref in metadata["sources"] if ref["source"] not in released]
+                if remaining:
+                    owner = remaining[0]
+                    self.client.upsert(
+                        collection_name=collection_name,
+                        points=[PointStruct(
+                            id=chunk_point_id(owner["source"], owner["chunk_id"]),
+                            vector=record.vector,
+                            payload={
+                                **record.payload,
+                                metadata_key: {**metadata, **owner, "sources": remaining}
+                            }
+                        )]
+                    )
+                self.client.delete(collection_name=collection_name, points_selector=[record.id])
+
+            for record in self._scroll(collection_name, referenced):
+                metadata = record.payload[metadata_key]
+                self.client.set_payload(
+                    collection_name=collection_name,
+                    payload={"sources": [ref for ref in metadata["sources"] if ref["source"] not in released]},
+                    key=metadata_key,
+                    points=[record.id]
+                )
+
+        except Exception as e:
+            logger.exception(f"Failed to release shared points of {len(released)} source(s)")
+            raise
+
+    def dedup_seeds(self, sources: List[str], collection_name: Optional[str] = None) -> List[Dict]:
+        """
+        Stored canonical chunks to seed a DedupAgent with before re-ingesting
+        `sources`: as release_sources() will leave them, i.e. without
+        references to `sources`, owned by their next copy, and skipping points
+        only `sources` share.
+        """
+        collection_name = collection_name or self.collection_name
+        if not VectorStoreRegistry.collection_exists(collection_name):
+            return []
+
+        metadata_key = QdrantVectorStore.METADATA_KEY
+        released = set(sources)
+        has_minhash = Filter(must_not=[
+            IsEmptyCondition(is_empty=PayloadField(key=f"{metadata_key}.minhash"))
+        ])
+
+        seeds = []
+        for record in self._scroll(collection_name, has_minhash):
+            metadata = record.payload[metadata_key]
+            remaining = [ref for ref in metadata.get("sources") or [] if ref["source"] not in released]
+            if not remaining:
+                continue
+            seeds.append({
+                "source": remaining[0]["source"],
+                "chunk_id": remaining[0]["chunk_id"],
+                "sources": remaining,
+                "digest": metadata["digest"],
+                "minhash": metadata["minhash"]
+            })
+        return seeds
+
+    def _scroll(self, collection_name: str, scroll_filter: Filter, with_vectors: bool = False):
+        records, offset = [], None
+        while True:
+            batch, offset = self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=scroll_filter,
+                limit=self.batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=with_vectors
+            )
+            records.extend(batch)
+            if offset is None:
+                return records
+
+    def export_exact_index(self, collection_name: Optional[str] = None):
+        """
+        Rebuilds the collection's exact-search export after its points changed
+        (only with RETRIEVAL_ENGINE=exact).
+        """
+        if exact_engine_enabled():
+            ExactIndex.export(collection_name or self.collection_name)
+
+    def delete_source(
+        self,
+        source: str,
+        keep_chunk_ids: Optional[Iterable[int]] = None,
+        collection_name: Optional[str] = None
+    ):
+        """
+        Removes the points a file owns, except those in keep_chunk_ids (the
+        chunks just stored for it; the rest are stale). Call release_sources()
+        first if other files may share its points.
+        """
+        self._check_writable()
+        collection_name = collection_name or self.collection_name
+        keep_chunk_ids = list(keep_chunk_ids or [])
+        must_not = [
+            FieldCondition(key=f"{QdrantVectorStore.METADATA_KEY}.chunk_id", match=MatchAny(any=keep_chunk_ids))
+        ] if keep_chunk_ids else None
+
+        try:
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=FilterSelector(filter=Filter(
+                    must=[FieldCondition(key=f"{QdrantVectorStore.METADATA_KEY}.source", match=MatchValue(value=source))],
+                    must_not=must_not
+                ))
+            )
+            logger.info(f"Removed stale points for {source}" + (f" (kept {len(keep_chunk_ids)})" if keep_chunk_ids else ""))
+
+        except Exception as e:
+            logger.exception(f"Failed to delete points for {source}")
+            raise
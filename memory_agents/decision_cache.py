@@ -0,0 +1,83 @@
+import os
+import copy
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Counter
+
+from infrastructure.query_normalization import normalize_query
+from infrastructure.telemetry import record_cache_lookup
+from memory_agents.hot_memory_index import HotMemoryIndex
+
+logger = logging.getLogger("DecisionCache")
+
+DECISION_LOOKUPS = Counter(
+    "superrag_decision_cache_lookups_total",
+    "Router decision / query plan cache lookups by match: exact (normalized text), similar (embedding) or miss",
+    ["cache", "result"]
+)
+
+
+class DecisionCache:
+    """
+    Bounded in-process cache of LLM outputs that depend only on the question
+    (router decisions, query plans), not on corpus content, so they can be
+    reused across tenants, corpora and re-ingestion.
+
+    Looked up by normalized query text first, then by query embedding
+    (state["query_embedding"], computed by the Tier-1 lookup) against a
+    HotMemoryIndex of earlier questions, at `similarity_threshold`.
+    Both hold at most DECISION_CACHE_SIZE entries (least recently used evicted).
+    DECISION_CACHE_ENABLED=0 turns every cache off.
+    """
+
+    def __init__(self, name: str, similarity_threshold: float, capacity: Optional[int] = None):
+        self.name = name
+        self.similarity_threshold = similarity_threshold
+        self.capacity = capacity or int(os.getenv("DECISION_CACHE_SIZE", "5000"))
+        self.enabled = os.getenv("DECISION_CACHE_ENABLED", "1") == "1"
+        self._exact: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._index = HotMemoryIndex(self.capacity)
+
+    def _record(self, result: str):
+        DECISION_LOOKUPS.labels(cache=self.name, result=result).inc()
+        record_cache_lookup(self.name, hit=result != "miss")
+
+    def lookup(self, query: str, embedding: Optional[List[float]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Returns a copy of the cached value, or None.
+        """
+        if not self.enabled:
+            return None
+
+        key = normalize_query(query)
+        value = self._exact.get(key)
+        if value is not None:
+            self._exact.move_to_end(key)
+            self._record("exact")
+            return copy.deepcopy(value)
+
+        if embedding is not None:
+            hit = self._index.search(HotMemoryIndex.normalize(embedding))
+            if hit is not None and hit[1] >= self.similarity_threshold:
+                logger.info(f"{self.name}: reusing entry for a similar question (score {hit[1]:.3f})")
+                self._record("similar")
+                return copy.deepcopy(hit[0])
+
+        self._record("miss")
+        return None
+
+    def store(self, query: str, embedding: Optional[List[float]], value: Dict[str, Any]):
+        if not self.enabled:
+            return
+
+        key = normalize_query(query)
+        value = copy.deepcopy(value)
+        self._exact[key] = value
+        self._exact.move_to_end(key)
+        if len(self._exact) > self.capacity:
+            self._exact.popitem(last=False)
+
+        if embedding is not None:
+            self._index.add(key, HotMemoryIndex.normalize(embedding), None, value)
@@ -0,0 +1,103 @@
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("HotMemoryIndex")
+
+
+class HotMemoryIndex:
+    """
+    In-process copy of the most recently used semantic memory entries of one
+    collection: a matrix of unit-length question embeddings, so a Tier-1 check
+    is one matrix-vector product instead of a Qdrant search.
+
+    Holds at most `capacity` rows; adding beyond that evicts the least
+    recently used row (it stays in Qdrant as a cold entry). `complete` means
+    every point of the collection is in the index, so a miss here is a miss
+    in Qdrant too. float16 storage halves memory at some lookup cost (rows
+    are upcast for the product).
+    """
+
+    def __init__(self, capacity: int = 10000, dtype: str = "float32"):
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self.complete = True
+        self.size = 0
+
+        self._matrix: Optional[np.ndarray] = None  # allocated on first add, when the dimension is known
+        self._ids: List[str] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._scopes = np.zeros(0, dtype=np.int32)
+        self._last_used = np.zeros(0, dtype=np.float64)
+        self._rows: Dict[str, int] = {}
+        self._scope_codes: Dict[Optional[str], int] = {None: 0}
+
+    @staticmethod
+    def normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _scope_code(self, scope: Optional[str]) -> int:
+        if scope not in self._scope_codes:
+            self._scope_codes[scope] = len(self._scope_codes)
+        return self._scope_codes[scope]
+
+    def search(self, query_vector: np.ndarray, scope: Optional[str] = None) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Best entry with the same scope as (payload, cosine score), or None.
+        `query_vector` must already be normalized.
+        """
+        code = self._scope_codes.get(scope)
+        if not self.size or code is None:
+            return None
+
+        scores = self._matrix[:self.size].astype(np.float32, copy=False) @ query_vector
+        scores[self._scopes[:self.size] != code] = -np.inf
+        row = int(np.argmax(scores))
+        if scores[row] == -np.inf:
+            return None
+
+        self._last_used[row] = time.monotonic()
+        return self._payloads[row], float(scores[row])
+
+    def _grow(self, dim: int):
+        # Doubles the allocation up to capacity, so small collections stay small
+        rows = min(self.capacity, max(256, 2 * len(self._scopes)))
+        matrix = np.zeros((rows, dim), dtype=self.dtype)
+        if self._matrix is not None:
+            matrix[:self.size] = self._matrix[:self.size]
+        self._matrix = matrix
+        self._scopes = np.resize(self._scopes, rows)
+        self._last_used = np.resize(self._last_used, rows)
+
+    def add(self, point_id: str, vector: np.ndarray, scope: Optional[str], payload: Dict[str, Any]):
+        """
+        Inserts or replaces an entry. `vector` must already be normalized.
+        """
+        row = self._rows.get(point_id)
+        if row is None:
+            if self.size < self.capacity:
+                if self._matrix is None or self.size == len(self._matrix):
+                    self._grow(len(vector))
+                row = self.size
+                self.size += 1
+                self._ids.append(point_id)
+                self._payloads.append(payload)
+            else:
+                row = int(np.argmin(self._last_used[:self.size]))
+                del self._rows[self._ids[row]]
+                self._ids[row] = point_id
+                self.complete = False
+
+        self._matrix[row] = vector
+        self._payloads[row] = payload
+        self._scopes[row] = self._scope_code(scope)
+        self._last_used[row] = time.monotonic()
+        self._rows[point_id] = row
+
+    @property
+    def nbytes(self) -> int:
+        return 0 if self._matrix is None else self._matrix[:self.size].nbytes
@@ -0,0 +1,258 @@
+"""
+Offline answer precomputation: runs anticipated or historically frequent
+questions through the full pipeline so their answers are in semantic memory
+(chat_history_cache / the tenant's memory collection) before traffic arrives.
+
+    python -m memory_agents.memory_precompute --questions "logs/app.log*" --top 500 --concurrency 4
+    python -m memory_agents.memory_precompute --questions faq.txt --progress precompute_faq.jsonl
+
+Questions come from app logs / JSONL (see infrastructure/query_log.py) or a
+plain text file with one question per line. Run it against the writer
+process's storage (not a read-only snapshot); while the API is serving from
+an embedded QDRANT_PATH, use POST /memory/precompute instead, which runs the
+same job inside the API process.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import asyncio
+import logging
+import argparse
+from uuid import uuid4
+from typing import Any, Dict, List, Optional
+
+from infrastructure.llm_scheduler import LLMOverloadedError, batch_priority
+from infrastructure.query_log import load_queries
+from infrastructure.query_normalization import normalize_query
+
+logger = logging.getLogger("MemoryPrecompute")
+
+# Entries with these statuses are not run again on resume
+_DONE = ("stored", "cached")
+
+
+def load_questions(
+    patterns: List[str],
+    entries: Optional[List[Dict[str, Any]]] = None,
+    top: Optional[int] = None,
+    min_count: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Unique questions (by normalized text, per tenant / corpora), most frequent
+    first: [{"key", "query", "tenant", "corpora", "count"}]. Patterns may be
+    globs; ".txt" files are one question per line, anything else goes through
+    load_queries. `entries` adds questions given directly ({"query",
+    optional "tenant" / "corpora"}).
+    """
+    entries = list(entries or [])
+    paths = sorted({path for pattern in patterns for path in (glob.glob(pattern) or [pattern])})
+    for path in paths:
+        if path.endswith(".txt"):
+            with open(path, encoding="utf-8") as f:
+                entries.extend({"query": line.strip()} for line in f if line.strip())
+        else:
+            entries.extend(load_queries([path]))
+
+    questions: Dict[str, Dict[str, Any]] = {}
+    for entry in entries:
+        corpora = sorted(entry.get("corpora") or [])
+        key = json.dumps([normalize_query(entry["query"]), entry.get("tenant"), corpora])
+        question = questions.setdefault(key, {
+            "key": key,
+            "query": entry["query"],
+            "tenant": entry.get("tenant"),
+            "corpora": corpora or None,
+            "count": 0
+        })
+        question["count"] += int(entry.get("count", 1))
+
+    ranked = sorted(questions.values(), key=lambda q: -q["count"])
+    ranked = [q for q in ranked if q["count"] >= min_count]
+    return ranked[:top] if top else ranked
+
+
+class MemoryPrecomputeJob:
+    """
+    Runs questions through OrchestratorAgent with bounded concurrency; the
+    orchestrator's own Tier-1 store puts each answer in semantic memory.
+    LLM calls queue at the scheduler's "batch" priority, so live requests
+    always go first; a full queue (LLMOverloadedError) pauses and retries.
+
+    Progress is appended to a JSONL file, one line per finished question;
+    a rerun with the same file skips questions already stored or found
+    cached, and retries failed and not_stored ones (answered but not put in
+    memory: degraded by a latency budget, or the memory write failed).
+    """
+
+    def __init__(self, orchestrator, concurrency: int = 4, progress_path: Optional[str] = None, max_retries: int = 5):
+        self.orchestrator = orchestrator
+        self.concurrency = concurrency
+        self.progress_path = progress_path
+        self.max_retries = max_retries
+        self.status: Dict[str, Any] = {"state": "pending", "done": 0, "total": 0}
+
+    def _load_progress(self) -> Dict[str, Dict[str, Any]]:
+        if not self.progress_path or not os.path.exists(self.progress_path):
+            return {}
+        progress = {}
+        with open(self.progress_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    progress[entry["key"]] = entry  # the last line per question wins
+        return progress
+
+    def _append_progress(self, entry: Dict[str, Any]):
+        if not self.progress_path:
+            return
+        os.makedirs(os.path.dirname(self.progress_path) or ".", exist_ok=True)
+        with open(self.progress_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    async def _answer(self, question: Dict[str, Any]) -> Dict[str, Any]:
+        state = {
+            "request_id": f"precompute-{uuid4()}",
+            "query": question["query"],
+            "tenant": question.get("tenant"),
+            "corpora": question.get("corpora")
+        }
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            try:
+                with batch_priority():
+                    result = await self.orchestrator.run(dict(state))
+                break
+            except LLMOverloadedError as e:
+                if attempt == self.max_retries:
+                    return {"status": "failed", "error": str(e)}
+                logger.info(f"LLM queues full, pausing {e.retry_after:.0f}s")
+                await asyncio.sleep(max(e.retry_after, 1.0))
+            except ValueError as e:  # unknown tenant / corpus
+                return {"status": "failed", "error": str(e)}
+
+        if result.get("semantic_hit"):
+            status = "cached"
+        elif result.get("error") or not result.get("final_answer"):
+            status = "failed"
+        elif result.get("memory_stored"):
+            status = "stored"
+        else:
+            status = "not_stored"  # degraded to fit a latency budget, or the memory write failed
+
+        return {
+            "status": status,
+            "tier": (result.get("timings") or {}).get("tier"),
+            "seconds": round(time.perf_counter() - start, 2),
+            "cost_usd": ((result.get("usage") or {}).get("totals") or {}).get("cost_usd", 0.0),
+            "degradations": result.get("degradations"),
+            "error": result.get("error")
+        }
+
+    async def run(self, questions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        from infrastructure.qdrant_client import QdrantClientProvider
+
+        if QdrantClientProvider.is_read_only():
+            raise RuntimeError("Precomputation needs a writable Qdrant; this process serves a read-only snapshot")
+
+        progress = self._load_progress()
+        pending = [q for q in questions if progress.get(q["key"], {}).get("status") not in _DONE]
+        self.status = {
+            "state": "running",
+            "total": len(questions),
+            "done": len(questions) - len(pending),
+            "resumed": len(questions) - len(pending)
+        }
+        logger.info(f"Precomputing {len(pending)} of {len(questions)} questions ({self.status['resumed']} done earlier)")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(question: Dict[str, Any]):
+            async with semaphore:
+                outcome = await self._answer(question)
+            entry = {"key": question["key"], "query": question["query"], "count": question["count"], **outcome}
+            progress[question["key"]] = entry
+            self._append_progress(entry)
+            self.status["done"] += 1
+            if outcome["status"] == "failed":
+                logger.warning(f"Precompute failed for {question['query']!r}: {outcome.get('error')}")
+            elif outcome["status"] == "not_stored":
+                logger.warning(
+                    f"Answer for {question['query']!r} was not stored in memory "
+                    f"(degradations: {outcome.get('degradations') or 'none'})"
+                )
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(q) for q in pending))
+
+        report = self.report(questions, progress)
+        report["seconds"] = round(time.perf_counter() - started, 2)
+        self.status = {"state": "finished", **report}
+        return report
+
+    @staticmethod
+    def report(questions: List[Dict[str, Any]], progress: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        coverage: share of the questions with an answer in memory.
+        expected_tier1_hit_rate: the same weighted by how often each question
+        was asked (equal to coverage for plain question lists); an upper bound
+        for the same traffic mix, as paraphrases must also clear the Tier-1
+        similarity threshold.
+        """
+        statuses: Dict[str, int] = {}
+        covered_weight = total_weight = 0
+        cost = 0.0
+        for q in questions:
+            entry = progress.get(q["key"], {})
+            status = entry.get("status", "pending")
+            statuses[status] = statuses.get(status, 0) + 1
+            total_weight += q["count"]
+            if status in _DONE:
+                covered_weight += q["count"]
+            cost += entry.get("cost_usd") or 0.0
+
+        covered = statuses.get("stored", 0) + statuses.get("cached", 0)
+        return {
+            "questions": len(questions),
+            "statuses": statuses,
+            "coverage": round(covered / len(questions), 4) if questions else 0.0,
+            "expected_tier1_hit_rate": round(covered_weight / total_weight, 4) if total_weight else 0.0,
+            "cost_usd": round(cost, 4)
+        }
+
+
+async def main(args) -> int:
+    from orchestrator_agent import OrchestratorAgent
+
+    questions = load_questions(args.questions, top=args.top, min_count=args.min_count)
+    if not questions:
+        print("No questions found")
+        return 1
+
+    job = MemoryPrecomputeJob(OrchestratorAgent(), concurrency=args.concurrency, progress_path=args.progress)
+    report = await job.run(questions)
+    print(json.dumps(report, indent=2))
+    return 0 if not report["statuses"].get("failed") else 2
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute answers into semantic memory")
+    parser.add_argument("--questions", nargs="+", required=True, help="Question files: .txt, .jsonl or app logs (globs)")
+    parser.add_argument("--top", type=int, help="Only the N most frequent questions")
+    parser.add_argument("--min-count", type=int, default=1, help="Only questions asked at least this often")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("PRECOMPUTE_CONCURRENCY", "4")))
+    parser.add_argument("--progress", default="./precompute_progress.jsonl", help="Resumable progress file")
+    parser.add_argument("--log-level", default="INFO")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    from infrastructure.logging_config import configure_logging, shutdown_logging
+    configure_logging(level=args.log_level)
+    try:
+        code = asyncio.run(main(args))
+    finally:
+        shutdown_logging()
+    sys.exit(code)
@@ -1,48 +1,158 @@
+import os
+import uuid
+import asyncio
 import logging
-from qdrant_client.http.models import Distance, VectorParams
+from typing import Dict, List, Optional
+from qdrant_client.http.models import (
+    FieldCondition, Filter, IsEmptyCondition, MatchValue, PayloadField, PointStruct
+)
 from langchain_qdrant import QdrantVectorStore
-from langchain_core.documents import Document
+from prometheus_client import Counter
 
 from infrastructure.qdrant_client import QdrantClientProvider
 from infrastructure.embedding_client import EmbeddingClientProvider
+from infrastructure.corpora import (
+    DEFAULT_TENANT, LEGACY_MEMORY_COLLECTION, VectorStoreRegistry, memory_collection, resolve_collections
+)
+from memory_agents.hot_memory_index import HotMemoryIndex
 
 logger = logging.getLogger("SemanticMemoryAgent")
 
+SIMILARITY_THRESHOLD = 0.75
+
+MEMORY_LOOKUPS = Counter(
+    "superrag_semantic_memory_lookups_total",
+    "Tier-1 lookups by where they were answered: hot (in-process index), qdrant (cold entry) or miss",
+    ["path"]
+)
+
 
 class SemanticMemoryAgent:
     """
     Tier-1 semantic memory.
     Stores and retrieves past Q&A pairs using vector similarity.
+
+    Each tenant has its own memory collection. Answers produced from a
+    non-default corpus selection are tagged with it (metadata.scope) and
+    only served to requests searching the same corpora.
+
+    Lookups check a HotMemoryIndex of the collection first (loaded from
+    Qdrant on first use, kept in sync by store()) and only search Qdrant for
+    cold entries, i.e. when the index had to evict. The query embedding is
+    left in state["query_embedding"] for the retrieval agents. On read-only
+    snapshot workers, an index is reloaded once a newer snapshot (with the
+    writer's new entries) has been swapped in.
     """
 
-    def __init__(self, collection_name: str = "chat_history_cache"):
-        # Use shared infrastructure (NO direct instantiation)
+    def __init__(self, collection_name: str = LEGACY_MEMORY_COLLECTION):
+        # Default tenant's collection; created on first store (or by warmup)
         self.collection_name = collection_name
-        self.qdrant_client = QdrantClientProvider.get_client()
-        self.embeddings = EmbeddingClientProvider.get_embeddings()
-
-        # Ensure collection exists (important!)
-        self._ensure_collection()
+        self.hot_capacity = int(os.getenv("HOT_MEMORY_SIZE", "10000"))
+        self.hot_dtype = os.getenv("HOT_MEMORY_DTYPE", "float32")
+        self._hot: Dict[str, HotMemoryIndex] = {}
+        self._hot_versions: Dict[str, Optional[str]] = {}  # snapshot version each index was loaded from
+        self._hot_locks: Dict[str, asyncio.Lock] = {}
+
+    def _collection_for(self, state: dict) -> str:
+        tenant = state.get("tenant")
+        if not tenant or tenant == DEFAULT_TENANT:
+            return self.collection_name
+        return memory_collection(tenant)
+
+    @staticmethod
+    def _scope(state: dict) -> Optional[str]:
+        collections = state.get("collections")
+        if not collections or collections == resolve_collections(state.get("tenant")):
+            return None
+        return ",".join(sorted(collections))
+
+    @staticmethod
+    def _scope_filter(scope: Optional[str]) -> Filter:
+        key = f"{QdrantVectorStore.METADATA_KEY}.scope"
+        if scope is None:
+            return Filter(must=[IsEmptyCondition(is_empty=PayloadField(key=key))])
+        return Filter(must=[FieldCondition(key=key, match=MatchValue(value=scope))])
+
+    @staticmethod
+    async def query_embedding(state: dict) -> List[float]:
+        if state.get("query_embedding") is None:
+            embeddings = EmbeddingClientProvider.get_embeddings()
+            state["query_embedding"] = await asyncio.to_thread(embeddings.embed_query, state["query"])
+        return state["query_embedding"]
+
+    def _load_hot_index(self, collection_name: str) -> HotMemoryIndex:
+        index = HotMemoryIndex(self.hot_capacity, self.hot_dtype)
+        client = QdrantClientProvider.get_client()
+        if not client.collection_exists(collection_name):
+            return index
+
+        offset = None
+        while True:
+            records, offset = client.scroll(
+                collection_name=collection_name,
+                limit=min(1024, self.hot_capacity + 1),
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            for record in records:
+                if index.size == self.hot_capacity:
+                    index.complete = False
+                    break
+                metadata = record.payload.get(QdrantVectorStore.METADATA_KEY) or {}
+                index.add(str(record.id), HotMemoryIndex.normalize(record.vector), metadata.get("scope"), metadata)
+            if offset is None or not index.complete:
+                break
+
+        # Other processes can write to a shared Qdrant server behind our back
+        if os.getenv("QDRANT_URL"):
+            index.complete = False
+
+        logger.info(
+            f"Loaded {index.size} semantic memory entries of {collection_name} "
+            f"({index.nbytes / 1e6:.1f} MB, {'complete' if index.complete else 'partial'})"
+        )
+        return index
 
-        # Vector store for semantic cache
-        self.memory_store = QdrantVectorStore(
-            client=self.qdrant_client,
-            collection_name=self.collection_name,
-            embedding=self.embeddings
+    def _is_current(self, collection_name: str) -> bool:
+        return (
+            collection_name in self._hot
+            and self._hot_versions.get(collection_name) == QdrantClientProvider.snapshot_version()
         )
-    def _ensure_collection(self):
-        try:
-            existing = [c.name for c in self.qdrant_client.get_collections().collections]
-
-            if self.collection_name not in existing:
-                logger.info(f"Creating Qdrant collection for Semantic Memory: {self.collection_name}")
-                self.qdrant_client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=768, distance=Distance.COSINE),
-                )
-        except Exception:
-            logger.exception("Failed to initialize Semantic Memory collection")
-            raise
+
+    async def _hot_index(self, collection_name: str) -> HotMemoryIndex:
+        if not self._is_current(collection_name):
+            lock = self._hot_locks.setdefault(collection_name, asyncio.Lock())
+            async with lock:
+                if not self._is_current(collection_name):
+                    version = QdrantClientProvider.snapshot_version()
+                    self._hot[collection_name] = await asyncio.to_thread(self._load_hot_index, collection_name)
+                    self._hot_versions[collection_name] = version
+        return self._hot[collection_name]
+
+    def _search_cold(self, collection_name: str, vector: List[float], scope: Optional[str]):
+        client = QdrantClientProvider.get_client()
+        if not client.collection_exists(collection_name):
+            return None
+        points = client.query_points(
+            collection_name=collection_name,
+            query=vector,
+            query_filter=self._scope_filter(scope),
+            limit=1,
+            with_payload=True,
+            with_vectors=True
+        ).points
+        return points[0] if points else None
+
+    def _hit(self, state: dict, metadata: dict, score: float, path: str) -> dict:
+        logger.info(f"[{state.get('request_id', 'NA')}] Semantic memory HIT ({path}, score {score:.4f})")
+        MEMORY_LOOKUPS.labels(path=path).inc()
+        state["semantic_hit"] = True
+        state["semantic_score"] = score
+        state["final_answer"] = metadata.get("answer")
+        state["mode"] = "Semantic Memory (Tier-1)"
+        return state
+
     async def lookup(self, state: dict) -> dict:
         request_id = state.get("request_id", "NA")
         query = state["query"]
@@ -50,21 +160,29 @@ class SemanticMemoryAgent:
         logger.info(f"[{request_id}] SemanticMemory lookup started for: '{query}'")
 
         try:
-            results = self.memory_store.similarity_search_with_score(query, k=1)
-
-            if results:
-                doc, score = results[0]
+            collection_name = self._collection_for(state)
+            scope = self._scope(state)
+            vector = await self.query_embedding(state)
+            index = await self._hot_index(collection_name)
+
+            # 1. Hot entries: one matrix-vector product, no Qdrant I/O
+            best = index.search(HotMemoryIndex.normalize(vector), scope)
+            if best is not None:
+                metadata, score = best
                 logger.info(f"[{request_id}] Semantic candidate found with score {score:.4f}")
+                if score > SIMILARITY_THRESHOLD:
+                    return self._hit(state, metadata, score, "hot")
 
-                if score > 0.75:  # similarity threshold
-                    logger.info(f"[{request_id}] Semantic memory HIT")
-                    state["semantic_hit"] = True
-                    state["semantic_score"] = score
-                    state["final_answer"] = doc.metadata.get("answer")
-                    state["mode"] = "Semantic Memory (Tier-1)"
-                    return state
+            # 2. Cold entries only exist once the hot index has evicted
+            if not index.complete:
+                point = await asyncio.to_thread(self._search_cold, collection_name, vector, scope)
+                if point is not None and point.score > SIMILARITY_THRESHOLD:
+                    metadata = point.payload.get(QdrantVectorStore.METADATA_KEY) or {}
+                    index.add(str(point.id), HotMemoryIndex.normalize(point.vector), scope, metadata)
+                    return self._hit(state, metadata, point.score, "qdrant")
 
             logger.info(f"[{request_id}] Semantic memory MISS")
+            MEMORY_LOOKUPS.labels(path="miss").inc()
             state["semantic_hit"] = False
             return state
 
@@ -74,6 +192,9 @@ class SemanticMemoryAgent:
             return state
 
     async def store(self, state: dict) -> dict:
+        """
+        Sets state["memory_stored"] once the answer is in memory.
+        """
         request_id = state.get("request_id", "NA")
 
         try:
@@ -83,15 +204,36 @@ class SemanticMemoryAgent:
             if not answer:
                 return state
 
-            doc = Document(
-                page_content=query,  # we vectorize the QUESTION
-                metadata={
-                    "answer": answer,
-                    "mode": state.get("mode", "Super RAG")
-                }
+            if QdrantClientProvider.is_read_only():
+                return state  # a snapshot worker's writes would not be shared
+
+            metadata = {
+                "answer": answer,
+                "mode": state.get("mode", "Super RAG")
+            }
+            scope = self._scope(state)
+            if scope is not None:
+                metadata["scope"] = scope
+
+            # We vectorize the QUESTION; reuse the lookup's embedding instead of embedding again
+            vector = await self.query_embedding(state)
+            collection_name = self._collection_for(state)
+            point_id = str(uuid.uuid4())
+
+            await asyncio.to_thread(VectorStoreRegistry.get_store, collection_name, True)  # creates it once
+            await asyncio.to_thread(
+                QdrantClientProvider.get_client().upsert,
+                collection_name=collection_name,
+                points=[PointStruct(
+                    id=point_id,
+                    vector=vector,
+                    payload={QdrantVectorStore.CONTENT_KEY: query, QdrantVectorStore.METADATA_KEY: metadata}
+                )]
             )
 
-            self.memory_store.add_documents([doc])
+            index = await self._hot_index(collection_name)
+            index.add(point_id, HotMemoryIndex.normalize(vector), scope, metadata)
+            state["memory_stored"] = True
 
             logger.info(f"[{request_id}] Stored Q&A in Semantic Memory")
 
@@ -1,5 +1,8 @@
-
+import os
+import copy
+import time
 import logging
+from typing import Optional
 
 from routing_agents.router_agent import RouterAgent
 from rag_agents.simple_rag_agent import SimpleRAGAgent
@@ -10,6 +13,18 @@ from reasoning_agents.analyst_agent import AnalystAgent
 from grounding_agents.citation_agent import CitationAgent
 from reasoning_agents.response_formatter_agent import ResponseFormatterAgent
 from memory_agents.semantic_memory_agent import SemanticMemoryAgent
+from infrastructure.telemetry import (
+    span, start_trace, finish_trace, record_cache_lookup, record_error, record_cascade_decision,
+    record_coalesced, record_span
+)
+from infrastructure.corpora import resolve_collections
+from infrastructure.embedding_client import EmbeddingClientProvider
+from infrastructure.latency_budget import LatencyBudget, StageEstimates, parse_budget
+from infrastructure.llm_client import LLMClientProvider
+from infrastructure.llm_scheduler import LLMOverloadedError
+from infrastructure.query_normalization import normalize_query
+from infrastructure.single_flight import SingleFlight
+from infrastructure.usage import start_request_usage, finish_request_usage
 
 logger = logging.getLogger("OrchestratorAgent")
 
@@ -21,9 +36,50 @@ class OrchestratorAgent:
     - Tier 1: Semantic Memory
     - Tier 2: Simple RAG
     - Tier 3: Agentic Super RAG
+
+    ROUTING_MODE selects how Tier-2 vs Tier-3 is decided:
+    - router  : RouterAgent LLM classification up front (default)
+    - cascade : no router call; Tier-2 retrieval runs first and the request
+                escalates to Tier-3 only on weak evidence (low top score,
+                results spread over many documents, or the Tier-2 answer
+                reporting insufficient context). Retrieved chunks are reused
+                by DocumentHunterAgent.
+
+    Concurrent requests for the same normalized query are coalesced
+    (COALESCE_REQUESTS=1, default): followers await the leader's pipeline
+    run instead of starting their own. COALESCE_SIMILARITY_THRESHOLD also
+    coalesces near-identical queries by embedding similarity. Only requests
+    for the same tenant and corpora are coalesced with each other, and
+    requests with their own latency budget are not coalesced.
+
+    state["tenant"] / state["corpora"] select the collections searched
+    (state["collections"]); both default to the original single corpus.
+
+    state["latency_budget"] (seconds, else LATENCY_BUDGET_SECONDS; unset
+    means no budget) bounds a request's pipeline run. Before each optional
+    Tier-3 stage the remaining budget is checked against the stages' recent
+    durations, and the request degrades instead of running late, in this
+    order: skip CitationAgent, skip the formatter (the analyst's conclusion
+    is the answer), and run the analyst and citation on the fast model.
+    state["degradations"] lists what was applied, along with agents' own
+    (map_parts_failed); degraded answers are not stored in semantic memory.
     """
 
     def __init__(self):
+        self.routing_mode = os.getenv("ROUTING_MODE", "router").lower()
+        self.cascade_min_top_score = float(os.getenv("CASCADE_MIN_TOP_SCORE", "0.55"))
+        self.cascade_max_sources = int(os.getenv("CASCADE_MAX_SOURCES", "2"))
+        self.cascade_retrieval_k = int(os.getenv("CASCADE_RETRIEVAL_K", "10"))
+
+        self.coalesce_requests = os.getenv("COALESCE_REQUESTS", "1") == "1"
+        similarity_threshold = os.getenv("COALESCE_SIMILARITY_THRESHOLD")
+        self.coalesce_similarity_threshold = float(similarity_threshold) if similarity_threshold else None
+        self.single_flights = {}  # one per tenant/corpora scope
+
+        self.latency_budget = parse_budget(os.getenv("LATENCY_BUDGET_SECONDS"))
+        self.stage_estimates = StageEstimates()
+        self.fast_analyst_model = LLMClientProvider.get_fast_analyst_model()
+
         self.semantic_memory = SemanticMemoryAgent()
         self.router = RouterAgent()
         self.simple_rag = SimpleRAGAgent()
@@ -36,46 +92,243 @@ class OrchestratorAgent:
         self.citation = CitationAgent()
         self.formatter = ResponseFormatterAgent()
 
+    async def _run_agent(self, name: str, step, state: dict, stage: Optional[str] = None) -> dict:
+        """
+        Runs one agent step inside a trace span.
+        Agents report failures via state["error"] instead of raising,
+        so a newly set error is counted here. Successful runs of a `stage`
+        feed the latency budget's duration estimates.
+        """
+        error_before = state.get("error")
+        start = time.perf_counter()
+
+        with span(name, kind="agent"):
+            state = await step(state)
+
+        if state.get("error") and state.get("error") != error_before:
+            record_error("agent", name)
+        elif stage:
+            self.stage_estimates.observe(stage, time.perf_counter() - start)
+
+        return state
+
+    async def _run_super_rag(self, state: dict, budget: Optional[LatencyBudget]) -> dict:
+        """
+        Tier-3 pipeline. With a budget, optional work is dropped when the
+        remaining time won't cover the stages still ahead.
+        """
+        state = await self._run_agent("planner", self.planner.run, state)
+        state = await self._run_agent("hunter", self.hunter.run, state)
+
+        # Decided before the loader: the context cache is created for the analyst's model
+        fast = ""
+        if budget and not budget.fits("context_loader", "analyst"):
+            budget.degrade("analyst_fast_model")
+            state["analyst_model"] = self.fast_analyst_model
+            fast = "_flash"
+
+        state = await self._run_agent("context_loader", self.context_loader.run, state, stage="context_loader")
+        state = await self._run_agent("analyst", self.analyst.run, state, stage=f"analyst{fast}")
+
+        if budget and state.get("analysis_json") and not budget.fits(f"citation{fast}", "formatter"):
+            budget.degrade("skip_citation")
+            state.pop("context_parts", None)
+        else:
+            state = await self._run_agent("citation", self.citation.run, state, stage=f"citation{fast}")
+
+        if budget and state.get("analysis_json") and not budget.fits("formatter"):
+            budget.degrade("skip_formatter")  # final_answer stays the analyst's final_conclusion
+        else:
+            state = await self._run_agent("formatter", self.formatter.run, state, stage="formatter")
+
+        return state
+
+    def _weak_evidence(self, chunks: list) -> Optional[str]:
+        """
+        Returns the escalation reason if retrieval alone looks too weak
+        for a Tier-2 answer, else None.
+        """
+        if not chunks:
+            return None  # nothing to reason over in Tier-3 either
+
+        top_score = max(c["score"] for c in chunks)
+        if top_score < self.cascade_min_top_score:
+            return f"low_score ({top_score:.3f} < {self.cascade_min_top_score})"
+
+        answer_sources = {c["source"] for c in chunks[:self.simple_rag.k] if c["source"]}
+        if len(answer_sources) > self.cascade_max_sources:
+            return f"source_spread ({len(answer_sources)} > {self.cascade_max_sources} documents)"
+
+        return None
+
+    async def _cascade_tier2(self, state: dict) -> dict:
+        """
+        Tier-2 first: retrieve, check the evidence, answer, and check the
+        answer. Sets state["intent"] to SIMPLE_LOOKUP when Tier-2 answered,
+        COMPLEX_REASONING when the request must escalate.
+        """
+        request_id = state.get("request_id", "NA")
+        state["cascade"] = True
+        state["routing_reason"] = "cascade"
+
+        state = await self._run_agent(
+            "simple_rag_retrieve",
+            lambda s: self.simple_rag.retrieve(s, k=self.cascade_retrieval_k),
+            state
+        )
+        if state.get("error") or not state.get("retrieved_chunks"):
+            state["intent"] = "SIMPLE_LOOKUP"
+            record_cascade_decision("tier2")
+            return state
+
+        reason = self._weak_evidence(state["retrieved_chunks"])
+        if reason is None:
+            logger.info(f"[{request_id}] Cascade: evidence looks sufficient, answering at Tier-2")
+            state = await self._run_agent("simple_rag", self.simple_rag.answer, state)
+            if state.get("rag_insufficient"):
+                reason = "insufficient_answer"
+
+        if reason is None:
+            state["intent"] = "SIMPLE_LOOKUP"
+            record_cascade_decision("tier2")
+            return state
+
+        logger.info(f"[{request_id}] Cascade: escalating to Tier-3 ({reason})")
+        state["intent"] = "COMPLEX_REASONING"
+        state["escalation_reason"] = reason
+        record_cascade_decision(f"escalated_{reason.split(' ')[0]}")
+        return state
+
+    def _single_flight(self, scope: str) -> SingleFlight:
+        if scope not in self.single_flights:
+            self.single_flights[scope] = SingleFlight(
+                similarity_threshold=self.coalesce_similarity_threshold,
+                embed_fn=lambda text: EmbeddingClientProvider.get_embeddings().embed_query(text)
+            )
+        return self.single_flights[scope]
+
     async def run(self, state: dict) -> dict:
+        """
+        Raises ValueError for invalid tenant / corpus names.
+        """
+        if not state.get("collections"):
+            state["collections"] = resolve_collections(state.get("tenant"), state.get("corpora"))
+
+        # A request's own latency budget gives it its own pipeline run (and degradations);
+        # requests under the LATENCY_BUDGET_SECONDS default all share one budget
+        if not self.coalesce_requests or state.get("latency_budget"):
+            return await self._run_pipeline(state)
+
+        request_id = state.get("request_id", "NA")
+        key = normalize_query(state["query"])
+        single_flight = self._single_flight(",".join(state["collections"]))
+
+        started = time.perf_counter()
+        result, match = await single_flight.run(key, state["query"], lambda: self._run_pipeline(state))
+        if match is None:
+            return result
+
+        # Follower: answer with a copy of the leader's result under our own request_id.
+        # The leader's LLM usage and spans stay its own; the follower only waited.
+        logger.info(f"[{request_id}] Coalesced with in-flight request {result.get('request_id')} ({match})")
+        record_coalesced(match)
+
+        trace = start_trace(request_id)
+        trace.started = started
+        record_span("single_flight", "coalesced", started, time.perf_counter() - started)
+
+        follower_state = copy.deepcopy(result)
+        follower_state.update({
+            "request_id": request_id,
+            "query": state["query"],
+            "coalesced": True,
+            "coalesced_with": result.get("request_id"),
+            "timings": finish_trace(trace, "coalesced"),
+            "usage": finish_request_usage(start_request_usage(), "coalesced")
+        })
+        return follower_state
+
+    async def _run_pipeline(self, state: dict) -> dict:
         
         request_id = state.get("request_id", "NA")
+        trace = start_trace(request_id)
+        usage = start_request_usage()
+        tier = "error"
+
+        seconds = state.get("latency_budget") or self.latency_budget
+        budget = LatencyBudget(seconds, self.stage_estimates, request_id) if seconds else None
+        if budget:
+            # Agents add their own degradations (e.g. failed map parts) to the same list
+            state["degradations"] = budget.degradations
 
         logger.info(f"[{request_id}] Orchestration started for query: {state['query']}")
 
         try:
             # ---------- Tier 1: Semantic Memory ----------
-            state = await self.semantic_memory.lookup(state)
+            state = await self._run_agent("semantic_memory_lookup", self.semantic_memory.lookup, state)
+            record_cache_lookup("semantic_memory", hit=bool(state.get("semantic_hit")))
             if state.get("semantic_hit"):
                 logger.info(f"[{request_id}] Served from Semantic Memory (Tier-1)")
+                tier = "tier1"
                 return state
 
+            # ---------- Admission control (Tier-2/3 need LLM capacity) ----------
+            # Only the models routing / Tier-2 call; Tier-3 models are checked on escalation
+            scheduler = LLMClientProvider.get_scheduler()
+            if self.routing_mode == "cascade":
+                scheduler.check_admission(self.simple_rag.model)
+            else:
+                scheduler.check_admission(self.router.model, self.simple_rag.model)
+
             # ---------- Routing ----------
-            state = await self.router.run(state)
-            intent = state.get("intent")
+            if self.routing_mode == "cascade":
+                state = await self._cascade_tier2(state)
+                intent = state.get("intent")
+                if intent == "SIMPLE_LOOKUP":
+                    tier = "tier2"
+            else:
+                state = await self._run_agent("router", self.router.run, state)
+                intent = state.get("intent")
 
-            # ---------- Tier 2: Simple RAG ----------
-            if intent == "SIMPLE_LOOKUP":
-                logger.info(f"[{request_id}] Routing to SimpleRAGAgent (Tier-2)")
-                state = await self.simple_rag.run(state)
+                # ---------- Tier 2: Simple RAG ----------
+                if intent == "SIMPLE_LOOKUP":
+                    logger.info(f"[{request_id}] Routing to SimpleRAGAgent (Tier-2)")
+                    state = await self._run_agent("simple_rag", self.simple_rag.run, state)
+                    tier = "tier2"
 
             # ---------- Tier 3: Super RAG ----------
-            else:
+            if intent != "SIMPLE_LOOKUP":
                 logger.info(f"[{request_id}] Routing to Super RAG Agentic Pipeline (Tier-3)")
+                tier = "tier3"
 
-                state = await self.planner.run(state)
-                state = await self.hunter.run(state)
-                state = await self.context_loader.run(state)
-                state = await self.analyst.run(state)
-                state = await self.citation.run(state)
-                state = await self.formatter.run(state)
+                scheduler.check_admission(self.planner.model, self.analyst.model, self.formatter.model)
+                state = await self._run_super_rag(state, budget)
 
             # ---------- Store in Semantic Memory ----------
-            state = await self.semantic_memory.store(state)
+            # Degraded answers are not reused: later requests should get the full pipeline
+            if state.get("degradations"):
+                logger.info(f"[{request_id}] Not storing degraded answer in Semantic Memory")
+            else:
+                state = await self._run_agent("semantic_memory_store", self.semantic_memory.store, state)
 
             logger.info(f"[{request_id}] Orchestration completed successfully")
             return state
 
+        except LLMOverloadedError as e:
+            logger.warning(f"[{request_id}] Rejected: {e}")
+            tier = "rejected"
+            raise
+
         except Exception as e:
             logger.exception(f"[{request_id}] Orchestration failed")
+            record_error("orchestrator", "run")
             state["error"] = str(e)
+            tier = "error"
             return state
+
+        finally:
+            if budget:
+                state["latency_budget"] = budget.seconds
+                state["degradations"] = budget.degradations
+            state["timings"] = finish_trace(trace, tier)
+            state["usage"] = finish_request_usage(usage, tier)
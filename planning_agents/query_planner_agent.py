@@ -1,8 +1,13 @@
+import os
 import logging
 
 from google.genai import types
-import json
 from infrastructure.llm_client import LLMClientProvider
+from infrastructure.llm_scheduler import LLMOverloadedError
+from infrastructure.logging_config import log_payload
+from infrastructure.structured_output import generate_structured
+from memory_agents.decision_cache import DecisionCache
+from state import QueryPlan
 
 logger = logging.getLogger("QueryPlannerAgent")
 
@@ -13,11 +18,26 @@ class QueryPlannerAgent:
     - Required information
     - Reasoning steps
     - Retrieval hints
+
+    Plans are reused for the same or a near-identical question
+    (PLAN_CACHE_SIMILARITY_THRESHOLD, see DecisionCache). The threshold is
+    higher than the router's: a plan names the question's entities, so a
+    paraphrase about a different role must not reuse it.
     """
 
     def __init__(self):
-        self.client = LLMClientProvider.get_client()
         self.model = LLMClientProvider.get_planner_model()
+        self.cache = DecisionCache(
+            "query_plan",
+            similarity_threshold=float(os.getenv("PLAN_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+        )
+
+    @staticmethod
+    def _apply(state: dict, plan: QueryPlan):
+        state["entities"] = plan.entities
+        state["required_attributes"] = plan.required_attributes
+        state["plan_steps"] = plan.reasoning_steps
+        state["document_hints"] = plan.document_hints
 
     async def run(self, state: dict) -> dict:
         request_id = state.get("request_id", "NA")
@@ -25,6 +45,13 @@ class QueryPlannerAgent:
 
         logger.info(f"[{request_id}] Planner (LLM) analyzing query")
 
+        cached = self.cache.lookup(query, state.get("query_embedding"))
+        if cached is not None:
+            self._apply(state, QueryPlan(**cached))
+            state["plan_cached"] = True
+            logger.info(f"[{request_id}] Planner reused cached plan, entities: {state['entities']}")
+            return state
+
         prompt = f"""
 You are a Query Planning Agent for an Enterprise Super RAG system.
 
@@ -46,28 +73,20 @@ User Question:
 """
 
         try:
-            response = self.client.models.generate_content(
+            plan, plan_json = await generate_structured(
+                agent="planner",
                 model=self.model,
                 contents=prompt,
+                schema=QueryPlan,
                 config=types.GenerateContentConfig(
                     temperature=0.2
-                )
+                ),
+                request_id=request_id
             )
+            log_payload(logger, request_id, "Planner raw output", plan_json)
 
-            plan_json = response.text
-            logger.info(f"[{request_id}] Planner raw output: {plan_json}")
-
-            # Remove Markdown code fences if present
-            if plan_json.startswith("```"):
-                plan_json: str = plan_json.replace("```json", "").replace("```", "").strip()
-
-            # Parse JSON safely
-            plan = json.loads(plan_json)
-
-            state["entities"] = plan.get("entities", [])
-            state["required_attributes"] = plan.get("required_attributes", [])
-            state["plan_steps"] = plan.get("reasoning_steps", [])
-            state["document_hints"] = plan.get("document_hints", [])
+            self._apply(state, plan)
+            self.cache.store(query, state.get("query_embedding"), plan.model_dump())
 
             logger.info(f"[{request_id}] Planner entities: {state['entities']}")
             logger.info(f"[{request_id}] Planner attributes: {state['required_attributes']}")
@@ -76,6 +95,9 @@ User Question:
 
             return state
 
+        except LLMOverloadedError:
+            raise
+
         except Exception as e:
             logger.exception(f"[{request_id}] Planner failed")
             state["error"] = "Planner failed to generate structured plan" + str(e)
@@ -2,64 +2,120 @@ import logging
 import time
 from typing import List
 
-from langchain_qdrant import QdrantVectorStore
-from langchain_core.documents import Document
-
-from infrastructure.qdrant_client import QdrantClientProvider
-from infrastructure.embedding_client import EmbeddingClientProvider
+from infrastructure.corpora import LEGACY_DOCS_COLLECTION, VectorStoreRegistry
 from infrastructure.llm_client import LLMClientProvider
+from infrastructure.llm_scheduler import LLMOverloadedError
 from google.genai import types
 
 logger = logging.getLogger("SimpleRAGAgent")
 
+# Reply marker the LLM uses (cascade mode) when the context can't answer the question
+INSUFFICIENT_MARKER = "INSUFFICIENT_CONTEXT"
+
 
 class SimpleRAGAgent:
     """
     Tier-2 RAG Agent.
     Handles straightforward factual queries using vector retrieval + LLM.
+
+    run() = retrieve() + answer(). The cascade mode in OrchestratorAgent calls
+    the two steps separately so it can escalate between them.
+
+    Searches state["collections"] (the request's corpora) when set,
+    otherwise `collection_name`.
     """
 
-    def __init__(self, collection_name: str = "enterprise_docs"):
-        self.client = QdrantClientProvider.get_client()
-        self.embeddings = EmbeddingClientProvider.get_embeddings()
-        self.llm = LLMClientProvider.get_client()
+    def __init__(self, collection_name: str = LEGACY_DOCS_COLLECTION, k: int = 5):
+        self.collection_name = collection_name
         self.model = LLMClientProvider.get_formatter_model()
-
-        self.vector_store = QdrantVectorStore(
-            client=self.client,
-            collection_name=collection_name,
-            embedding=self.embeddings
-        )
+        self.k = k
 
     async def run(self, state: dict) -> dict:
+        state = await self.retrieve(state)
+        if state.get("error") or not state.get("retrieved_chunks"):
+            return state
+        return await self.answer(state)
+
+    async def retrieve(self, state: dict, k: int = None) -> dict:
+        """
+        Vector search only. Stores the hits (text, source, score, corpus
+        collection) in state["retrieved_chunks"], best first.
+        """
         request_id = state.get("request_id", "NA")
         query = state["query"]
 
         logger.info(f"[{request_id}] SimpleRAGAgent started")
-        start_time = time.time()
+        state["rag_started_at"] = time.time()
 
         try:
             # 1. Retrieve relevant chunks
-            docs_with_scores = self.vector_store.similarity_search_with_score(query, k=5)
+            docs_with_scores = await VectorStoreRegistry.search(
+                state.get("collections") or [self.collection_name],
+                query,
+                k=k or self.k,
+                tenant=state.get("tenant"),
+                embedding=state.get("query_embedding")
+            )
+
+            state["retrieved_chunks"] = [
+                {
+                    "text": doc.page_content,
+                    "source": doc.metadata.get("source"),
+                    # Deduplicated chunks list every file they appear in
+                    "sources": [ref["source"] for ref in doc.metadata.get("sources") or []],
+                    "source_refs": doc.metadata.get("sources") or [],
+                    "path": doc.metadata.get("path"),
+                    "chunk_id": doc.metadata.get("chunk_id"),
+                    "score": score,
+                    "collection": collection
+                }
+                for doc, score, collection in docs_with_scores
+            ]
 
             if not docs_with_scores:
                 logger.warning(f"[{request_id}] No relevant documents found in vector store")
                 state["final_answer"] = "No relevant information found in the knowledge base."
                 state["sources"] = []
                 state["mode"] = "Simple RAG (No Hit)"
-                return state
 
+            return state
+
+        except Exception as e:
+            logger.exception(f"[{request_id}] SimpleRAGAgent failed")
+            state["error"] = str(e)
+            state["mode"] = "Simple RAG (Error)"
+            return state
+
+    async def answer(self, state: dict) -> dict:
+        """
+        Answers from the top-k retrieved chunks.
+        With state["cascade"] set, the model is asked to reply with
+        INSUFFICIENT_MARKER when the context can't answer; that sets
+        state["rag_insufficient"] instead of a final answer.
+        """
+        request_id = state.get("request_id", "NA")
+        query = state["query"]
+        start_time = state.get("rag_started_at") or time.time()
+
+        try:
             # 2. Prepare context and sources
             context_parts: List[str] = []
             sources = set()
 
-            for doc, score in docs_with_scores:
-                context_parts.append(doc.page_content)
-                if "source" in doc.metadata:
-                    sources.add(doc.metadata["source"])
+            for chunk in state["retrieved_chunks"][:self.k]:
+                context_parts.append(chunk["text"])
+                if chunk["source"]:
+                    sources.add(chunk["source"])
+                sources.update(chunk.get("sources") or [])
 
             context = "\n\n".join(context_parts)
 
+            insufficient_instruction = (
+                f"- If the context does not contain the answer, reply with exactly {INSUFFICIENT_MARKER}."
+                if state.get("cascade") else
+                "- If the answer is not in the context, say so."
+            )
+
             prompt = f"""
 You are a factual enterprise assistant.
 Answer strictly based on the provided context.
@@ -73,11 +129,12 @@ Question:
 Instructions:
 - Be concise and accurate.
 - Do not hallucinate.
-- If the answer is not in the context, say so.
+{insufficient_instruction}
 """
 
             # 3. Call LLM
-            response = self.llm.models.generate_content(
+            response = await LLMClientProvider.generate_content(
+                agent="simple_rag",
                 model=self.model,
                 contents=prompt,
                 config=types.GenerateContentConfig(temperature=0.1)
@@ -87,6 +144,11 @@ Instructions:
 
             latency = round(time.time() - start_time, 2)
 
+            if state.get("cascade") and answer.startswith(INSUFFICIENT_MARKER):
+                logger.info(f"[{request_id}] SimpleRAGAgent reports insufficient context after {latency}s")
+                state["rag_insufficient"] = True
+                return state
+
             # 4. Populate state
             state["final_answer"] = answer
             state["sources"] = list(sources)
@@ -98,6 +160,9 @@ Instructions:
 
             return state
 
+        except LLMOverloadedError:
+            raise
+
         except Exception as e:
             logger.exception(f"[{request_id}] SimpleRAGAgent failed")
             state["error"] = str(e)
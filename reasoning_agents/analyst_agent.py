@@ -1,7 +1,17 @@
+import os
+import time
+import asyncio
 import logging
-import json
+from typing import Dict, List, Optional, Tuple
 from google.genai import types
 from infrastructure.llm_client import LLMClientProvider
+from infrastructure.llm_scheduler import LLMOverloadedError
+from infrastructure.logging_config import log_payload
+from infrastructure.structured_output import generate_structured
+from infrastructure.token_counter import count_tokens
+from ingestion_agents.chunker_agent import split_documents
+from reasoning_agents.long_context_loader_agent import drop_document_texts
+from state import AnalysisResult, DocumentExtract
 
 logger = logging.getLogger("AnalystAgent")
 
@@ -15,22 +25,158 @@ class AnalystAgent:
       - long-context (cache or fallback)
     Produces:
       - structured JSON analysis
+
+    In map-reduce mode (set by the context loader for large contexts), the
+    documents are split into parts of at most MAP_PART_TOKENS; the extractor
+    model (Flash) pulls the relevant facts out of every part in parallel
+    (MAP_CONCURRENCY at a time), and the analyst model reasons over the
+    compact extracts only.
+
+    state["analyst_model"] overrides the model for one request (set by the
+    orchestrator when a latency budget forces a downgrade).
     """
 
     def __init__(self):
-        self.client = LLMClientProvider.get_client()
         self.model = LLMClientProvider.get_analyst_model()
+        self.extractor_model = LLMClientProvider.get_extractor_model()
+        self.map_part_tokens = int(os.getenv("MAP_PART_TOKENS", "32000"))
+        self.map_concurrency = int(os.getenv("MAP_CONCURRENCY", "8"))
+
+    def _split(self, documents: List[Dict]) -> List[Tuple[str, int, str]]:
+        """
+        (doc_name, part number, text) for every part, split at section boundaries.
+        """
+        per_document = split_documents(
+            [{"source": doc["doc_name"], "text": doc["full_text"]} for doc in documents],
+            mode="tokens",
+            chunk_size=self.map_part_tokens,
+            chunk_overlap=min(512, self.map_part_tokens // 16)
+        )
+        return [
+            (chunk["source"], chunk["chunk_id"], chunk["text"])
+            for chunks in per_document for chunk in chunks
+        ]
+
+    async def _extract(
+        self,
+        request_id: str,
+        query: str,
+        attributes: List[str],
+        doc_name: str,
+        text: str,
+        semaphore: asyncio.Semaphore
+    ) -> DocumentExtract:
+        question = f"""
+You are a document fact extractor.
+
+User Question:
+{query}
+
+Information to Derive:
+{attributes}
+
+Document: {doc_name}
+---
+"""
+        instructions = """
+---
+
+Instructions:
+1. List every fact in this document that helps answer the question or derive the information above.
+2. Quote the supporting sentence verbatim as evidence and give its section number or heading.
+3. Keep each fact short; do not summarise unrelated content.
+4. If nothing is relevant, return relevant=false and no facts.
+5. Return ONLY valid JSON in the following format:
+
+{
+  "relevant": true,
+  "facts": [{"fact": "what is stated", "value": "value if any", "section": "4.2", "evidence": "quoted sentence"}]
+}
+"""
+        # The document text goes in its own part instead of being copied into the prompt string
+        contents = [types.Part.from_text(text=t) for t in (question, text, instructions)]
+
+        async with semaphore:
+            result, _ = await generate_structured(
+                agent="analyst_map",
+                model=self.extractor_model,
+                contents=contents,
+                schema=DocumentExtract,
+                config=types.GenerateContentConfig(temperature=0.0),
+                request_id=request_id
+            )
+        return result
+
+    async def _map(self, state: dict) -> Tuple[str, Dict]:
+        """
+        Runs the map step. Returns the rendered extracts (used as the analyst
+        and citation context) and the map-reduce stats.
+        """
+        request_id = state.get("request_id", "NA")
+        documents = state.get("relevant_documents", [])
+        start = time.perf_counter()
+
+        parts = await asyncio.to_thread(self._split, documents)
+        drop_document_texts(state)
+        logger.info(f"[{request_id}] Map step: {len(parts)} parts from {len(documents)} documents")
+
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+        results = await asyncio.gather(*(
+            self._extract(
+                request_id, state.get("query", ""), state.get("required_attributes", []),
+                doc_name, text, semaphore
+            )
+            for doc_name, _, text in parts
+        ), return_exceptions=True)
+
+        failed = [r for r in results if isinstance(r, BaseException)]
+        for error in failed:
+            if isinstance(error, LLMOverloadedError):
+                raise error
+        if failed and len(failed) == len(results):
+            raise failed[0]
+        for error in failed:
+            logger.warning(f"[{request_id}] Map extraction failed for one part: {error}")
+        if failed:
+            # Answer from the remaining parts, but keep it out of semantic memory
+            state.setdefault("degradations", []).append("map_parts_failed")
+
+        # Render per document, in retrieval order, skipping parts with nothing relevant
+        rendered: Dict[str, List[str]] = {doc["doc_name"]: [] for doc in documents}
+        for (doc_name, _, _), result in zip(parts, results):
+            if isinstance(result, BaseException) or not result.relevant:
+                continue
+            for f in result.facts:
+                value = f": {f.value}" if f.value else ""
+                section = f"[{f.section}] " if f.section else ""
+                evidence = f' | "{f.evidence}"' if f.evidence else ""
+                rendered[doc_name].append(f"- {section}{f.fact}{value}{evidence}")
+
+        extracts = "".join(
+            f"\n\n--- Document: {doc_name} ---\n" + "\n".join(lines)
+            for doc_name, lines in rendered.items() if lines
+        ) or "No relevant facts were found in the documents."
+
+        stats = {
+            "documents": len(documents),
+            "parts": len(parts),
+            "parts_failed": len(failed),
+            "context_tokens": state.get("context_tokens"),
+            "extract_tokens": count_tokens(extracts),
+            "map_seconds": round(time.perf_counter() - start, 3)
+        }
+        return extracts, stats
 
     async def run(self, state: dict) -> dict:
         request_id = state.get("request_id", "NA")
+        model = state.get("analyst_model") or self.model
 
-        logger.info(f"[{request_id}] AnalystAgent started using model {self.model}")
+        logger.info(f"[{request_id}] AnalystAgent started using model {model}")
 
         entities = state.get("entities", [])
         attributes = state.get("required_attributes", [])
         plan_steps = state.get("plan_steps", [])
         cache_id = state.get("cache_id")
-        big_context = state.get("big_context_fallback")
 
         analysis_prompt = f"""
 You are a senior enterprise analyst AI.
@@ -56,7 +202,7 @@ Instructions:
 
 {{
   "entities": {entities},
-  "derived_facts": {{ }},
+  "derived_facts": [{{"name": "fact_key", "value": "derived value"}}],
   "analysis": "step-by-step reasoning",
   "final_conclusion": "clear answer to the user",
   "confidence": 0.0
@@ -64,55 +210,73 @@ Instructions:
 """
 
         try:
+            map_stats: Optional[Dict] = None
+            if state.get("analysis_mode") == "map_reduce":
+                extracts, map_stats = await self._map(state)
+                # The citation agent grounds on the same extracts the analyst saw
+                state["context_parts"] = [types.Part.from_text(text=extracts)]
+                cache_id = None
+                logger.info(
+                    f"[{request_id}] Reducing {map_stats['extract_tokens']} extract tokens "
+                    f"(from {map_stats['context_tokens']} context tokens)"
+                )
+
+            reduce_start = time.perf_counter()
             if cache_id:
                 logger.info(f"[{request_id}] Using Gemini Cached Content: {cache_id}")
 
-                response = self.client.models.generate_content(
-                    model=self.model,
+                result, raw_text = await generate_structured(
+                    agent="analyst",
+                    model=model,
                     contents=analysis_prompt,
+                    schema=AnalysisResult,
                     config=types.GenerateContentConfig(
                         cached_content=cache_id,
                         temperature=0.1
-                    )
+                    ),
+                    request_id=request_id
                 )
             else:
-                logger.info(f"[{request_id}] Using inline long-context fallback")
-
-                full_prompt = f"""
-                Context Documents:
-                {big_context}
+                logger.info(f"[{request_id}] Using inline context ({'map-reduce extracts' if map_stats else 'long-context fallback'})")
 
-                {analysis_prompt}
-                """
+                contents = [
+                    types.Part.from_text(text="Context Documents:"),
+                    *state.get("context_parts", []),
+                    types.Part.from_text(text=analysis_prompt)
+                ]
 
-                response = self.client.models.generate_content(
-                    model=self.model,
-                    contents=full_prompt,
+                result, raw_text = await generate_structured(
+                    agent="analyst",
+                    model=model,
+                    contents=contents,
+                    schema=AnalysisResult,
                     config=types.GenerateContentConfig(
                         temperature=0.1
-                    )
+                    ),
+                    request_id=request_id
                 )
 
-            raw_text = response.text.strip()
-            logger.info(f"[{request_id}] Analyst raw response received: {raw_text}")
+            log_payload(logger, request_id, "Analyst raw response received", raw_text)
 
-            # Remove Markdown code fences if present
-            if raw_text.startswith("```"):
-                raw_text: str = raw_text.replace("```json", "").replace("```", "").strip()
+            if map_stats is not None:
+                map_stats["reduce_seconds"] = round(time.perf_counter() - reduce_start, 3)
+                state["map_reduce"] = map_stats
 
-            # Parse structured JSON
-            analysis_json = json.loads(raw_text)
+            analysis_json = result.to_state()
 
             state["analysis_json"] = analysis_json
             state["final_answer"] = analysis_json.get("final_conclusion")
             state["mode"] = "Super RAG (Long-Context Agentic Reasoning)"
 
-            logger.info(f"[{request_id}] Analyst final conclusion: {analysis_json.get('final_conclusion')}")
+            log_payload(logger, request_id, "Analyst final conclusion", analysis_json.get("final_conclusion"))
 
             logger.info(f"[{request_id}] Analyst completed reasoning successfully")
 
             return state
 
+        except LLMOverloadedError:
+            raise
+
         except Exception as e:
             logger.exception(f"[{request_id}] AnalystAgent failed \n with error: {str(e)}")
             state["error"] = str(e)
@@ -1,18 +1,51 @@
+import os
+import asyncio
 import logging
+from typing import List
 from google.genai import types
 from infrastructure.llm_client import LLMClientProvider
+from infrastructure.telemetry import record_cache_lookup
+from infrastructure.token_counter import count_tokens
 
 logger = logging.getLogger("LongContextLoaderAgent")
 
+
+def build_context_parts(documents: List[dict]) -> List[types.Part]:
+    """
+    One header part and one text part per document. The text parts reference
+    the documents' strings, so the context exists once however many prompts use it.
+    """
+    parts = []
+    for doc in documents:
+        parts.append(types.Part.from_text(text=f"\n\n--- Document: {doc['doc_name']} ---\n"))
+        parts.append(types.Part.from_text(text=doc["full_text"]))
+    return parts
+
+
+def drop_document_texts(state: dict):
+    """
+    Keeps names and metadata of state["relevant_documents"], releasing the full texts.
+    """
+    state["relevant_documents"] = [
+        {k: v for k, v in doc.items() if k != "full_text"}
+        for doc in state.get("relevant_documents", [])
+    ]
+
+
 class LongContextLoaderAgent:
     """
     Loads full relevant documents into Gemini Cached Content (long context).
-    Falls back to inline context if caching fails.
+    Falls back to inline context if caching fails: state["context_parts"]
+    (see build_context_parts), which the analyst and citation agents pass to
+    the SDK as content parts and the citation agent drops when done.
+
+    At or above MAP_REDUCE_MIN_TOKENS of context, nothing is cached: the
+    analyst switches to map-reduce mode and reads the documents itself.
     """
 
     def __init__(self):
-        self.client = LLMClientProvider.get_client()
         self.model = LLMClientProvider.get_analyst_model()
+        self.map_reduce_min_tokens = int(os.getenv("MAP_REDUCE_MIN_TOKENS", "200000"))
 
     async def run(self, state: dict) -> dict:
         request_id = state.get("request_id", "NA")
@@ -25,17 +58,31 @@ class LongContextLoaderAgent:
             logger.warning(f"[{request_id}] No documents provided for long-context loading")
             return state
 
-        # Combine all document texts with separators
-        combined_text = ""
-        for doc in documents:
-            combined_text += f"\n\n--- Document: {doc['doc_name']} ---\n"
-            combined_text += doc["full_text"]
+        parts = build_context_parts(documents)
+        state["context_tokens"] = await asyncio.to_thread(
+            lambda: sum(count_tokens(part.text) for part in parts)
+        )
+
+        if self.map_reduce_min_tokens and state["context_tokens"] >= self.map_reduce_min_tokens:
+            logger.info(
+                f"[{request_id}] Context is {state['context_tokens']} tokens "
+                f"(>= {self.map_reduce_min_tokens}), using map-reduce analysis"
+            )
+            # The analyst splits the documents itself and releases their texts
+            state["analysis_mode"] = "map_reduce"
+            state["cache_id"] = None
+            state["context_parts"] = []
+            return state
+
+        state["analysis_mode"] = "single"
+        drop_document_texts(state)
 
         try:
             logger.info(f"[{request_id}] Attempting Gemini Cached Content creation")
 
-            cache_result = self.client.caches.create(
-                model=self.model,
+            cache_result = await LLMClientProvider.create_cache(
+                agent="context_loader",
+                model=state.get("analyst_model") or self.model,
                 config=types.CreateCachedContentConfig(
                     display_name=f"super_rag_cache_{request_id}",
                     system_instruction=(
@@ -43,13 +90,14 @@ class LongContextLoaderAgent:
                         "Answer strictly based on the provided documents. "
                         "Perform deep cross-document analysis and return structured JSON."
                     ),
-                    contents=[combined_text],
+                    contents=[types.Content(role="user", parts=parts)],
                     ttl="3600s"
                 )
             )
 
             state["cache_id"] = cache_result.name
-            state["big_context_fallback"] = None
+            state["context_parts"] = []
+            record_cache_lookup("gemini_context_cache", hit=True)
 
             logger.info(f"[{request_id}] Long context cached successfully. Cache ID: {cache_result.name}")
 
@@ -59,8 +107,9 @@ class LongContextLoaderAgent:
             logger.exception(e)
 
             state["cache_id"] = None
-            state["big_context_fallback"] = combined_text
+            state["context_parts"] = parts
+            record_cache_lookup("gemini_context_cache", hit=False)
 
-            logger.info(f"[{request_id}] Stored combined documents in big_context_fallback for direct prompting")
+            logger.info(f"[{request_id}] Kept {len(parts)} document parts in context_parts for direct prompting")
 
         return state
@@ -2,6 +2,8 @@ import logging
 from google.genai import types
 import json
 from infrastructure.llm_client import LLMClientProvider
+from infrastructure.llm_scheduler import LLMOverloadedError
+from infrastructure.logging_config import log_payload
 
 logger = logging.getLogger("ResponseFormatterAgent")
 
@@ -12,7 +14,6 @@ class ResponseFormatterAgent:
     """
 
     def __init__(self):
-        self.client = LLMClientProvider.get_client()
         self.model = LLMClientProvider.get_formatter_model()
 
     async def run(self, state: dict) -> dict:
@@ -48,7 +49,8 @@ Produce:
 """
 
         try:
-            response = self.client.models.generate_content(
+            response = await LLMClientProvider.generate_content(
+                agent="formatter",
                 model=self.model,
                 contents=prompt,
                 config=types.GenerateContentConfig(
@@ -57,7 +59,7 @@ Produce:
             )
 
             final_text = response.text.strip()
-            logger.info(f"[{request_id}] Final answer: {final_text}")
+            log_payload(logger, request_id, "Final answer", final_text)
             
             state["final_answer"] = final_text
             state["mode"] = "Super RAG (Agentic Long-Context Reasoning)"
@@ -65,6 +67,9 @@ Produce:
             logger.info(f"[{request_id}] Final answer formatted successfully")
             return state
 
+        except LLMOverloadedError:
+            raise
+
         except Exception as e:
             logger.exception(f"[{request_id}] ResponseFormatterAgent failed")
             state["error"] = str(e)
@@ -1,8 +1,6 @@
 import logging
 import os
-from langchain_qdrant import QdrantVectorStore
-from infrastructure.embedding_client import EmbeddingClientProvider
-from infrastructure.qdrant_client import QdrantClientProvider
+from infrastructure.corpora import LEGACY_DOCS_COLLECTION, VectorStoreRegistry
 
 logger = logging.getLogger("DocumentHunterAgent")
 
@@ -11,21 +9,25 @@ class DocumentHunterAgent:
     """
     Retrieves full documents relevant to the planner output
     using semantic vector search + metadata filtering.
-    """
-
-    def __init__(self):
-        self.embeddings = EmbeddingClientProvider.get_embeddings()
-        self.qdrant_client = QdrantClientProvider.get_client()
 
-        # Reuse the same collection as RAG
-        self.vector_store = QdrantVectorStore(
-            client=self.qdrant_client,
-            collection_name="enterprise_docs",
-            embedding=self.embeddings
-        )
+    Full documents are read from the path stored with each chunk at
+    ingestion time; chunks ingested before paths were stored fall back
+    to data_dir/<source>. A deduplicated chunk brings in every file it
+    appears in (its "sources" refs), not only the one it is stored under.
+    """
 
+    def __init__(self, k: int = 10, collection_name: str = LEGACY_DOCS_COLLECTION):
+        self.k = k
+        self.collection_name = collection_name  # same default collection as RAG
         self.data_dir = "data"  # where original PDFs/TXTs exist
 
+    @staticmethod
+    def _refs(source, path, refs) -> list:
+        """
+        (source, path) of the file a chunk is stored under, then of its copies.
+        """
+        return [(source, path)] + [(ref.get("source"), ref.get("path")) for ref in refs or []]
+
     async def run(self, state: dict) -> dict:
         request_id = state.get("request_id", "NA")
 
@@ -39,21 +41,38 @@ class DocumentHunterAgent:
         logger.info(f"[{request_id}] Planner entities: {entities}")
 
         try:
-            # 1. Semantic search
-            results = self.vector_store.similarity_search(query, k=10)
-
-            # 2. Group by document source
-            doc_names = set()
-            for doc in results:
-                if "source" in doc.metadata:
-                    doc_names.add(doc.metadata["source"])
-
-            logger.info(f"[{request_id}] Candidate documents from vector search: {list(doc_names)}")
+            # 1. Semantic search (skipped when cascade mode already retrieved chunks)
+            retrieved = state.get("retrieved_chunks")
+            if retrieved:
+                logger.info(f"[{request_id}] Reusing {len(retrieved)} chunks retrieved by SimpleRAGAgent")
+                sources = [
+                    ref for c in retrieved
+                    for ref in self._refs(c["source"], c.get("path"), c.get("source_refs"))
+                ]
+            else:
+                results = await VectorStoreRegistry.search(
+                    state.get("collections") or [self.collection_name],
+                    query,
+                    k=self.k,
+                    tenant=state.get("tenant"),
+                    embedding=state.get("query_embedding")
+                )
+                sources = [
+                    ref for doc, _, _ in results
+                    for ref in self._refs(doc.metadata.get("source"), doc.metadata.get("path"), doc.metadata.get("sources"))
+                ]
+
+            # 2. Group by document (source, path), in retrieval order
+            doc_paths = dict.fromkeys(
+                (source, path or os.path.join(self.data_dir, source))
+                for source, path in sources if source
+            )
+
+            logger.info(f"[{request_id}] Candidate documents from vector search: {[s for s, _ in doc_paths]}")
 
             # 3. Load full documents from disk
             full_docs = []
-            for doc_name in doc_names:
-                full_path = os.path.join(self.data_dir, doc_name)
+            for doc_name, full_path in doc_paths:
                 if os.path.exists(full_path):
                     with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
                         text = f.read()
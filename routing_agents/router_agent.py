@@ -1,8 +1,13 @@
+import os
 import logging
-import json
 from google.genai import types
 
 from infrastructure.llm_client import LLMClientProvider
+from infrastructure.llm_scheduler import LLMOverloadedError
+from infrastructure.logging_config import log_payload
+from infrastructure.structured_output import generate_structured
+from memory_agents.decision_cache import DecisionCache
+from state import RouterDecision
 
 logger = logging.getLogger("RouterAgent")
 
@@ -12,11 +17,17 @@ class RouterAgent:
     Decides whether a query requires:
     - SIMPLE_LOOKUP  → SimpleRAGAgent
     - COMPLEX_REASONING → Planner + SuperRAG pipeline
+
+    Decisions are reused for the same or a similar question
+    (ROUTER_CACHE_SIMILARITY_THRESHOLD, see DecisionCache).
     """
 
     def __init__(self):
-        self.llm = LLMClientProvider.get_client()
         self.model = LLMClientProvider.get_router_model()
+        self.cache = DecisionCache(
+            "router_decision",
+            similarity_threshold=float(os.getenv("ROUTER_CACHE_SIMILARITY_THRESHOLD", "0.9"))
+        )
 
     async def run(self, state: dict) -> dict:
         request_id = state.get("request_id", "NA")
@@ -24,6 +35,14 @@ class RouterAgent:
 
         logger.info(f"[{request_id}] RouterAgent evaluating query: {query}")
 
+        cached = self.cache.lookup(query, state.get("query_embedding"))
+        if cached is not None:
+            state["intent"] = cached["intent"]
+            state["routing_reason"] = cached["reason"]
+            state["routing_cached"] = True
+            logger.info(f"[{request_id}] Router decision (cached): {state['intent']}")
+            return state
+
         prompt = f"""
 You are a routing classifier for an enterprise AI system.
 
@@ -51,32 +70,32 @@ User Query:
 """
 
         try:
-            response = self.llm.models.generate_content(
+            result, raw = await generate_structured(
+                agent="router",
                 model=self.model,
                 contents=prompt,
+                schema=RouterDecision,
                 config=types.GenerateContentConfig(
                     temperature=0.0
-                )
+                ),
+                request_id=request_id
             )
+            log_payload(logger, request_id, "Router raw response", raw)
 
-            raw = response.text.strip()
-            logger.info(f"[{request_id}] Router raw response: {raw}")
-
-            # Remove Markdown code fences if present
-            if raw.startswith("```"):
-                raw: str = raw.replace("```json", "").replace("```", "").strip()
-
-            result = json.loads(raw)
-            intent = result.get("intent", "SIMPLE_LOOKUP")
-            reason = result.get("reason", "")
+            intent = result.intent
+            reason = result.reason
 
             state["intent"] = intent
             state["routing_reason"] = reason
+            self.cache.store(query, state.get("query_embedding"), {"intent": intent, "reason": reason})
 
             logger.info(f"[{request_id}] Router decision: {intent} ({reason})")
 
             return state
 
+        except LLMOverloadedError:
+            raise
+
         except Exception as e:
             # Fallback: rule-based heuristic
             logger.exception(f"[{request_id}] Router LLM failed, using fallback rules")
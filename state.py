@@ -1,5 +1,5 @@
-from typing import Dict, Any, List, Optional
-from pydantic import BaseModel
+from typing import Dict, Any, List, Literal, Optional
+from pydantic import BaseModel, field_validator
 
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
@@ -25,7 +25,15 @@ class AgentState(BaseModel):
 
     # Long context
     cache_id: Optional[str] = None
-    big_context_fallback: Optional[str] = None
+    context_parts: List[Any] = []  # inline context as google.genai Parts (when not cached)
+    context_tokens: Optional[int] = None
+    analysis_mode: Optional[str] = None  # single or map_reduce
+    map_reduce: Optional[Dict[str, Any]] = None  # map-reduce stats (parts, tokens, seconds)
+
+    # Latency budget
+    latency_budget: Optional[float] = None  # seconds for the pipeline run
+    analyst_model: Optional[str] = None     # fast-model override when the budget is at risk
+    degradations: List[str] = []            # skip_citation, skip_formatter, analyst_fast_model
 
     # Analyst output (structured reasoning)
     analysis_json: Optional[Dict[str, Any]] = None
@@ -45,7 +53,97 @@ class AgentState(BaseModel):
     # Semantic search details
     semantic_hit: bool = False
     semantic_score: Optional[float] = None
+    memory_stored: bool = False  # the answer was written to semantic memory
 
     # Error handling
     error: Optional[str] = None
 
+
+
+# ---------------- Structured LLM outputs ----------------
+# Passed as response_schema to Gemini and used to validate replies.
+# Gemini schemas have no free-form maps, so keyed facts / citations are
+# lists of objects here and turned back into dicts by to_state().
+
+class RouterDecision(BaseModel):
+    intent: Literal["SIMPLE_LOOKUP", "COMPLEX_REASONING"]
+    reason: str = ""
+
+
+class QueryPlan(BaseModel):
+    entities: List[str] = []
+    required_attributes: List[str] = []
+    document_hints: List[str] = []
+    reasoning_steps: List[str] = []
+
+
+class DerivedFact(BaseModel):
+    name: str
+    value: str
+
+
+class AnalysisResult(BaseModel):
+    entities: List[str] = []
+    derived_facts: List[DerivedFact] = []
+    analysis: str = ""
+    final_conclusion: str
+    confidence: float = 0.0
+
+    @field_validator("derived_facts", mode="before")
+    @classmethod
+    def _facts_from_dict(cls, value):
+        if isinstance(value, dict):
+            return [{"name": k, "value": str(v)} for k, v in value.items()]
+        return value
+
+    def to_state(self) -> Dict[str, Any]:
+        data = self.model_dump()
+        data["derived_facts"] = {f.name: f.value for f in self.derived_facts}
+        return data
+
+
+class ExtractedFact(BaseModel):
+    fact: str
+    value: str = ""
+    section: str = ""
+    evidence: str = ""
+
+
+class DocumentExtract(BaseModel):
+    relevant: bool = True
+    facts: List[ExtractedFact] = []
+
+
+class Evidence(BaseModel):
+    document: str = ""
+    section: str = ""
+    evidence: str = ""
+
+
+class FactCitation(Evidence):
+    fact: str
+
+
+class Citations(BaseModel):
+    derived_facts: List[FactCitation] = []
+    final_conclusion: Optional[Evidence] = None
+
+    @field_validator("derived_facts", mode="before")
+    @classmethod
+    def _citations_from_dict(cls, value):
+        if isinstance(value, dict):
+            return [{"fact": k, **(v if isinstance(v, dict) else {"evidence": str(v)})} for k, v in value.items()]
+        return value
+
+
+class CitationResult(BaseModel):
+    citations: Citations
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "derived_facts": {
+                c.fact: {"document": c.document, "section": c.section, "evidence": c.evidence}
+                for c in self.citations.derived_facts
+            },
+            "final_conclusion": self.citations.final_conclusion.model_dump() if self.citations.final_conclusion else None
+        }